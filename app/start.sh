@@ -12,9 +12,28 @@ BIND_ADDRESS="${GUNICORN_BIND:-0.0.0.0:8000}"
 THREADS="${GUNICORN_THREADS:-1}"
 TIMEOUT="${GUNICORN_TIMEOUT:-30}"
 
-exec gunicorn testapp.wsgi:application \
+# sync/gthread serve testapp.wsgi; uvicorn serves testapp.asgi with async
+# salary views.
+WORKER_CLASS="${GUNICORN_WORKER_CLASS:-sync}"
+case "${WORKER_CLASS}" in
+  sync|gthread)
+    APPLICATION="testapp.wsgi:application"
+    ;;
+  uvicorn)
+    APPLICATION="testapp.asgi:application"
+    WORKER_CLASS="uvicorn.workers.UvicornWorker"
+    export SALARY_ASYNC_VIEWS="${SALARY_ASYNC_VIEWS:-1}"
+    ;;
+  *)
+    echo "Unsupported GUNICORN_WORKER_CLASS '${WORKER_CLASS}' (use sync, gthread or uvicorn)" >&2
+    exit 1
+    ;;
+esac
+
+exec gunicorn "${APPLICATION}" \
   --bind "${BIND_ADDRESS}" \
   --workers "${WORKERS}" \
+  --worker-class "${WORKER_CLASS}" \
   --threads "${THREADS}" \
   --timeout "${TIMEOUT}" \
   --log-file - \
@@ -9,8 +9,12 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'testapp.settings')
+django.setup(set_prefix=False)
 
-application = get_asgi_application()
+# Imported once the app registry is ready; streams exports off the event loop.
+from testapp.async_views import SalaryASGIHandler  # noqa: E402
+
+application = SalaryASGIHandler()
@@ -0,0 +1,163 @@
+import asyncio
+import queue
+import threading
+import weakref
+from functools import wraps
+from typing import Callable, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+
+from . import views
+from .rebuild import can_parallelize
+
+_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(getattr(settings, "SALARY_ASYNC_CONCURRENCY", 16))
+        _SEMAPHORES[loop] = semaphore
+    return semaphore
+
+
+def _with_connection_cleanup(view: Callable) -> Callable:
+    @wraps(view)
+    def run(request, *args, **kwargs):
+        # Pool threads never see request_started/finished, so honour
+        # CONN_MAX_AGE around every call ourselves.
+        close_old_connections()
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return run
+
+
+_STREAM_DONE = object()
+
+
+def stream_in_thread(content: Iterable[bytes], buffer: int = 4) -> Iterator[bytes]:
+    """Iterate ``content`` on a helper thread, handing chunks over a bounded queue.
+
+    Streaming content may be pulled from any thread (``SalaryASGIHandler``
+    uses the pool, Django's own handler the event loop), while a database
+    cursor must stay on the thread that opened it, so the queryset behind an
+    export is consumed on a thread of its own. The queue keeps at most
+    ``buffer`` chunks in memory, and the producer stops once the client goes
+    away.
+    """
+    chunks: "queue.Queue" = queue.Queue(maxsize=buffer)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        close_old_connections()
+        try:
+            for chunk in content:
+                if not put(chunk):
+                    return
+            put(_STREAM_DONE)
+        except BaseException as exc:  # re-raised on the consuming side
+            put(exc)
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=produce, name="salary-stream", daemon=True).start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _STREAM_DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+
+
+class SalaryASGIHandler(ASGIHandler):
+    """ASGI handler that reads streaming responses off the event loop.
+
+    Django 3.2 iterates streaming content synchronously on the event loop, so
+    an export waiting for its next database chunk would stall every other
+    request of the worker. Each part is fetched on the thread pool instead;
+    other responses are sent by Django unchanged.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        headers = [
+            (header.encode("ascii"), value.encode("latin1")) for header, value in response.items()
+        ]
+        headers.extend(
+            (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+            for cookie in response.cookies.values()
+        )
+        await send(
+            {"type": "http.response.start", "status": response.status_code, "headers": headers}
+        )
+        parts = iter(response)
+        fetch = sync_to_async(next, thread_sensitive=False)
+        while True:
+            part = await fetch(parts, _STREAM_DONE)
+            if part is _STREAM_DONE:
+                break
+            for chunk, _last in self.chunk_bytes(part):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def async_view(view: Callable) -> Callable:
+    """Wrap a sync salary view as a bounded, non thread-sensitive async view.
+
+    The view runs on asgiref's thread pool rather than the single
+    thread-sensitive thread, so one slow comparison no longer blocks the other
+    requests of an ASGI worker; a semaphore per event loop caps concurrent
+    calls at ``SALARY_ASYNC_CONCURRENCY``. SQLite (single writer) and callers
+    inside a transaction keep the thread-sensitive default so every query
+    stays on one connection.
+    """
+    threaded = _with_connection_cleanup(view)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        async with _semaphore():
+            if can_parallelize():
+                response = await sync_to_async(threaded, thread_sensitive=False)(
+                    request, *args, **kwargs
+                )
+            else:
+                response = await sync_to_async(view)(request, *args, **kwargs)
+        if response.streaming:
+            response.streaming_content = stream_in_thread(response.streaming_content)
+        return response
+
+    return wrapper
+
+
+salary_summary = async_view(views.salary_summary)
+salary_comparison = async_view(views.salary_comparison)
+salary_insights = async_view(views.salary_insights)
+salary_bundle_view = async_view(views.salary_bundle_view)
+salary_batch = async_view(views.salary_batch)
+list_observations = async_view(views.list_observations)
+export_observations = async_view(views.export_observations)
+available_filters = async_view(views.available_filters)
@@ -0,0 +1,317 @@
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, Optional
+
+from django.db import DatabaseError, connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from .fingerprints import NATURAL_KEY, fingerprint
+from .models import SalaryObservation
+from .salary_data import (
+    compare_roles,
+    rebuild_role_aggregate,
+    rebuild_role_cube,
+    role_insights,
+    summarize_salaries,
+)
+from .snapshot import get_snapshot, np, reset_snapshot
+from .views import salary_summary
+
+ROLES = (
+    "software_engineer",
+    "data_scientist",
+    "data_engineer",
+    "cloud_engineer",
+    "product_owner",
+    "analista_de_sistemas",
+)
+LEVELS = ("junior", "pleno", "senior", "staff", "principal")
+STATES = (
+    "AC", "AL", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MG",
+    "MS", "PA", "PE", "PR", "RJ", "RN", "RS", "SC", "SE", "SP",
+)
+WORK_MODELS = ("remoto", "hibrido", "presencial")
+CURRENCIES = ("BRL", "USD")
+SOURCES = ("glassdoor", "levels_fyi", "linkedin", "stackoverflow")
+
+# Unique index of the ingest scenario before and after the fingerprint column
+# replaced the natural key constraint.
+INGEST_INDEXES = {"natural-key": NATURAL_KEY, "fingerprint": ("fingerprint",)}
+INGEST_TABLE = "salary_ingest_benchmark"
+INGEST_BATCH_SIZE = 5000
+
+# The first role is the one queried by the scenarios; weighting it keeps it
+# representative of the "large role" case the benchmarks care about.
+ROLE_WEIGHTS = (4, 2, 1, 1, 1, 1)
+
+
+@dataclass
+class BenchmarkResult:
+    scenario: str
+    variant: str
+    rows: int
+    queries: int
+    best_ms: float
+    median_ms: float
+    # Median CPU time of this process per call, next to the wall-clock times.
+    cpu_ms: float = 0.0
+    note: str = ""
+
+    def as_line(self) -> str:
+        line = (
+            f"{self.scenario:<12} {self.variant:<10} rows={self.rows:<9} "
+            f"queries={self.queries:<6} best={self.best_ms:9.2f}ms "
+            f"median={self.median_ms:9.2f}ms cpu={self.cpu_ms:9.2f}ms"
+        )
+        return f"{line} {self.note}" if self.note else line
+
+
+def synthetic_observations(count: int, seed: int = 0) -> Iterator[SalaryObservation]:
+    rng = random.Random(seed)
+    for index in range(count):
+        base_min = Decimal(rng.randrange(40_000, 400_000)) + Decimal(index % 100) / 100
+        base_max = base_min + rng.randrange(5_000, 80_000)
+        state = rng.choice(STATES)
+        yield SalaryObservation(
+            source=rng.choice(SOURCES),
+            role=rng.choices(ROLES, weights=ROLE_WEIGHTS)[0],
+            level=rng.choice(LEVELS),
+            location=f"{state} city {rng.randrange(3)}",
+            state=state,
+            country="Brazil",
+            currency=rng.choices(CURRENCIES, weights=(9, 1))[0],
+            work_model=rng.choice(WORK_MODELS),
+            base_salary_min=base_min,
+            base_salary_max=base_max,
+            total_compensation=base_max + rng.randrange(0, 60_000),
+        )
+
+
+def seed_observations(count: int, batch_size: int = 5000) -> None:
+    batch: List[SalaryObservation] = []
+    for observation in synthetic_observations(count):
+        batch.append(observation)
+        if len(batch) >= batch_size:
+            SalaryObservation.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        SalaryObservation.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def measure(
+    scenario: str,
+    variant: str,
+    rows: int,
+    func: Callable[[], object],
+    repeat: int,
+) -> BenchmarkResult:
+    timings: List[float] = []
+    cpu_timings: List[float] = []
+    queries = 0
+    for _ in range(max(repeat, 1)):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            cpu_started = time.process_time()
+            func()
+            cpu_timings.append((time.process_time() - cpu_started) * 1000)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = len(captured)
+    return BenchmarkResult(
+        scenario=scenario,
+        variant=variant,
+        rows=rows,
+        queries=queries,
+        best_ms=min(timings),
+        median_ms=statistics.median(timings),
+        cpu_ms=statistics.median(cpu_timings),
+    )
+
+
+Scenario = Callable[[int, int], List[BenchmarkResult]]
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str) -> Callable[[Scenario], Scenario]:
+    def register(func: Scenario) -> Scenario:
+        SCENARIOS[name] = func
+        return func
+
+    return register
+
+
+@scenario("summary")
+def summary_scenario(rows: int, repeat: int) -> List[BenchmarkResult]:
+    results: List[BenchmarkResult] = []
+    for engine in ("fanout", "grouped"):
+        with override_settings(SALARY_SUMMARY_ENGINE=engine):
+            results.append(
+                measure(
+                    "summary",
+                    engine,
+                    rows,
+                    lambda: summarize_salaries(ROLES[0], use_cache=False),
+                    repeat,
+                )
+            )
+    return results
+
+
+@scenario("insights")
+def insights_scenario(rows: int, repeat: int) -> List[BenchmarkResult]:
+    results: List[BenchmarkResult] = []
+    for backend in ("python", "auto"):
+        with override_settings(SALARY_PERCENTILE_BACKEND=backend):
+            results.append(
+                measure(
+                    "insights",
+                    backend,
+                    rows,
+                    lambda: role_insights(ROLES[0], use_cache=False),
+                    repeat,
+                )
+            )
+    return results
+
+
+@scenario("filtered")
+def filtered_scenario(rows: int, repeat: int) -> List[BenchmarkResult]:
+    rebuild_role_cube(ROLES[0])
+    filters = {"state": STATES[-1], "level": LEVELS[2]}
+    return [
+        measure(
+            "filtered",
+            "live",
+            rows,
+            lambda: summarize_salaries(ROLES[0], use_cache=False, **filters),
+            repeat,
+        ),
+        measure(
+            "filtered",
+            "cube",
+            rows,
+            lambda: summarize_salaries(ROLES[0], **filters),
+            repeat,
+        ),
+    ]
+
+
+@scenario("compare")
+def compare_scenario(rows: int, repeat: int) -> List[BenchmarkResult]:
+    return [
+        measure(
+            "compare",
+            f"{count}-roles",
+            rows,
+            lambda count=count: compare_roles(ROLES[:count], state=STATES[-1]),
+            repeat,
+        )
+        for count in (1, len(ROLES) // 2, len(ROLES))
+    ]
+
+
+@scenario("snapshot")
+def snapshot_scenario(rows: int, repeat: int) -> List[BenchmarkResult]:
+    if np is None:
+        return []
+    filters = {"state": STATES[-1], "level": LEVELS[2]}
+    calls = {
+        "summary": lambda: summarize_salaries(ROLES[0], **filters),
+        "insights": lambda: role_insights(ROLES[0], **filters),
+        "compare": lambda: compare_roles(ROLES, state=STATES[-1]),
+    }
+    results = [
+        measure("snapshot", f"orm-{name}", rows, call, repeat) for name, call in calls.items()
+    ]
+    with override_settings(SALARY_SNAPSHOT_ENGINE=True, SALARY_SNAPSHOT_REFRESH_INTERVAL=3600):
+        reset_snapshot()
+        started = time.perf_counter()
+        snapshot = get_snapshot()
+        load_ms = (time.perf_counter() - started) * 1000
+        note = f"snapshot={snapshot.nbytes / 1024 / 1024:.1f}MiB load={load_ms:.0f}ms"
+        results.extend(
+            measure("snapshot", f"mem-{name}", rows, call, repeat)
+            for name, call in calls.items()
+        )
+        results[-1].note = note
+        reset_snapshot()
+    return results
+
+
+@scenario("payload")
+def payload_scenario(rows: int, repeat: int) -> List[BenchmarkResult]:
+    rebuild_role_aggregate(ROLES[0])
+    request = RequestFactory().get("/api/salaries/", {"role": ROLES[0]})
+    results: List[BenchmarkResult] = []
+    for variant, preserialized in (("json", False), ("bytes", True)):
+        with override_settings(
+            SALARY_PRESERIALIZED_PAYLOADS=preserialized, SALARY_RESULT_CACHE_SIZE=0
+        ):
+            result = measure("payload", variant, rows, lambda: salary_summary(request), repeat)
+            result.note = f"body={len(salary_summary(request).content) / 1024:.1f}KiB"
+            results.append(result)
+    return results
+
+
+def _index_size(name: str) -> Optional[int]:
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_relation_size(%s::regclass)", [name])
+        elif connection.vendor == "sqlite":
+            try:
+                cursor.execute("SELECT SUM(pgsize) FROM dbstat('temp') WHERE name = %s", [name])
+            except DatabaseError:  # built without SQLITE_ENABLE_DBSTAT_VTAB
+                return None
+        else:
+            return None
+        return cursor.fetchone()[0]
+
+
+@scenario("ingest")
+def ingest_scenario(rows: int, repeat: int) -> List[BenchmarkResult]:
+    """Insert the seeded rows into a scratch table under each unique index.
+
+    The fingerprint variant hashes every row inside the timed loop, as the
+    loader does, so the comparison includes the cost of computing it.
+    """
+    quote = connection.ops.quote_name
+    source = quote(SalaryObservation._meta.db_table)
+    table = quote(INGEST_TABLE)
+    values = list(SalaryObservation.objects.values_list(*NATURAL_KEY).iterator(INGEST_BATCH_SIZE))
+    results: List[BenchmarkResult] = []
+    for variant, indexed in INGEST_INDEXES.items():
+        hashed = "fingerprint" in indexed
+        columns = (*NATURAL_KEY, "fingerprint") if hashed else NATURAL_KEY
+        column_sql = ", ".join(quote(column) for column in columns)
+        index = f"{INGEST_TABLE}_{variant.replace('-', '_')}_idx"
+        insert = (
+            f"INSERT INTO {table} ({column_sql}) VALUES ({', '.join(['%s'] * len(columns))})"
+        )
+
+        def load(column_sql=column_sql, index=index, indexed=indexed, hashed=hashed, insert=insert):
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                cursor.execute(
+                    f"CREATE TEMPORARY TABLE {table} AS SELECT {column_sql} FROM {source} LIMIT 0"
+                )
+                cursor.execute(
+                    f"CREATE UNIQUE INDEX {quote(index)} ON {table} "
+                    f"({', '.join(quote(column) for column in indexed)})"
+                )
+                for start in range(0, len(values), INGEST_BATCH_SIZE):
+                    batch = values[start : start + INGEST_BATCH_SIZE]
+                    if hashed:
+                        batch = [(*row, fingerprint(row)) for row in batch]
+                    cursor.executemany(insert, batch)
+
+        result = measure("ingest", variant, rows, load, repeat)
+        size = _index_size(index)
+        index_note = "n/a" if size is None else f"{size / 1024 / 1024:.1f}MiB"
+        result.note = f"rows/s={rows / (result.best_ms / 1000):,.0f} index={index_note}"
+        results.append(result)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    return results
@@ -0,0 +1,231 @@
+import csv
+import io
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, Set, Tuple
+
+from django.db import connection
+from django.utils import timezone
+
+from .fingerprints import observation_fingerprint
+from .models import SalaryObservation
+
+COPY_COLUMNS = (
+    "source",
+    "role",
+    "level",
+    "location",
+    "state",
+    "country",
+    "currency",
+    "work_model",
+    "base_salary_min",
+    "base_salary_max",
+    "total_compensation",
+    "observed_at",
+)
+# Only observed_at may be NULL; an empty text column must load as ''.
+TEXT_COLUMNS = COPY_COLUMNS[:8]
+# Computed per row rather than read from the input.
+FINGERPRINT_COLUMN = "fingerprint"
+STAGING_TABLE = "salary_observation_staging"
+
+
+def copy_supported() -> bool:
+    return connection.vendor == "postgresql"
+
+
+class CopyStream:
+    """Read-only text stream of ``observations`` as CSV, consumed by ``COPY FROM STDIN``.
+
+    Lines are produced on demand, so only one ``read`` buffer of the input is
+    held in memory; ``rows`` counts the observations handed over so far.
+    """
+
+    def __init__(
+        self,
+        observations: Iterable[SalaryObservation],
+        progress: Optional[Callable[[int], None]] = None,
+        every: int = 10000,
+    ) -> None:
+        self.rows = 0
+        self._progress = progress
+        self._every = every
+        self._lines = self._encode(observations)
+        self._buffer = ""
+
+    def _encode(self, observations: Iterable[SalaryObservation]) -> Iterator[str]:
+        line = io.StringIO()
+        writer = csv.writer(line, lineterminator="\n")
+        for observation in observations:
+            values = [getattr(observation, column) for column in COPY_COLUMNS]
+            # bytea in hex input format.
+            values.append("\\x" + observation_fingerprint(observation).hex())
+            writer.writerow(["" if value is None else value for value in values])
+            self.rows += 1
+            if self._progress is not None and self.rows % self._every == 0:
+                self._progress(self.rows)
+            yield line.getvalue()
+            line.seek(0)
+            line.truncate()
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._lines, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def copy_observations(
+    observations: Iterable[SalaryObservation],
+    progress: Optional[Callable[[int], None]] = None,
+    every: int = 10000,
+) -> Tuple[int, int]:
+    """Load ``observations`` with PostgreSQL ``COPY`` and return ``(read, inserted)``.
+
+    Rows are streamed into a session-local staging table (temporary tables
+    skip the WAL like unlogged ones) and merged with ``INSERT ... ON CONFLICT
+    DO NOTHING`` against the fingerprint index, which drops duplicates
+    exactly like ``bulk_create(ignore_conflicts=True)``. ``progress`` is
+    called with the running row count every ``every`` rows.
+    """
+    quote = connection.ops.quote_name
+    table = quote(SalaryObservation._meta.db_table)
+    staging = quote(STAGING_TABLE)
+    columns = ", ".join(quote(column) for column in (*COPY_COLUMNS, FINGERPRINT_COLUMN))
+    not_null = ", ".join(quote(column) for column in TEXT_COLUMNS)
+    stream = CopyStream(observations, progress, every)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging} AS SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        cursor.copy_expert(
+            f"COPY {staging} ({columns}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL ({not_null}))",
+            stream,
+        )
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}, {quote('ingested_at')}) "
+            f"SELECT {columns}, now() FROM {staging} "
+            "ON CONFLICT DO NOTHING"
+        )
+        inserted = cursor.rowcount
+        cursor.execute(f"DROP TABLE {staging}")
+    return stream.rows, inserted
+
+
+@dataclass
+class SyncResult:
+    read: int
+    inserted: int
+    deleted: int
+    unchanged: int
+    # Normalized roles that gained or lost rows.
+    roles: Set[str]
+
+
+def _stage(
+    cursor,
+    staging: str,
+    observations: Iterable[SalaryObservation],
+    loader: str,
+    batch_size: int,
+    progress: Optional[Callable[[int], None]],
+) -> int:
+    """Write ``observations`` with their fingerprints into ``staging``."""
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(column) for column in (*COPY_COLUMNS, FINGERPRINT_COLUMN))
+    if loader == "copy":
+        stream = CopyStream(observations, progress, batch_size)
+        not_null = ", ".join(quote(column) for column in TEXT_COLUMNS)
+        cursor.copy_expert(
+            f"COPY {staging} ({columns}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL ({not_null}))",
+            stream,
+        )
+        return stream.rows
+    fields = [SalaryObservation._meta.get_field(column) for column in COPY_COLUMNS]
+    fingerprint_field = SalaryObservation._meta.get_field(FINGERPRINT_COLUMN)
+    insert = (
+        f"INSERT INTO {staging} ({columns}) "
+        f"VALUES ({', '.join(['%s'] * (len(fields) + 1))})"
+    )
+    read = 0
+    observations = iter(observations)
+    while True:
+        batch = [
+            [
+                *(
+                    field.get_db_prep_save(getattr(observation, field.attname), connection)
+                    for field in fields
+                ),
+                fingerprint_field.get_db_prep_save(
+                    observation_fingerprint(observation), connection
+                ),
+            ]
+            for observation in islice(observations, batch_size)
+        ]
+        if not batch:
+            return read
+        cursor.executemany(insert, batch)
+        read += len(batch)
+        if progress is not None:
+            progress(read)
+
+
+def sync_observations(
+    observations: Iterable[SalaryObservation],
+    loader: str,
+    batch_size: int,
+    progress: Optional[Callable[[int], None]] = None,
+) -> SyncResult:
+    """Make the observations table match ``observations`` by fingerprint.
+
+    The input streams into a session-local staging table (``COPY`` or batched
+    inserts of ``batch_size`` rows), then the database diffs it against the
+    table: vanished rows are deleted and new ones inserted with conflicts
+    ignored, which also collapses repeated input rows. Both run in the
+    caller's transaction. Memory stays flat whatever the size of the table or
+    the input, and every row is hashed once.
+    """
+    quote = connection.ops.quote_name
+    table = quote(SalaryObservation._meta.db_table)
+    staging = quote(STAGING_TABLE)
+    key = quote(FINGERPRINT_COLUMN)
+    columns = ", ".join(quote(column) for column in (*COPY_COLUMNS, FINGERPRINT_COLUMN))
+    vanished = f"NOT EXISTS (SELECT 1 FROM {staging} s WHERE s.{key} = o.{key})"
+    new = f"NOT EXISTS (SELECT 1 FROM {table} o WHERE o.{key} = s.{key})"
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(f"CREATE TEMPORARY TABLE {staging} AS SELECT {columns} FROM {table} LIMIT 0")
+        read = _stage(cursor, staging, observations, loader, batch_size, progress)
+        cursor.execute(f"CREATE INDEX {quote(STAGING_TABLE + '_key')} ON {staging} ({key})")
+
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        stored = cursor.fetchone()[0]
+        cursor.execute(f"SELECT DISTINCT LOWER(o.role) FROM {table} o WHERE {vanished}")
+        roles = {role for (role,) in cursor.fetchall()}
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id IN (SELECT o.id FROM {table} o WHERE {vanished})"
+        )
+        deleted = cursor.rowcount
+
+        cursor.execute(f"SELECT DISTINCT LOWER(s.role) FROM {staging} s WHERE {new}")
+        roles.update(role for (role,) in cursor.fetchall())
+        cursor.execute(
+            f"{connection.ops.insert_statement(ignore_conflicts=True)} {table} "
+            f"({columns}, {quote('ingested_at')}) "
+            f"SELECT {columns}, %s FROM {staging} s WHERE {new} "
+            f"{connection.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}",
+            [connection.ops.adapt_datetimefield_value(timezone.now())],
+        )
+        inserted = cursor.rowcount
+        cursor.execute(f"DROP TABLE {staging}")
+    # Fingerprints are unique, so every stored row that stayed is unchanged.
+    return SyncResult(read, inserted, deleted, stored - deleted, roles)
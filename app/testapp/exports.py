@@ -0,0 +1,78 @@
+import csv
+from typing import Callable, Dict, Iterable, Iterator, Tuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from .models import SalaryObservation
+
+EXPORT_FIELDS = (
+    "id",
+    "source",
+    "role",
+    "level",
+    "location",
+    "state",
+    "country",
+    "currency",
+    "work_model",
+    "base_salary_min",
+    "base_salary_max",
+    "total_compensation",
+    "observed_at",
+)
+
+
+def export_rows(qs: QuerySet[SalaryObservation], chunk_size: int) -> Iterator[Tuple]:
+    """Tuples of ``EXPORT_FIELDS`` in primary key order.
+
+    ``iterator`` skips the queryset cache and, on PostgreSQL, reads through a
+    server-side cursor ``chunk_size`` rows at a time, so memory does not grow
+    with the size of the export.
+    """
+    return qs.order_by("id").values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def _batched(lines: Iterable[str], chunk_size: int) -> Iterator[bytes]:
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= chunk_size:
+            yield "".join(batch).encode("utf-8")
+            batch = []
+    if batch:
+        yield "".join(batch).encode("utf-8")
+
+
+def ndjson_chunks(qs: QuerySet[SalaryObservation], chunk_size: int) -> Iterator[bytes]:
+    """One JSON object per line; decimals are strings so no precision is lost."""
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    lines = (
+        encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n"
+        for row in export_rows(qs, chunk_size)
+    )
+    return _batched(lines, chunk_size)
+
+
+class _Echo:
+    """File-like object handing back whatever ``csv.writer`` writes to it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def csv_chunks(qs: QuerySet[SalaryObservation], chunk_size: int) -> Iterator[bytes]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS).encode("utf-8")
+    lines = (
+        writer.writerow(["" if value is None else value for value in row])
+        for row in export_rows(qs, chunk_size)
+    )
+    yield from _batched(lines, chunk_size)
+
+
+# format -> (content type, chunk generator)
+EXPORT_FORMATS: Dict[str, Tuple[str, Callable[[QuerySet, int], Iterator[bytes]]]] = {
+    "ndjson": ("application/x-ndjson", ndjson_chunks),
+    "csv": ("text/csv; charset=utf-8", csv_chunks),
+}
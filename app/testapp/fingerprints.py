@@ -0,0 +1,61 @@
+import hashlib
+from decimal import Decimal
+from typing import Sequence
+
+from django.db import models
+
+FINGERPRINT_SIZE = 16
+
+# Fields whose values identify an observation: two rows with the same values
+# are the same observation.
+NATURAL_KEY = (
+    "source",
+    "role",
+    "level",
+    "location",
+    "state",
+    "country",
+    "currency",
+    "work_model",
+    "base_salary_min",
+    "base_salary_max",
+    "total_compensation",
+    "observed_at",
+)
+
+# Key fields that are not text and may still hold raw input, e.g. a decimal
+# assigned as a string; only these go through ``to_python`` before hashing.
+TYPED_KEY_FIELDS = frozenset(
+    ("base_salary_min", "base_salary_max", "total_compensation", "observed_at")
+)
+
+
+def _canonical(value) -> str:
+    if isinstance(value, str):  # most of the key, so checked first
+        return value
+    if value is None:
+        return "\x00"
+    if isinstance(value, Decimal):
+        # 150000, 150000.0 and 150000.00 are the same figure.
+        return format(value.normalize(), "f")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def fingerprint(values: Sequence) -> bytes:
+    """Digest of natural key ``values``, in ``NATURAL_KEY`` order."""
+    text = "\x1f".join(map(_canonical, values))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=FINGERPRINT_SIZE).digest()
+
+
+def observation_fingerprint(observation: models.Model) -> bytes:
+    meta = observation._meta
+    return fingerprint(
+        [
+            meta.get_field(name).to_python(getattr(observation, name))
+            if name in TYPED_KEY_FIELDS
+            else getattr(observation, name)
+            for name in NATURAL_KEY
+        ]
+    )
@@ -0,0 +1,145 @@
+import hashlib
+import re
+from datetime import datetime
+from functools import wraps
+from typing import Callable, List, Optional, Sequence
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponsePermanentRedirect
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition
+
+from .result_cache import dataset_token
+
+# Comma separated parameters whose order and duplicates carry no meaning.
+LIST_PARAMS = ("roles", "percentiles")
+# Opaque tokens that are case sensitive and must be passed through verbatim.
+OPAQUE_PARAMS = ("cursor",)
+
+
+def canonical_query(request: HttpRequest, role_list: bool = False) -> str:
+    """Query string with sorted keys and trimmed, lowercased values.
+
+    Empty values are dropped, comma separated lists are sorted and
+    de-duplicated, and single-valued keys keep the last value (the one
+    ``request.GET.get`` returns). ``OPAQUE_PARAMS`` keep their value as sent.
+    With ``role_list`` repeated ``role`` values are folded into ``roles`` the
+    way the comparison view reads them.
+    """
+    params = {}
+    lists = {key: set() for key in LIST_PARAMS}
+    for key in request.GET:
+        values = request.GET.getlist(key)
+        if key not in OPAQUE_PARAMS:
+            values = [value.strip().lower() for value in values]
+        if role_list and key == "role":
+            key = "roles"
+        if key in lists:
+            lists[key].update(item.strip() for value in values for item in value.split(","))
+        elif values[-1]:
+            params[key] = values[-1]
+    for key, items in lists.items():
+        items.discard("")
+        if items:
+            params[key] = ",".join(sorted(items))
+    return urlencode(sorted(params.items()), safe=",")
+
+
+def accepted_encodings(request: HttpRequest, supported: Sequence[str]) -> List[str]:
+    """``supported`` encodings the client accepts, best first, then identity.
+
+    Higher ``q`` values win; ties keep the order of ``supported``.
+    """
+    weights = {}
+    for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _sep, params = part.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            name, _eq, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding.strip():
+            weights[coding.strip().lower()] = weight
+    default = weights.get("*", 0.0)
+    accepted = [coding for coding in supported if weights.get(coding, default) > 0]
+    accepted.sort(key=lambda coding: -weights.get(coding, default))
+    return accepted + ["identity"]
+
+
+def _last_modified(request: HttpRequest, *args, **kwargs) -> Optional[datetime]:
+    _version, updated_at = dataset_token()
+    return parse_datetime(updated_at) if updated_at else None
+
+
+def _request_roles(request: HttpRequest) -> List[str]:
+    roles = request.GET.getlist("role") + request.GET.get("roles", "").split(",")
+    return sorted({role.strip().lower() for role in roles if role.strip()})
+
+
+# Whitespace and control characters would split a key or break the header.
+_UNSAFE_KEY_CHARS = re.compile(r"[\s\x00-\x1f\x7f]+")
+
+
+def _surrogate_keys(request: HttpRequest, scope: str) -> str:
+    version, _updated_at = dataset_token()
+    keys = ["salary", f"salary-{scope}", f"salary-v{version}"]
+    keys.extend(
+        f"role-{_UNSAFE_KEY_CHARS.sub('_', role)}" for role in _request_roles(request)
+    )
+    return " ".join(keys)
+
+
+def cacheable_salary_view(scope: str, role_list: bool = False) -> Callable:
+    """Conditional GET and shared-cache headers for a read-only salary view.
+
+    ETag and Last-Modified come from the dataset version published by
+    ``load_salary_dataset``, so a client or CDN revalidates with a 304 until
+    the next load. Successful responses carry ``SALARY_CACHE_CONTROL`` and a
+    surrogate-key header naming the endpoint, dataset version and roles so a
+    CDN can purge one role. With ``SALARY_CANONICAL_REDIRECTS`` enabled,
+    non-canonical query strings are redirected to their canonical form.
+    """
+
+    def etag(request: HttpRequest, *args, **kwargs) -> str:
+        version, updated_at = dataset_token()
+        digest = hashlib.sha1(
+            f"{version}|{updated_at}|{request.path}?{canonical_query(request, role_list)}".encode()
+        ).hexdigest()[:20]
+        # Weak: the identity and precompressed variants of a payload are
+        # semantically identical and share one validator.
+        return f'W/"{version}-{digest}"'
+
+    def decorator(view: Callable) -> Callable:
+        conditional_view = condition(etag_func=etag, last_modified_func=_last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            if getattr(settings, "SALARY_CANONICAL_REDIRECTS", False):
+                query = canonical_query(request, role_list)
+                if query != request.META.get("QUERY_STRING", ""):
+                    location = f"{request.path}?{query}" if query else request.path
+                    return HttpResponsePermanentRedirect(location)
+
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code >= 400:
+                # Errors must not be revalidated into a 304 later on.
+                del response["ETag"]
+                del response["Last-Modified"]
+            elif response.status_code in (200, 304):
+                patch_vary_headers(response, ("Accept-Encoding",))
+                cache_control = getattr(settings, "SALARY_CACHE_CONTROL", "")
+                if cache_control:
+                    response["Cache-Control"] = cache_control
+                header = getattr(settings, "SALARY_SURROGATE_KEY_HEADER", "")
+                if header:
+                    response[header] = _surrogate_keys(request, scope)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,85 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+from typing import List, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks import ROLES
+
+DEFAULT_PATHS = (
+    f"/api/salaries/comparison/?roles={','.join(ROLES)}&state=sp",
+    f"/api/salaries/?role={ROLES[0]}&state=sp",
+    f"/api/salaries/bundle/?role={ROLES[1]}&level=senior",
+)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a running server (for example start.sh with "
+        "GUNICORN_WORKER_CLASS=sync and then uvicorn) and report throughput "
+        "and latency percentiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Base URL of the server under test.",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            default=None,
+            help="Request path with query string (repeatable, requests rotate over them).",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Total requests to send.")
+        parser.add_argument(
+            "--concurrency", type=int, default=16, help="Concurrent client connections."
+        )
+        parser.add_argument(
+            "--label", default="", help="Name printed with the results, e.g. the worker class."
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive.")
+
+        base_url = options["url"].rstrip("/")
+        paths = options["path"] or list(DEFAULT_PATHS)
+        urls = [f"{base_url}{path}" for path in islice(cycle(paths), options["requests"])]
+
+        def fetch(url: str) -> Optional[float]:
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=60) as response:
+                    response.read()
+            except (urllib.error.URLError, OSError):
+                return None
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(pool.map(fetch, urls))
+        elapsed = time.perf_counter() - started
+
+        timings = sorted(result for result in results if result is not None)
+        errors = len(results) - len(timings)
+        if not timings:
+            raise CommandError(f"All {errors} request(s) to {base_url} failed.")
+
+        label = f"{options['label']} " if options["label"] else ""
+        self.stdout.write(
+            f"{label}requests={len(results)} concurrency={options['concurrency']} "
+            f"errors={errors} throughput={len(timings) / elapsed:.1f}req/s "
+            f"p50={statistics.median(timings):.1f}ms p95={_percentile(timings, 0.95):.1f}ms "
+            f"p99={_percentile(timings, 0.99):.1f}ms max={timings[-1]:.1f}ms"
+        )
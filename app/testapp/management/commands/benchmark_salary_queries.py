@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...benchmarks import SCENARIOS, seed_observations
+from ...models import SalaryObservation
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the salary query paths against synthetic datasets. "
+        "Everything runs inside a transaction that is rolled back, so the "
+        "configured database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000, 1_000_000],
+            help="Synthetic dataset sizes to benchmark.",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(SCENARIOS),
+            default=None,
+            help="Scenario to run (repeatable, defaults to all of them).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Number of timed runs per variant.",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = options["scenario"] or sorted(SCENARIOS)
+        if any(rows <= 0 for rows in options["rows"]):
+            raise CommandError("--rows values must be positive.")
+
+        for rows in options["rows"]:
+            with transaction.atomic():
+                SalaryObservation.objects.all().delete()
+                seed_observations(rows)
+                for name in scenarios:
+                    for result in SCENARIOS[name](rows, options["repeat"]):
+                        self.stdout.write(result.as_line())
+                transaction.set_rollback(True)
@@ -1,16 +1,32 @@
 import csv
+import time
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
+from itertools import chain, islice
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+from django.apps import apps
 from django.conf import settings
 from django.core.cache import cache
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from ...models import SalaryObservation, SalaryRoleAggregate
-from ...salary_data import refresh_all_role_aggregates
+from ...bulk_load import copy_observations, copy_supported, sync_observations
+from ...models import (
+    SalaryCellSketch,
+    SalaryCubeCell,
+    SalaryDataset,
+    SalaryDimensionValue,
+    SalaryObservation,
+    SalaryRoleAggregate,
+)
+from ...rebuild import EXECUTORS, Progress, RoleRebuild, rebuild_role_aggregates
+from ...result_cache import publish_dataset_token
+from ...salary_data import drop_role_aggregates, observed_roles, role_observation_counts
+from ...shadow import ShadowTables
+
+MODES = ("replace", "append", "swap", "sync")
 
 COLUMN_NAMES = [
     "source",
@@ -34,6 +50,15 @@ def _to_decimal(value: str) -> Decimal:
         raise ValueError(f"Unable to parse decimal value '{value}'")
 
 
+def _batches(rows: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
 def _parse_date(value: Optional[str]) -> Optional[datetime.date]:
     if not value:
         return None
@@ -58,10 +83,53 @@ class Command(BaseCommand):
             default=None,
             help="Path to the canonical CSV generated by build_salary_dataset.",
         )
+        parser.add_argument(
+            "--mode",
+            choices=MODES,
+            default=None,
+            help=(
+                "replace (default) rewrites the tables in one transaction, append "
+                "adds rows, swap loads into shadow tables and swaps them in, sync "
+                "inserts new rows and deletes vanished ones."
+            ),
+        )
         parser.add_argument(
             "--append",
             action="store_true",
-            help="Append to existing data instead of replacing it.",
+            help="Alias for --mode append.",
+        )
+        parser.add_argument(
+            "--loader",
+            choices=("auto", "copy", "orm"),
+            default="auto",
+            help=(
+                "Insert rows with PostgreSQL COPY through a staging table or with "
+                "bulk_create. auto uses COPY on PostgreSQL."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.SALARY_LOAD_BATCH_SIZE,
+            help=(
+                "Rows read from the CSV and written per INSERT batch; memory use "
+                "depends on this rather than on the size of the file."
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.SALARY_REBUILD_WORKERS,
+            help=(
+                "Rebuild role aggregates with this many parallel workers after the "
+                "rows are committed. 1 rebuilds inside the load transaction."
+            ),
+        )
+        parser.add_argument(
+            "--executor",
+            choices=EXECUTORS,
+            default="thread",
+            help="Run aggregate rebuild workers as threads or processes.",
         )
 
     def handle(self, *args, **options):
@@ -72,23 +140,231 @@ class Command(BaseCommand):
         if not input_path.exists():
             raise CommandError(f"Input file {input_path} does not exist.")
 
-        rows = list(self._read_rows(input_path))
-        if not rows:
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        self.batch_size = options["batch_size"]
+        self.verbosity = options["verbosity"]
+
+        mode = options["mode"] or ("append" if options["append"] else "replace")
+        if options["append"] and mode != "append":
+            raise CommandError(f"--append cannot be combined with --mode {mode}.")
+        if mode == "swap" and not apps.ready:
+            raise CommandError("--mode swap only runs as a standalone command.")
+        if mode == "swap" and options["executor"] == "process":
+            # Worker processes would not see the shadow table redirection.
+            raise CommandError("--mode swap cannot be combined with --executor process.")
+
+        loader = options["loader"]
+        if loader == "auto":
+            loader = "copy" if copy_supported() else "orm"
+        elif loader == "copy" and not copy_supported():
+            raise CommandError("--loader copy requires PostgreSQL.")
+
+        rows = self._read_rows(input_path)
+        first = next(rows, None)
+        if first is None:
             self.stdout.write(self.style.WARNING("No rows found in input CSV."))
             return
+        # Rows stream straight from the file into the database; a bad row
+        # raises inside the transaction below, so nothing is written.
+        rows = chain([first], rows)
 
+        progress = self._report_rebuild if options["verbosity"] > 1 else None
+        if mode == "swap":
+            loaded, refreshed = self._swap(rows, loader, options["workers"], progress)
+            self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} salary observations."))
+            self.stdout.write(self.style.SUCCESS(f"Refreshed aggregates for {refreshed} role(s)."))
+            self.stdout.write("Swapped the reloaded tables in.")
+            self._publish()
+            return
+
+        # A single worker rebuilds inside the load transaction so readers never
+        # see new rows without aggregates; a pool needs the rows committed
+        # first because every worker uses its own connection.
+        parallel = options["workers"] > 1
+
+        skipped = 0
         with transaction.atomic():
-            if not options["append"]:
+            if mode == "append":
+                affected, skipped, loaded = self._append(rows, loader)
+            elif mode == "sync":
+                affected, skipped, counts = self._sync(rows, loader)
+            else:
                 SalaryObservation.objects.all().delete()
                 SalaryRoleAggregate.objects.all().delete()
-            SalaryObservation.objects.bulk_create(rows, ignore_conflicts=True)
-            refreshed = refresh_all_role_aggregates()
+                SalaryCellSketch.objects.all().delete()
+                SalaryCubeCell.objects.all().delete()
+                SalaryDimensionValue.objects.all().delete()
+                loaded = self._insert(rows, loader)
+                affected = observed_roles()
+            if not parallel:
+                if affected:
+                    SalaryDataset.bump()
+                rebuild_role_aggregates(affected, progress=progress)
+        if parallel:
+            rebuild_role_aggregates(
+                affected,
+                workers=options["workers"],
+                executor=options["executor"],
+                progress=progress,
+            )
+            # Bumped once the aggregates match the rows, so no stale payload
+            # gets cached under the new version.
+            if affected:
+                SalaryDataset.bump()
+        refreshed = len(affected)
 
-        action = "Appended" if options["append"] else "Loaded"
-        self.stdout.write(self.style.SUCCESS(f"{action} {len(rows)} salary observations."))
+        if mode == "sync":
+            inserted, deleted, unchanged = counts
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Synced salary observations: {inserted} inserted, {deleted} deleted, "
+                    f"{unchanged} unchanged."
+                )
+            )
+        else:
+            action = "Appended" if mode == "append" else "Loaded"
+            self.stdout.write(self.style.SUCCESS(f"{action} {loaded} salary observations."))
         self.stdout.write(self.style.SUCCESS(f"Refreshed aggregates for {refreshed} role(s)."))
-        cache.delete("testapp.available_filters")
+        if mode in ("append", "sync"):
+            changes = "appended rows" if mode == "append" else "sync"
+            self.stdout.write(f"Skipped {skipped} role(s) not affected by the {changes}.")
+        self._publish()
+
+    def _publish(self) -> None:
         cache.delete("testapp.dataset.autoloaded")
+        publish_dataset_token()
+
+    def _swap(
+        self,
+        rows: Iterable[SalaryObservation],
+        loader: str,
+        workers: int,
+        progress: Optional[Progress],
+    ) -> Tuple[int, int]:
+        """Load and aggregate into shadow tables, then swap them in.
+
+        The live tables keep serving the previous dataset until the swap, a
+        single short DDL transaction. A failed load only drops the shadows.
+        The models are redirected for this whole process, which is why swap
+        mode only runs as a standalone command.
+        """
+        shadow = ShadowTables()
+        shadow.create()
+        try:
+            with shadow.redirected():
+                with transaction.atomic():
+                    loaded = self._insert(rows, loader)
+            # Indexed after the load, before the rebuild queries the rows.
+            shadow.build_indexes()
+            with shadow.redirected():
+                affected = observed_roles()
+                # Forked or spawned processes would not see the redirection.
+                rebuild_role_aggregates(affected, workers=workers, progress=progress)
+            shadow.swap(on_swap=SalaryDataset.bump)
+        except BaseException:
+            shadow.drop()
+            raise
+        return loaded, len(affected)
+
+    def _report_rebuild(self, result: RoleRebuild) -> None:
+        self.stdout.write(f"Rebuilt {result.role} in {result.seconds:.3f}s")
+
+    def _insert(self, rows: Iterable[SalaryObservation], loader: str) -> int:
+        """Insert ``rows`` with ``loader``, report throughput and return the rows read.
+
+        At most one batch of ``--batch-size`` rows is held in memory at a time.
+        """
+        started = time.perf_counter()
+        if loader == "copy":
+            read, inserted = copy_observations(
+                rows, progress=self._report_progress(started), every=self.batch_size
+            )
+            detail = f", {inserted} new"
+        else:
+            read = 0
+            report = self._report_progress(started)
+            for batch in _batches(rows, self.batch_size):
+                # ignore_conflicts cannot tell which rows were new.
+                SalaryObservation.objects.bulk_create(batch, ignore_conflicts=True)
+                read += len(batch)
+                report(read)
+            detail = ""
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(
+            f"Wrote {read} row(s) via {loader}{detail} in {elapsed:.2f}s "
+            f"({read / elapsed:,.0f} rows/s)."
+        )
+        return read
+
+    def _report_progress(self, started: float):
+        def report(rows: int) -> None:
+            if self.verbosity > 1:
+                elapsed = max(time.perf_counter() - started, 1e-9)
+                self.stdout.write(f"  {rows} row(s) read ({rows / elapsed:,.0f} rows/s)")
+
+        return report
+
+    def _append(
+        self, rows: Iterable[SalaryObservation], loader: str
+    ) -> Tuple[List[str], int, int]:
+        """Insert ``rows`` and return the affected roles, skipped roles and rows read.
+
+        Rows that already exist are dropped by the conflict handling, so a role
+        is only considered affected when its observation count moved or it has
+        no aggregate yet.
+        """
+        roles = set()
+
+        def tracked(rows: Iterable[SalaryObservation]) -> Iterable[SalaryObservation]:
+            for row in rows:
+                roles.add(row.role.lower())
+                yield row
+
+        # The roles are only known once the rows are streamed in.
+        before = role_observation_counts()
+        loaded = self._insert(tracked(rows), loader)
+        after = role_observation_counts(roles)
+
+        aggregated = set(
+            SalaryRoleAggregate.objects.filter(role__in=roles).values_list("role", flat=True)
+        )
+        affected = {
+            role for role in roles if before.get(role) != after.get(role) or role not in aggregated
+        }
+        skipped = SalaryRoleAggregate.objects.exclude(role__in=affected).count()
+        return sorted(affected), skipped, loaded
+
+    def _sync(
+        self, rows: Iterable[SalaryObservation], loader: str
+    ) -> Tuple[List[str], int, Tuple[int, int, int]]:
+        """Make the table match ``rows`` by natural-key fingerprint.
+
+        Returns the roles to rebuild, the roles skipped and the inserted,
+        deleted and unchanged row counts. Rows already stored are neither
+        rewritten nor deleted; roles left without rows lose their aggregates.
+        """
+        started = time.perf_counter()
+        result = sync_observations(
+            rows, loader, self.batch_size, progress=self._report_progress(started)
+        )
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(
+            f"Compared {result.read} row(s) via {loader} in {elapsed:.2f}s "
+            f"({result.read / elapsed:,.0f} rows/s)."
+        )
+
+        remaining = role_observation_counts(result.roles)
+        emptied = {role for role in result.roles if role not in remaining}
+        drop_role_aggregates(emptied)
+        affected = sorted(result.roles - emptied)
+        if emptied and not affected:
+            # Nothing to rebuild, but readers must stop serving the dropped roles.
+            SalaryDataset.bump()
+        skipped = SalaryRoleAggregate.objects.exclude(role__in=affected).count()
+        return affected, skipped, (result.inserted, result.deleted, result.unchanged)
 
     def _read_rows(self, path: Path) -> Iterable[SalaryObservation]:
         with path.open(newline="", encoding="utf-8") as handle:
@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import SalaryDataset
+from ...rebuild import EXECUTORS, RoleRebuild, can_parallelize, rebuild_role_aggregates
+from ...result_cache import publish_dataset_token
+from ...salary_data import observed_roles
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild cached salary aggregates (summaries, insights, sketches and cube "
+        "cells) per role, optionally spread over a worker pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--role",
+            action="append",
+            default=None,
+            help="Role to rebuild (repeatable). Defaults to every role with observations.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.SALARY_REBUILD_WORKERS,
+            help="Number of parallel workers (SQLite always rebuilds serially).",
+        )
+        parser.add_argument(
+            "--executor",
+            choices=EXECUTORS,
+            default="thread",
+            help="Run workers as threads or processes.",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        roles = sorted({role.strip().lower() for role in options["role"] or [] if role.strip()})
+        if not roles:
+            roles = observed_roles()
+        if not roles:
+            self.stdout.write(self.style.WARNING("No roles found to rebuild."))
+            return
+
+        workers = options["workers"] if can_parallelize() else 1
+        started = time.perf_counter()
+        total = len(roles)
+        completed = 0
+
+        def report(result: RoleRebuild) -> None:
+            nonlocal completed
+            completed += 1
+            self.stdout.write(f"[{completed}/{total}] {result.role} rebuilt in {result.seconds:.3f}s")
+
+        rebuild_role_aggregates(
+            roles,
+            workers=workers,
+            executor=options["executor"],
+            progress=report,
+        )
+        # Result caches, snapshots and ETags are keyed by the dataset version.
+        SalaryDataset.bump()
+        publish_dataset_token()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt aggregates for {total} role(s) in {elapsed:.2f}s "
+                f"using {min(workers, total)} worker(s)."
+            )
+        )
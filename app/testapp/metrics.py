@@ -0,0 +1,183 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestMetrics:
+    """Timings collected while one request is being served."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.cache: List[str] = []
+        self.paths: List[str] = []
+
+    def db_wrapper(self, execute: Callable, sql, params, many, context):
+        """``connection.execute_wrapper`` hook counting and timing every query."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_queries += 1
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` value; ``app`` is the time not spent in SQL or JSON."""
+        app_time = max(self.duration - self.db_time - self.serialize_time, 0.0)
+        entries = [
+            f'db;desc="{self.db_queries} queries";dur={self.db_time * 1000:.2f}',
+            f"serialize;dur={self.serialize_time * 1000:.2f}",
+            f"app;dur={app_time * 1000:.2f}",
+            f"total;dur={self.duration * 1000:.2f}",
+        ]
+        if self.cache:
+            entries.append(f'cache;desc="{",".join(dict.fromkeys(self.cache))}"')
+        if self.paths:
+            entries.append(f'path;desc="{",".join(dict.fromkeys(self.paths))}"')
+        return ", ".join(entries)
+
+
+_CURRENT: ContextVar[Optional[RequestMetrics]] = ContextVar("salary_request_metrics", default=None)
+
+
+@contextmanager
+def collect_request_metrics() -> Iterator[RequestMetrics]:
+    metrics = RequestMetrics()
+    token = _CURRENT.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _CURRENT.reset(token)
+        metrics.finish()
+
+
+def note_served_path(path: str) -> None:
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics.paths.append(path)
+
+
+def note_cache(outcome: str) -> None:
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics.cache.append(outcome)
+
+
+@contextmanager
+def measure_serialization() -> Iterator[None]:
+    metrics = _CURRENT.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialize_time += time.perf_counter() - started
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative Prometheus histogram, one series per label set."""
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [
+                (key, list(counts), total[0]) for key, (counts, total) in self._series.items()
+            ]
+        for key, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_labels(key + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_labels(key)} {cumulative}")
+        return lines
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+REQUEST_DURATION = Histogram(
+    "salary_request_duration_seconds", "Time spent serving a request.", SECONDS_BUCKETS
+)
+DB_DURATION = Histogram(
+    "salary_db_duration_seconds", "Time spent in SQL per request.", SECONDS_BUCKETS
+)
+DB_QUERIES = Histogram("salary_db_queries", "SQL queries issued per request.", QUERY_BUCKETS)
+SERIALIZE_DURATION = Histogram(
+    "salary_serialize_duration_seconds", "Time spent encoding JSON per request.", SECONDS_BUCKETS
+)
+HISTOGRAMS = (REQUEST_DURATION, DB_DURATION, DB_QUERIES, SERIALIZE_DURATION)
+
+
+def observe_request(metrics: RequestMetrics, endpoint: str, status: int) -> None:
+    path = ",".join(dict.fromkeys(metrics.paths)) or "none"
+    REQUEST_DURATION.observe(metrics.duration, endpoint=endpoint, status=str(status), path=path)
+    DB_DURATION.observe(metrics.db_time, endpoint=endpoint)
+    DB_QUERIES.observe(metrics.db_queries, endpoint=endpoint)
+    SERIALIZE_DURATION.observe(metrics.serialize_time, endpoint=endpoint)
+
+
+def _counter(name: str, documentation: str, label: str, counts: Dict[str, int]) -> List[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} counter"]
+    lines.extend(f"{name}{_labels(((label, key),))} {counts[key]}" for key in sorted(counts))
+    return lines
+
+
+def render_metrics(served_paths: Dict[str, int], result_cache: Dict[str, int]) -> str:
+    """Prometheus text exposition (format 0.0.4) of this process's metrics."""
+    lines: List[str] = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    lines.extend(
+        _counter("salary_served_path_total", "Salary calls per serving path.", "path", served_paths)
+    )
+    lines.extend(
+        _counter(
+            "salary_result_cache_total", "Result cache lookups by outcome.", "outcome", result_cache
+        )
+    )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .metrics import collect_request_metrics, observe_request
+
+
+class PerformanceMetricsMiddleware:
+    """Per-request SQL, serialization and serving-path timings.
+
+    Adds a ``Server-Timing`` header to every response and feeds the
+    histograms served at ``/metrics``. Removed from the middleware chain
+    entirely unless ``SALARY_METRICS_ENABLED`` is set. Queries are counted on
+    the request thread's connection, so work handed to the comparison pool or
+    to async views' worker threads shows up as ``app`` time.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "SALARY_METRICS_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_request_metrics() as metrics:
+            with connection.execute_wrapper(metrics.db_wrapper):
+                response = self.get_response(request)
+
+        match = request.resolver_match
+        endpoint = f"/{match.route}" if match is not None else "unmatched"
+        response["Server-Timing"] = metrics.server_timing()
+        observe_request(metrics, endpoint, response.status_code)
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.16 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0002_salaryroleaggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalaryCellSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(max_length=150)),
+                ('level', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=30)),
+                ('work_model', models.CharField(max_length=50)),
+                ('currency', models.CharField(max_length=10)),
+                ('observations', models.PositiveIntegerField()),
+                ('sketch', models.JSONField()),
+            ],
+            options={
+                'ordering': ['role', 'level', 'state', 'work_model', 'currency'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='salarycellsketch',
+            constraint=models.UniqueConstraint(fields=('role', 'level', 'state', 'work_model', 'currency'), name='unique_salary_cell_sketch'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.16 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0003_salarycellsketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalaryCubeCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(db_index=True, max_length=150)),
+                ('source', models.CharField(max_length=100)),
+                ('level', models.CharField(max_length=100)),
+                ('location', models.CharField(max_length=150)),
+                ('state', models.CharField(max_length=30)),
+                ('country', models.CharField(max_length=100)),
+                ('currency', models.CharField(max_length=10)),
+                ('work_model', models.CharField(max_length=50)),
+                ('observations', models.PositiveIntegerField()),
+                ('sum_base_min', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('sum_base_max', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('sum_total', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('min_base', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('max_base', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('min_total', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('max_total', models.DecimalField(decimal_places=2, max_digits=12)),
+            ],
+            options={
+                'ordering': ['role', 'level', 'state', 'work_model'],
+            },
+        ),
+    ]
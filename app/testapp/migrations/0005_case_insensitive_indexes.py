@@ -0,0 +1,71 @@
+# Generated by Django 3.2.16 on 2026-10-18 14:11
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0004_salarycubecell'),
+    ]
+
+    # Filters only go through LOWER() now, so the plain column indexes are
+    # never used by a query and only slow down writes.
+    operations = [
+        migrations.AddIndex(
+            model_name='salaryobservation',
+            index=models.Index(django.db.models.functions.text.Lower('role'), django.db.models.functions.text.Lower('country'), django.db.models.functions.text.Lower('state'), django.db.models.functions.text.Lower('work_model'), name='salary_obs_ci_geo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryobservation',
+            index=models.Index(django.db.models.functions.text.Lower('role'), django.db.models.functions.text.Lower('level'), django.db.models.functions.text.Lower('currency'), name='salary_obs_ci_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaryobservation',
+            index=models.Index(django.db.models.functions.text.Lower('role'), django.db.models.functions.text.Lower('location'), name='salary_obs_ci_location_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='salaryobservation',
+            name='testapp_sal_role_99d6c6_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='salaryobservation',
+            name='testapp_sal_role_9dee61_idx',
+        ),
+        migrations.AlterField(
+            model_name='salaryobservation',
+            name='role',
+            field=models.CharField(max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='salaryobservation',
+            name='level',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='salaryobservation',
+            name='location',
+            field=models.CharField(max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='salaryobservation',
+            name='state',
+            field=models.CharField(max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='salaryobservation',
+            name='country',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='salaryobservation',
+            name='currency',
+            field=models.CharField(max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='salaryobservation',
+            name='work_model',
+            field=models.CharField(max_length=50),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-18 14:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0006_salarydataset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalaryAggregatePayload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('encoding', models.CharField(default='identity', max_length=20)),
+                ('body', models.BinaryField()),
+                ('aggregate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payloads', to='testapp.salaryroleaggregate')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='salaryaggregatepayload',
+            constraint=models.UniqueConstraint(fields=('aggregate', 'kind', 'encoding'), name='unique_salary_aggregate_payload'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.16 on 2026-10-18 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0007_salaryaggregatepayload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalaryDimensionValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(max_length=150)),
+                ('dimension', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=150)),
+                ('observations', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['role', 'dimension', 'value'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='salarydimensionvalue',
+            index=models.Index(fields=['dimension', 'value'], name='salary_dim_value_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='salarydimensionvalue',
+            constraint=models.UniqueConstraint(fields=('role', 'dimension', 'value'), name='unique_salary_dimension_value'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-18 14:34
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0008_salarydimensionvalue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salaryobservation',
+            index=models.Index(django.db.models.functions.text.Lower('role'), django.db.models.functions.text.Lower('country'), django.db.models.functions.text.Lower('state'), django.db.models.functions.text.Lower('work_model'), django.db.models.expressions.F('id'), name='salary_obs_ci_geo_seek_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='salaryobservation',
+            name='salary_obs_ci_geo_idx',
+        ),
+    ]
@@ -0,0 +1,139 @@
+import hashlib
+from decimal import Decimal
+
+from django.db import migrations, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+import testapp.models
+
+BATCH_SIZE = 5000
+DATASET_ID = 1
+
+# Frozen copy of testapp.fingerprints as of this migration: the stored
+# fingerprints must not change if that module does.
+NATURAL_KEY = (
+    "source",
+    "role",
+    "level",
+    "location",
+    "state",
+    "country",
+    "currency",
+    "work_model",
+    "base_salary_min",
+    "base_salary_max",
+    "total_compensation",
+    "observed_at",
+)
+
+
+def _canonical(value):
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return "\x00"
+    if isinstance(value, Decimal):
+        return format(value.normalize(), "f")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def fingerprint(values):
+    text = "\x1f".join(map(_canonical, values))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """Fingerprint every row, one committed transaction per id batch."""
+    SalaryObservation = apps.get_model("testapp", "SalaryObservation")
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                SalaryObservation.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", *NATURAL_KEY)[:BATCH_SIZE]
+            )
+            if not batch:
+                return
+            last_id = batch[-1][0]
+            SalaryObservation.objects.bulk_update(
+                [
+                    SalaryObservation(id=pk, fingerprint=fingerprint(values))
+                    for pk, *values in batch
+                ],
+                ["fingerprint"],
+            )
+
+
+def remove_duplicate_observations(apps, schema_editor):
+    """Delete all but the first row of each fingerprint.
+
+    The old constraint let rows without observed_at repeat. The roles that
+    lose rows have their precomputed aggregates dropped, so they are served
+    from the live tables until the next load or rebuild_salary_aggregates,
+    and the dataset version is bumped to invalidate in-process caches.
+    """
+    SalaryObservation = apps.get_model("testapp", "SalaryObservation")
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    table = quote(SalaryObservation._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, LOWER(role) FROM (SELECT id, role, ROW_NUMBER() OVER "
+            f"(PARTITION BY fingerprint ORDER BY id) AS position FROM {table}) ranked "
+            "WHERE position > 1"
+        )
+        duplicates = cursor.fetchall()
+    if not duplicates:
+        return
+    ids = [pk for pk, _role in duplicates]
+    for start in range(0, len(ids), BATCH_SIZE):
+        with transaction.atomic():
+            SalaryObservation.objects.filter(id__in=ids[start : start + BATCH_SIZE]).delete()
+
+    roles = sorted({role for _pk, role in duplicates})
+    with transaction.atomic():
+        for name in ("SalaryCellSketch", "SalaryCubeCell", "SalaryDimensionValue"):
+            apps.get_model("testapp", name).objects.filter(role__in=roles).delete()
+        apps.get_model("testapp", "SalaryRoleAggregate").objects.filter(role__in=roles).delete()
+        SalaryDataset = apps.get_model("testapp", "SalaryDataset")
+        SalaryDataset.objects.get_or_create(pk=DATASET_ID)
+        SalaryDataset.objects.filter(pk=DATASET_ID).update(
+            version=F("version") + 1, updated_at=timezone.now()
+        )
+
+
+class Migration(migrations.Migration):
+
+    # Every batch commits on its own instead of holding locks until the end.
+    atomic = False
+
+    dependencies = [
+        ('testapp', '0009_observation_seek_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salaryobservation',
+            name='fingerprint',
+            field=testapp.models.FingerprintField(max_length=16, null=True),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='salaryobservation',
+            name='unique_salary_observation',
+        ),
+        migrations.RunPython(remove_duplicate_observations, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='salaryobservation',
+            name='fingerprint',
+            field=testapp.models.FingerprintField(max_length=16),
+        ),
+        migrations.AddConstraint(
+            model_name='salaryobservation',
+            constraint=models.UniqueConstraint(fields=('fingerprint',), name='salary_obs_fingerprint_uniq'),
+        ),
+    ]
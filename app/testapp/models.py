@@ -1,45 +1,70 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .fingerprints import FINGERPRINT_SIZE, observation_fingerprint
+
+
+class FingerprintField(models.BinaryField):
+    """Fixed-width digest of the natural key, recomputed on every save.
+
+    Like ``auto_now``, the value is set in ``pre_save``, which ``save()`` and
+    ``bulk_create()`` both call, so no ingest path can forget it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", FINGERPRINT_SIZE)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        value = observation_fingerprint(model_instance)
+        setattr(model_instance, self.attname, value)
+        return value
 
 
 class SalaryObservation(models.Model):
     source = models.CharField(max_length=100)
-    role = models.CharField(max_length=150, db_index=True)
-    level = models.CharField(max_length=100, db_index=True)
-    location = models.CharField(max_length=150, db_index=True)
-    state = models.CharField(max_length=30, db_index=True)
-    country = models.CharField(max_length=100, db_index=True)
-    currency = models.CharField(max_length=10, db_index=True)
-    work_model = models.CharField(max_length=50, db_index=True)
+    role = models.CharField(max_length=150)
+    level = models.CharField(max_length=100)
+    location = models.CharField(max_length=150)
+    state = models.CharField(max_length=30)
+    country = models.CharField(max_length=100)
+    currency = models.CharField(max_length=10)
+    work_model = models.CharField(max_length=50)
     base_salary_min = models.DecimalField(max_digits=12, decimal_places=2)
     base_salary_max = models.DecimalField(max_digits=12, decimal_places=2)
     total_compensation = models.DecimalField(max_digits=12, decimal_places=2)
     observed_at = models.DateField(null=True, blank=True)
     ingested_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    fingerprint = FingerprintField()
 
     class Meta:
         ordering = ["role", "level", "state", "work_model"]
         indexes = [
-            models.Index(fields=["role", "country", "state", "work_model"]),
-            models.Index(fields=["role", "level", "currency"]),
+            # Every filter compares LOWER(column) with a lowercase value, so
+            # the observations are only indexed on those expressions.
+            # The trailing id makes it the seek order of /api/observations/.
+            models.Index(
+                Lower("role"),
+                Lower("country"),
+                Lower("state"),
+                Lower("work_model"),
+                F("id"),
+                name="salary_obs_ci_geo_seek_idx",
+            ),
+            models.Index(
+                Lower("role"),
+                Lower("level"),
+                Lower("currency"),
+                name="salary_obs_ci_level_idx",
+            ),
+            models.Index(Lower("role"), Lower("location"), name="salary_obs_ci_location_idx"),
         ]
         constraints = [
-            models.UniqueConstraint(
-                fields=[
-                    "source",
-                    "role",
-                    "level",
-                    "location",
-                    "state",
-                    "country",
-                    "currency",
-                    "work_model",
-                    "base_salary_min",
-                    "base_salary_max",
-                    "total_compensation",
-                    "observed_at",
-                ],
-                name="unique_salary_observation",
-            )
+            # A 16-byte key instead of the twelve natural key columns keeps
+            # the index small and every insert's uniqueness check cheap.
+            models.UniqueConstraint(fields=["fingerprint"], name="salary_obs_fingerprint_uniq"),
         ]
 
     def __str__(self) -> str:
@@ -60,3 +85,151 @@ class SalaryRoleAggregate(models.Model):
 
     def __str__(self) -> str:
         return f"Aggregate<{self.role}>"
+
+
+class SalaryAggregatePayload(models.Model):
+    """Serialized bytes of a role aggregate, written at rebuild time.
+
+    Role-only requests stream ``body`` as-is instead of decoding the JSONField
+    and re-encoding it.
+    """
+
+    IDENTITY = "identity"
+
+    aggregate = models.ForeignKey(
+        SalaryRoleAggregate, related_name="payloads", on_delete=models.CASCADE
+    )
+    kind = models.CharField(max_length=20)
+    encoding = models.CharField(max_length=20, default=IDENTITY)
+    body = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["aggregate", "kind", "encoding"],
+                name="unique_salary_aggregate_payload",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"Payload<{self.aggregate_id}:{self.kind}:{self.encoding}>"
+
+
+class SalaryCellSketch(models.Model):
+    """Quantile sketch of total compensation for one role/level/state/work model/currency cell.
+
+    Dimension values are stored normalized (stripped, lowercase) so filtered
+    requests can match them with exact lookups.
+    """
+
+    role = models.CharField(max_length=150)
+    level = models.CharField(max_length=100)
+    state = models.CharField(max_length=30)
+    work_model = models.CharField(max_length=50)
+    currency = models.CharField(max_length=10)
+    observations = models.PositiveIntegerField()
+    sketch = models.JSONField()
+
+    class Meta:
+        ordering = ["role", "level", "state", "work_model", "currency"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["role", "level", "state", "work_model", "currency"],
+                name="unique_salary_cell_sketch",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"Sketch<{self.role}/{self.level}/{self.state}/{self.work_model}/{self.currency}>"
+
+
+class SalaryCubeCell(models.Model):
+    """Count/sum/min/max of the observations sharing every filterable dimension.
+
+    Any filter combination for a role is answered by rolling up the matching
+    cells, so filtered requests never need to scan raw observations.
+    """
+
+    role = models.CharField(max_length=150, db_index=True)
+    source = models.CharField(max_length=100)
+    level = models.CharField(max_length=100)
+    location = models.CharField(max_length=150)
+    state = models.CharField(max_length=30)
+    country = models.CharField(max_length=100)
+    currency = models.CharField(max_length=10)
+    work_model = models.CharField(max_length=50)
+    observations = models.PositiveIntegerField()
+    sum_base_min = models.DecimalField(max_digits=20, decimal_places=2)
+    sum_base_max = models.DecimalField(max_digits=20, decimal_places=2)
+    sum_total = models.DecimalField(max_digits=20, decimal_places=2)
+    min_base = models.DecimalField(max_digits=12, decimal_places=2)
+    max_base = models.DecimalField(max_digits=12, decimal_places=2)
+    min_total = models.DecimalField(max_digits=12, decimal_places=2)
+    max_total = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        ordering = ["role", "level", "state", "work_model"]
+
+    def __str__(self) -> str:
+        return f"Cube<{self.role}/{self.level}/{self.state}/{self.work_model}/{self.currency}>"
+
+
+class SalaryDimensionValue(models.Model):
+    """Distinct filter value of one dimension with its observation count per role.
+
+    Rebuilt per role alongside the aggregates; ``/api/filters/`` reads it
+    instead of scanning observations with DISTINCT.
+    """
+
+    role = models.CharField(max_length=150)
+    dimension = models.CharField(max_length=20)
+    value = models.CharField(max_length=150)
+    observations = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ["role", "dimension", "value"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["role", "dimension", "value"],
+                name="unique_salary_dimension_value",
+            )
+        ]
+        indexes = [models.Index(fields=["dimension", "value"], name="salary_dim_value_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.role}:{self.dimension}={self.value} ({self.observations})"
+
+
+class SalaryDataset(models.Model):
+    """Single-row version counter bumped whenever observations change.
+
+    In-process caches compare this version to decide when to refresh.
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    SINGLETON_ID = 1
+
+    def __str__(self) -> str:
+        return f"Dataset<v{self.version}>"
+
+    @classmethod
+    def current_version(cls) -> int:
+        return cls.current_state()[0]
+
+    @classmethod
+    def current_state(cls):
+        """``(version, updated_at)`` of the dataset, ``(0, None)`` before any load."""
+        state = (
+            cls.objects.filter(pk=cls.SINGLETON_ID).values_list("version", "updated_at").first()
+        )
+        return state or (0, None)
+
+    @classmethod
+    def bump(cls) -> int:
+        dataset, _created = cls.objects.get_or_create(pk=cls.SINGLETON_ID)
+        cls.objects.filter(pk=dataset.pk).update(
+            version=models.F("version") + 1, updated_at=timezone.now()
+        )
+        return cls.current_version()
@@ -0,0 +1,103 @@
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.core import signing
+from django.db import connection
+from django.db.models import QuerySet
+from django.db.models.functions import Lower
+
+from .exports import EXPORT_FIELDS
+from .models import SalaryObservation
+
+CURSOR_SALT = "testapp.observations.cursor"
+
+# Seek order of /api/observations/: the columns of salary_obs_ci_geo_seek_idx
+# after LOWER(role), which every page filters on by equality.
+SEEK_KEYS = (
+    ("country_key", "country"),
+    ("state_key", "state"),
+    ("work_model_key", "work_model"),
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _filters_digest(filters: Dict[str, Optional[str]]) -> str:
+    return hashlib.sha1(repr(sorted(filters.items())).encode()).hexdigest()[:12]
+
+
+def encode_cursor(position: Sequence, filters: Dict[str, Optional[str]]) -> str:
+    """Signed, opaque token for the row after which the next page starts."""
+    return signing.dumps(
+        {"after": list(position), "filters": _filters_digest(filters)},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(cursor: str, filters: Dict[str, Optional[str]]) -> List:
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature as exc:
+        raise InvalidCursor("invalid cursor") from exc
+    if data.get("filters") != _filters_digest(filters):
+        raise InvalidCursor("cursor does not belong to these filters")
+    return data["after"]
+
+
+def _seek(qs: QuerySet, position: Sequence) -> QuerySet:
+    # The row-value comparison selects the rows after the previous page, but
+    # planners (SQLite in particular) only apply it as a filter; the redundant
+    # bound on the leading column is what starts the index range scan there.
+    # Django 3.2 has no tuple lookup, hence extra().
+    table = connection.ops.quote_name(SalaryObservation._meta.db_table)
+    columns = [f"LOWER({table}.{connection.ops.quote_name(field)})" for _key, field in SEEK_KEYS]
+    columns.append(f"{table}.{connection.ops.quote_name('id')}")
+    placeholders = ", ".join(["%s"] * len(columns))
+    return qs.extra(
+        where=[f"{columns[0]} >= %s", f"({', '.join(columns)}) > ({placeholders})"],
+        params=[position[0], *position],
+    )
+
+
+def seek_queryset(
+    qs: QuerySet[SalaryObservation],
+    filters: Dict[str, Optional[str]],
+    cursor: Optional[str] = None,
+) -> QuerySet[SalaryObservation]:
+    """``qs`` in seek order, starting after the cursor position when given."""
+    qs = qs.annotate(**{key: Lower(field) for key, field in SEEK_KEYS}).order_by(
+        *(key for key, _field in SEEK_KEYS), "id"
+    )
+    if cursor:
+        qs = _seek(qs, decode_cursor(cursor, filters))
+    return qs
+
+
+def observation_page(
+    qs: QuerySet[SalaryObservation],
+    filters: Dict[str, Optional[str]],
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """One page of ``qs`` in seek order, plus the cursor of the next page.
+
+    Every page is an index range scan of ``limit + 1`` rows starting after the
+    cursor position, so page 10,000 costs the same as page one (unlike
+    OFFSET, which reads and discards every earlier row).
+    """
+    qs = seek_queryset(qs, filters, cursor)
+    rows = list(qs.values(*EXPORT_FIELDS, *(key for key, _field in SEEK_KEYS))[: limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [last[key] for key, _field in SEEK_KEYS] + [last["id"]], filters
+        )
+    for row in rows:
+        for key, _field in SEEK_KEYS:
+            del row[key]
+    return rows, next_cursor
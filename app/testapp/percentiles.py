@@ -0,0 +1,186 @@
+import math
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import QuerySet
+
+DEFAULT_PERCENTILES: Tuple[Decimal, ...] = (Decimal("0.25"), Decimal("0.50"), Decimal("0.75"))
+
+Percentiles = Dict[Decimal, Optional[Decimal]]
+
+
+def percentile(sorted_values: Sequence[Decimal], fraction: Decimal) -> Optional[Decimal]:
+    """Linear interpolation between closest ranks (``percentile_cont`` semantics)."""
+    if not sorted_values:
+        return None
+    if fraction <= 0:
+        return sorted_values[0]
+    if fraction >= 1:
+        return sorted_values[-1]
+    lower_index, upper_index, weight = _rank_positions(len(sorted_values), fraction)
+    lower = sorted_values[lower_index]
+    if lower_index == upper_index:
+        return lower
+    upper = sorted_values[upper_index]
+    return lower + (upper - lower) * weight
+
+
+def _rank_positions(count: int, fraction: Decimal) -> Tuple[int, int, Decimal]:
+    k = (count - 1) * fraction
+    lower_index = int(math.floor(k))
+    upper_index = int(math.ceil(k))
+    return lower_index, upper_index, Decimal(str(k - lower_index))
+
+
+class PercentileBackend(ABC):
+    """Computes several percentiles of one column of a queryset."""
+
+    name = ""
+
+    @abstractmethod
+    def compute(
+        self,
+        qs: QuerySet,
+        field: str,
+        fractions: Sequence[Decimal],
+    ) -> Percentiles:
+        ...
+
+
+class PythonPercentileBackend(PercentileBackend):
+    """Loads and sorts every value in Python; the reference implementation."""
+
+    name = "python"
+
+    def compute(self, qs, field, fractions):
+        values = sorted(qs.order_by().values_list(field, flat=True))
+        return {fraction: percentile(values, fraction) for fraction in fractions}
+
+
+class WindowPercentileBackend(PercentileBackend):
+    """Ranks values with window functions and only fetches the rows needed.
+
+    The database returns the few ranks around each requested position, so
+    Python interpolates between exact values instead of sorting the column.
+    """
+
+    name = "window"
+
+    def compute(self, qs, field, fractions):
+        if not fractions:
+            return {}
+        inner_sql, params = qs.order_by().values(field).query.sql_with_params()
+        # Float arithmetic in SQL may land one rank off, so fetch a one-rank
+        # margin around each position and pick the exact ranks in Python.
+        clauses: List[str] = []
+        position_params: List[float] = []
+        for fraction in fractions:
+            clauses.append(
+                "(rank_index BETWEEN CAST((total - 1) * %s AS INTEGER) - 1 "
+                "AND CAST((total - 1) * %s AS INTEGER) + 1)"
+            )
+            position_params.extend([float(fraction), float(fraction)])
+        sql = (
+            "SELECT rank_index, total, value FROM ("
+            f"SELECT {field} AS value, "
+            f"ROW_NUMBER() OVER (ORDER BY {field}) - 1 AS rank_index, "
+            "COUNT(*) OVER () AS total "
+            f"FROM ({inner_sql}) AS observations"
+            f") AS ranked WHERE {' OR '.join(clauses)}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, list(params) + position_params)
+            rows = cursor.fetchall()
+        if not rows:
+            return {fraction: None for fraction in fractions}
+
+        total = rows[0][1]
+        ranked = {rank: _to_decimal(value) for rank, _total, value in rows}
+        results: Percentiles = {}
+        for fraction in fractions:
+            bounded = min(max(fraction, Decimal("0")), Decimal("1"))
+            lower_index, upper_index, weight = _rank_positions(total, bounded)
+            lower = ranked[lower_index]
+            upper = ranked[upper_index]
+            results[fraction] = lower if lower_index == upper_index else lower + (upper - lower) * weight
+        return results
+
+
+class PostgresPercentileBackend(PercentileBackend):
+    """Uses ``percentile_cont`` so PostgreSQL interpolates every fraction in one pass."""
+
+    name = "postgres"
+
+    def compute(self, qs, field, fractions):
+        if not fractions:
+            return {}
+        inner_sql, params = qs.order_by().values(field).query.sql_with_params()
+        sql = (
+            "SELECT percentile_cont(%s::float8[]) WITHIN GROUP "
+            f"(ORDER BY {field}) FROM ({inner_sql}) AS observations"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [[float(fraction) for fraction in fractions]] + list(params))
+            (values,) = cursor.fetchone()
+        if values is None:
+            return {fraction: None for fraction in fractions}
+        return {
+            fraction: _to_decimal(value) for fraction, value in zip(fractions, values)
+        }
+
+
+def _to_decimal(value) -> Optional[Decimal]:
+    if value is None or isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+PERCENTILE_BACKENDS = {
+    backend.name: backend
+    for backend in (PythonPercentileBackend, WindowPercentileBackend, PostgresPercentileBackend)
+}
+
+
+def get_percentile_backend() -> PercentileBackend:
+    name = getattr(settings, "SALARY_PERCENTILE_BACKEND", "auto")
+    if name == "auto":
+        if connection.vendor == "postgresql":
+            name = PostgresPercentileBackend.name
+        elif connection.features.supports_over_clause:
+            name = WindowPercentileBackend.name
+        else:
+            name = PythonPercentileBackend.name
+    try:
+        return PERCENTILE_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown percentile backend '{name}'") from None
+
+
+def parse_percentiles(raw: Optional[str]) -> Tuple[Decimal, ...]:
+    """Parse a comma-separated list of percentages (``"10,50,90"``) into fractions."""
+    if raw is None or not raw.strip():
+        return DEFAULT_PERCENTILES
+    fractions = set()
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            value = Decimal(item)
+        except ArithmeticError:
+            raise ValueError(f"Invalid percentile '{item}'") from None
+        if not value.is_finite() or value < 0 or value > 100:
+            raise ValueError("percentiles must be between 0 and 100")
+        fractions.add(value / 100)
+    if not fractions:
+        return DEFAULT_PERCENTILES
+    return tuple(sorted(fractions))
+
+
+def percentile_label(fraction: Decimal) -> str:
+    if fraction == Decimal("0.5"):
+        return "median"
+    return f"p{format((fraction * 100).normalize(), 'f')}"
@@ -0,0 +1,131 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from queue import Empty, Queue
+from typing import Callable, List, Optional, Sequence
+
+from django.db import connection, connections, transaction
+
+from .salary_data import rebuild_role_aggregate
+
+EXECUTORS = ("thread", "process")
+
+
+@dataclass
+class RoleRebuild:
+    role: str
+    seconds: float
+
+
+Progress = Callable[[RoleRebuild], None]
+
+
+def _rebuild_in_transaction(role: str) -> RoleRebuild:
+    started = time.perf_counter()
+    with transaction.atomic():
+        rebuild_role_aggregate(role)
+    return RoleRebuild(role=role, seconds=time.perf_counter() - started)
+
+
+def can_parallelize() -> bool:
+    """Whether rebuilds may run on separate connections.
+
+    SQLite allows a single writer at a time, and rows written inside an open
+    transaction are invisible to other connections, so both cases rebuild
+    serially on the current connection instead.
+    """
+    return connection.vendor != "sqlite" and not connection.in_atomic_block
+
+
+def rebuild_role_aggregates(
+    roles: Sequence[str],
+    *,
+    workers: int = 1,
+    executor: str = "thread",
+    progress: Optional[Progress] = None,
+) -> List[RoleRebuild]:
+    """Rebuild aggregates for ``roles``, one transaction per role.
+
+    With ``workers > 1`` the roles are spread over a thread or process pool in
+    which every worker holds its own database connection.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}'")
+    roles = sorted(set(roles))
+    workers = min(workers, len(roles))
+    if workers <= 1 or not can_parallelize():
+        return _rebuild_serially(roles, progress)
+    if executor == "process":
+        return _rebuild_with_processes(roles, workers, progress)
+    return _rebuild_with_threads(roles, workers, progress)
+
+
+def _rebuild_serially(roles: Sequence[str], progress: Optional[Progress]) -> List[RoleRebuild]:
+    results: List[RoleRebuild] = []
+    for role in roles:
+        result = _rebuild_in_transaction(role)
+        results.append(result)
+        if progress:
+            progress(result)
+    return results
+
+
+def _rebuild_with_threads(
+    roles: Sequence[str], workers: int, progress: Optional[Progress]
+) -> List[RoleRebuild]:
+    pending: "Queue[str]" = Queue()
+    for role in roles:
+        pending.put(role)
+    results: List[RoleRebuild] = []
+    lock = threading.Lock()
+
+    def work() -> None:
+        # Each thread keeps one connection for all of its roles and closes it
+        # when the queue is drained.
+        try:
+            while True:
+                try:
+                    role = pending.get_nowait()
+                except Empty:
+                    return
+                result = _rebuild_in_transaction(role)
+                with lock:
+                    results.append(result)
+                    if progress:
+                        progress(result)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(work) for _ in range(workers)]
+        for future in futures:
+            future.result()
+    return results
+
+
+def _init_process_worker() -> None:
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _rebuild_in_process(role: str) -> RoleRebuild:
+    return _rebuild_in_transaction(role)
+
+
+def _rebuild_with_processes(
+    roles: Sequence[str], workers: int, progress: Optional[Progress]
+) -> List[RoleRebuild]:
+    # Forked workers must not share the parent's socket; close it first so
+    # every process opens its own connection.
+    connections.close_all()
+    results: List[RoleRebuild] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker) as pool:
+        for result in pool.map(_rebuild_in_process, roles):
+            results.append(result)
+            if progress:
+                progress(result)
+    return results
@@ -0,0 +1,146 @@
+import copy
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import SalaryDataset
+
+DATASET_VERSION_CACHE_KEY = "testapp.dataset.version"
+
+# Hit/miss counters for the in-process result cache: "hit" (served from the
+# LRU), "miss" (computed) and "shared" (waited on another thread's computation).
+RESULT_CACHE_STATS: Counter = Counter()
+
+DatasetToken = Tuple[int, Optional[str]]
+
+
+def _read_dataset_token() -> DatasetToken:
+    version, updated_at = SalaryDataset.current_state()
+    return version, updated_at.isoformat() if updated_at else None
+
+
+def dataset_token() -> DatasetToken:
+    """Version and update time of the dataset, read through ``django.core.cache``.
+
+    ``load_salary_dataset`` publishes the new token after every load; other
+    processes pick it up from the database once ``SALARY_DATASET_VERSION_TTL``
+    expires.
+    """
+    token = cache.get(DATASET_VERSION_CACHE_KEY)
+    if token is None:
+        token = publish_dataset_token()
+    return token
+
+
+def publish_dataset_token() -> DatasetToken:
+    token = _read_dataset_token()
+    cache.set(
+        DATASET_VERSION_CACHE_KEY,
+        token,
+        timeout=getattr(settings, "SALARY_DATASET_VERSION_TTL", 30),
+    )
+    return token
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: object = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """Bounded LRU of computed salary payloads with single-flight computation.
+
+    Entries are keyed by the caller's normalized arguments and scoped to one
+    dataset token; the whole cache is dropped when the token changes. Empty
+    results (unknown roles, filters that match nothing) live in a separate,
+    smaller LRU so probing arbitrary roles cannot evict real entries.
+    Concurrent misses for the same key wait for the first caller instead of
+    computing again. Callers always receive their own deep copy.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._token: Optional[DatasetToken] = None
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._negative: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    @staticmethod
+    def enabled() -> bool:
+        return getattr(settings, "SALARY_RESULT_CACHE_SIZE", 1024) > 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._negative.clear()
+            self._token = None
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._negative)
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], object],
+        is_empty: Callable[[object], bool] = lambda result: False,
+    ) -> Tuple[object, bool]:
+        """Return ``(result, hit)`` for ``key``, computing it at most once."""
+        token = dataset_token()
+        key = (token, key)
+        with self._lock:
+            if token != self._token:
+                self._entries.clear()
+                self._negative.clear()
+                self._token = token
+            for entries in (self._entries, self._negative):
+                if key in entries:
+                    entries.move_to_end(key)
+                    RESULT_CACHE_STATS["hit"] += 1
+                    return copy.deepcopy(entries[key]), True
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                RESULT_CACHE_STATS["shared"] += 1
+            return copy.deepcopy(flight.result), True
+
+        try:
+            flight.result = compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    RESULT_CACHE_STATS["miss"] += 1
+                    if token == self._token:
+                        self._store(key, flight.result, is_empty(flight.result))
+            flight.done.set()
+        return copy.deepcopy(flight.result), False
+
+    def _store(self, key: Hashable, result: object, empty: bool) -> None:
+        if empty:
+            entries = self._negative
+            limit = getattr(settings, "SALARY_RESULT_CACHE_NEGATIVE_SIZE", 256)
+        else:
+            entries = self._entries
+            limit = getattr(settings, "SALARY_RESULT_CACHE_SIZE", 1024)
+        entries[key] = result
+        entries.move_to_end(key)
+        while len(entries) > limit:
+            entries.popitem(last=False)
+
+
+RESULT_CACHE = ResultCache()
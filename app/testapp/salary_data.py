@@ -1,13 +1,84 @@
 import copy
-import math
+import gzip
+import json
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from django.db.models import Avg, Count, Min, Max, QuerySet
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection
+from django.db.models import Avg, Count, DecimalField, Min, Max, QuerySet, Sum
+from django.db.models.functions import Lower
 
-from .models import SalaryObservation, SalaryRoleAggregate
+from .metrics import note_cache, note_served_path
+from .models import (
+    SalaryAggregatePayload,
+    SalaryCellSketch,
+    SalaryCubeCell,
+    SalaryDimensionValue,
+    SalaryObservation,
+    SalaryRoleAggregate,
+)
+from .percentiles import (
+    DEFAULT_PERCENTILES,
+    Percentiles,
+    get_percentile_backend,
+    percentile_label,
+)
+from .result_cache import RESULT_CACHE
+from .sketches import DEFAULT_COMPRESSION, QuantileSketch
+from .snapshot import ColumnarSnapshot, get_snapshot, np
+
+try:  # Brotli variants are only produced when the optional package is installed.
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
 
 ROUNDING_STEP = Decimal("0.01")
+SUMMARY_DIMENSIONS = ("level", "state", "work_model")
+CELL_FIELDS = ("currency", "source") + SUMMARY_DIMENSIONS
+SKETCH_DIMENSIONS = ("level", "state", "work_model", "currency")
+FILTER_DIMENSIONS = ("location", "country", "state", "level", "currency", "work_model")
+CUBE_DIMENSIONS = ("source", "level", "location", "state", "country", "currency", "work_model")
+TOP_GROUPS = (
+    ("state", "top_states"),
+    ("location", "top_locations"),
+    ("work_model", "top_work_models"),
+    ("source", "top_sources"),
+)
+
+# Which precomputed or live path answered each call: "cache" (in-process
+# result cache), "snapshot" (columnar snapshot), "aggregate" (role-only
+# payload), "cube" (rolled up from SalaryCubeCell) or "live" (observations).
+SERVED_PATH_COUNTS: Counter = Counter()
+_SERVED_PATH_LOCK = threading.Lock()
+_SERVED_PATHS: ContextVar[Optional[List[str]]] = ContextVar("salary_served_paths", default=None)
+
+
+def _record_path(path: str) -> None:
+    with _SERVED_PATH_LOCK:
+        SERVED_PATH_COUNTS[path] += 1
+    paths = _SERVED_PATHS.get()
+    if paths is not None:
+        paths.append(path)
+    note_served_path(path)
+
+
+@contextmanager
+def track_served_paths() -> Iterator[List[str]]:
+    """Collect the paths recorded by salary functions called inside the block."""
+    paths: List[str] = []
+    token = _SERVED_PATHS.set(paths)
+    try:
+        yield paths
+    finally:
+        _SERVED_PATHS.reset(token)
 
 
 def _normalize(value: Optional[str]) -> Optional[str]:
@@ -29,6 +100,19 @@ def _format_decimal(value: Optional[Decimal]) -> Optional[float]:
     return float(value.quantize(ROUNDING_STEP, rounding=ROUND_HALF_UP))
 
 
+def _filter_case_insensitive(qs: QuerySet, filters: Dict[str, Optional[str]]) -> QuerySet:
+    """Filter on ``LOWER(field) = value`` for every normalized value in ``filters``.
+
+    Unlike ``__iexact`` this matches the ``Lower()`` expression indexes declared
+    on ``SalaryObservation``.
+    """
+    lookups = {field: value for field, value in filters.items() if value}
+    aliases = {f"{field}_lower": Lower(field) for field in lookups}
+    return qs.alias(**aliases).filter(
+        **{f"{field}_lower": value for field, value in lookups.items()}
+    )
+
+
 def _filtered_queryset(
     role: str,
     location: Optional[str] = None,
@@ -45,50 +129,72 @@ def _filtered_queryset(
     if role_clean is None:
         raise ValueError("role is required")
 
-    qs = SalaryObservation.objects.filter(role__iexact=role_clean)
-
-    location_clean = _clean(location)
-    if location_clean:
-        qs = qs.filter(location__iexact=location_clean)
-    country_clean = _clean(country)
-    if country_clean:
-        qs = qs.filter(country__iexact=country_clean)
-    state_clean = _clean(state)
-    if state_clean:
-        qs = qs.filter(state__iexact=state_clean)
-    level_clean = _clean(level)
-    if level_clean:
-        qs = qs.filter(level__iexact=level_clean)
-    currency_clean = _clean(currency)
-    if currency_clean:
-        qs = qs.filter(currency__iexact=currency_clean)
-    work_model_clean = _clean(work_model)
-    if work_model_clean:
-        qs = qs.filter(work_model__iexact=work_model_clean)
-
-    qs = qs.order_by()
-
     filters = {
         "role": _normalize(role_clean),
-        "location": _normalize(location_clean),
-        "country": _normalize(country_clean),
-        "state": _normalize(state_clean),
-        "level": _normalize(level_clean),
-        "currency": _normalize(currency_clean),
-        "work_model": _normalize(work_model_clean),
+        "location": _normalize(_clean(location)),
+        "country": _normalize(_clean(country)),
+        "state": _normalize(_clean(state)),
+        "level": _normalize(_clean(level)),
+        "currency": _normalize(_clean(currency)),
+        "work_model": _normalize(_clean(work_model)),
     }
 
+    qs = _filter_case_insensitive(SalaryObservation.objects.all(), filters).order_by()
     return qs, filters
 
 
+def filtered_observations(
+    role: str,
+    **filters: Optional[str],
+) -> Tuple[QuerySet[SalaryObservation], Dict[str, Optional[str]]]:
+    """Observations matching the API filters, plus the normalized filters.
+
+    Takes the same keyword filters as ``summarize_salaries``; unknown names
+    raise ``ValueError``.
+    """
+    unknown = sorted(set(filters) - set(FILTER_DIMENSIONS))
+    if unknown:
+        raise ValueError(f"unknown filter(s): {', '.join(unknown)}")
+    return _filtered_queryset(role, **filters)
+
+
 def _only_role_filter(filters: Dict[str, Optional[str]]) -> bool:
     return filters["role"] is not None and all(
-        filters[key] is None
-        for key in ("location", "country", "state", "level", "currency", "work_model")
+        filters[key] is None for key in FILTER_DIMENSIONS
     )
 
 
+def _cube_cells(filters: Dict[str, Optional[str]]) -> Optional[List[Dict]]:
+    """Return the cube cells matching ``filters`` or ``None`` to use live data.
+
+    Roles without cells (cube disabled, not built yet, or no match) fall back
+    to the live path, which is cheap when nothing matches.
+    """
+    if not getattr(settings, "SALARY_CUBE_ENABLED", True):
+        return None
+    cells = _filter_case_insensitive(
+        SalaryCubeCell.objects.filter(role=filters["role"]),
+        {dimension: filters[dimension] for dimension in FILTER_DIMENSIONS},
+    )
+    rows = list(cells.order_by().values(*CUBE_DIMENSIONS, *CELL_AGGREGATES))
+    return rows or None
+
+
 def _build_summary(qs: QuerySet[SalaryObservation], filters: Dict[str, Optional[str]]) -> Dict:
+    engine = getattr(settings, "SALARY_SUMMARY_ENGINE", "grouped")
+    if engine == "fanout":
+        return _build_summary_fanout(qs, filters)
+    if engine != "grouped":
+        raise ValueError(f"Unknown salary summary engine '{engine}'")
+    fold = SummaryFold()
+    for row in _grouped_summary_rows(qs):
+        fold.add(row)
+    return fold.payload(filters)
+
+
+def _build_summary_fanout(
+    qs: QuerySet[SalaryObservation], filters: Dict[str, Optional[str]]
+) -> Dict:
     total_observations = qs.count()
 
     currency_breakdown = _summarize_by_currency(qs)
@@ -127,15 +233,54 @@ def summarize_salaries(
         currency=currency,
         work_model=work_model,
     )
+    if use_cache and RESULT_CACHE.enabled():
+        return _cached(
+            ("summary", tuple(filters.values())),
+            lambda: _summarize(qs, filters, use_cache=True),
+            lambda summary: not summary["total_observations"],
+        )
+    return _summarize(qs, filters, use_cache)
+
+
+def _cached(key: Tuple, compute: Callable[[], Dict], is_empty: Callable[[Dict], bool]) -> Dict:
+    result, hit = RESULT_CACHE.get_or_compute(key, compute, is_empty)
+    note_cache("hit" if hit else "miss")
+    if hit:
+        _record_path("cache")
+    return result
+
+
+def _summarize(
+    qs: QuerySet[SalaryObservation], filters: Dict[str, Optional[str]], use_cache: bool
+) -> Dict:
+    snapshot = get_snapshot() if use_cache else None
+    if snapshot is not None:
+        _record_path("snapshot")
+        return _summary_from_cells(snapshot.cells(snapshot.mask(filters), CELL_FIELDS), filters)
 
     if use_cache and _only_role_filter(filters):
         aggregate = SalaryRoleAggregate.objects.filter(role=filters["role"]).first()
         if aggregate:
+            _record_path("aggregate")
             return copy.deepcopy(aggregate.summary)
 
+    if use_cache:
+        cells = _cube_cells(filters)
+        if cells is not None:
+            _record_path("cube")
+            return _summary_from_cells(cells, filters)
+
+    _record_path("live")
     return _build_summary(qs, filters)
 
 
+def _summary_from_cells(cells: Iterable[Dict], filters: Dict[str, Optional[str]]) -> Dict:
+    fold = SummaryFold()
+    for cell in cells:
+        fold.add(cell)
+    return fold.payload(filters)
+
+
 def _summarize_by_currency(qs: QuerySet[SalaryObservation]) -> List[Dict]:
     aggregated = (
         qs.values("currency")
@@ -228,27 +373,225 @@ def _summarize_by_work_model(qs: QuerySet[SalaryObservation]) -> List[Dict]:
     return _summarize_group(qs, "work_model", "work_model")
 
 
-def _percentile(sorted_values: Sequence[Decimal], percentile: float) -> Optional[Decimal]:
-    if not sorted_values:
-        return None
-    if percentile <= 0:
-        return sorted_values[0]
-    if percentile >= 1:
-        return sorted_values[-1]
-    k = (len(sorted_values) - 1) * percentile
-    lower_index = int(math.floor(k))
-    upper_index = int(math.ceil(k))
-    if lower_index == upper_index:
-        return sorted_values[lower_index]
-    lower = sorted_values[lower_index]
-    upper = sorted_values[upper_index]
-    fraction = Decimal(str(k - lower_index))
-    return lower + (upper - lower) * fraction
-
-
-def _total_comp_values(qs: QuerySet[SalaryObservation]) -> List[Decimal]:
-    values = list(qs.values_list("total_compensation", flat=True))
-    return sorted(values)
+# Sums are accumulated across many rows, so they get a wider field than the
+# 12-digit model columns to keep the database converters from overflowing.
+_SUM_FIELD = DecimalField(max_digits=30, decimal_places=2)
+
+
+@dataclass
+class CellStats:
+    """Mergeable count/sum/min/max accumulator for one group of observations."""
+
+    observations: int = 0
+    sum_base_min: Decimal = Decimal("0")
+    sum_base_max: Decimal = Decimal("0")
+    sum_total: Decimal = Decimal("0")
+    min_base: Optional[Decimal] = None
+    max_base: Optional[Decimal] = None
+    min_total: Optional[Decimal] = None
+    max_total: Optional[Decimal] = None
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "CellStats":
+        return cls(
+            observations=row["observations"],
+            sum_base_min=Decimal(row["sum_base_min"] or 0),
+            sum_base_max=Decimal(row["sum_base_max"] or 0),
+            sum_total=Decimal(row["sum_total"] or 0),
+            min_base=row["min_base"],
+            max_base=row["max_base"],
+            min_total=row["min_total"],
+            max_total=row["max_total"],
+        )
+
+    def merge(self, other: "CellStats") -> None:
+        self.observations += other.observations
+        self.sum_base_min += other.sum_base_min
+        self.sum_base_max += other.sum_base_max
+        self.sum_total += other.sum_total
+        self.min_base = _min_optional(self.min_base, other.min_base)
+        self.max_base = _max_optional(self.max_base, other.max_base)
+        self.min_total = _min_optional(self.min_total, other.min_total)
+        self.max_total = _max_optional(self.max_total, other.max_total)
+
+    def average(self, total: Decimal) -> Optional[Decimal]:
+        if not self.observations:
+            return None
+        return total / self.observations
+
+
+def _min_optional(left: Optional[Decimal], right: Optional[Decimal]) -> Optional[Decimal]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return min(left, right)
+
+
+def _max_optional(left: Optional[Decimal], right: Optional[Decimal]) -> Optional[Decimal]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return max(left, right)
+
+
+CELL_AGGREGATES = {
+    "observations": Count("id"),
+    "sum_base_min": Sum("base_salary_min", output_field=_SUM_FIELD),
+    "sum_base_max": Sum("base_salary_max", output_field=_SUM_FIELD),
+    "sum_total": Sum("total_compensation", output_field=_SUM_FIELD),
+    "min_base": Min("base_salary_min"),
+    "max_base": Max("base_salary_max"),
+    "min_total": Min("total_compensation"),
+    "max_total": Max("total_compensation"),
+}
+
+CurrencySources = Dict[str, Dict[str, CellStats]]
+
+
+class SummaryFold:
+    """Folds pre-grouped cells into the ``summarize_salaries`` payload.
+
+    Rows carry the ``CELL_AGGREGATES`` columns plus the grouping columns. A row
+    without a ``dimension`` key is a finest-grain cell and contributes to the
+    overall breakdown and to every dimension; rows produced by GROUPING SETS
+    name the single breakdown they belong to.
+    """
+
+    def __init__(self) -> None:
+        self.overall: CurrencySources = {}
+        self.dimensions: Dict[str, Dict[str, CurrencySources]] = {
+            dimension: {} for dimension in SUMMARY_DIMENSIONS
+        }
+
+    def add(self, row: Dict) -> None:
+        stats = CellStats.from_row(row)
+        if "dimension" not in row:
+            self._add(self.overall, row, stats)
+            for dimension in SUMMARY_DIMENSIONS:
+                self._add(self.dimensions[dimension].setdefault(row[dimension], {}), row, stats)
+            return
+
+        dimension = row["dimension"]
+        if dimension is None:
+            self._add(self.overall, row, stats)
+        else:
+            self._add(self.dimensions[dimension].setdefault(row[dimension], {}), row, stats)
+
+    @staticmethod
+    def _add(target: CurrencySources, row: Dict, stats: CellStats) -> None:
+        sources = target.setdefault(row["currency"], {})
+        existing = sources.get(row["source"])
+        if existing is None:
+            sources[row["source"]] = CellStats(**vars(stats))
+        else:
+            existing.merge(stats)
+
+    def payload(self, filters: Dict[str, Optional[str]]) -> Dict:
+        return {
+            "role": filters["role"],
+            "filters": filters,
+            "total_observations": _count_observations(self.overall),
+            "currencies": _currency_breakdown(self.overall),
+            "levels": self._dimension_breakdown("level"),
+            "states": self._dimension_breakdown("state"),
+            "work_models": self._dimension_breakdown("work_model"),
+        }
+
+    def _dimension_breakdown(self, dimension: str) -> List[Dict]:
+        groups = self.dimensions[dimension]
+        return [
+            {
+                dimension: value,
+                "observations": _count_observations(groups[value]),
+                "currencies": _currency_breakdown(groups[value]),
+            }
+            for value in sorted(filter(None, groups))
+        ]
+
+
+def _count_observations(currencies: CurrencySources) -> int:
+    return sum(
+        stats.observations for sources in currencies.values() for stats in sources.values()
+    )
+
+
+def _currency_breakdown(currencies: CurrencySources) -> List[Dict]:
+    results: List[Dict] = []
+    for currency in sorted(currencies):
+        sources = currencies[currency]
+        totals = CellStats()
+        for stats in sources.values():
+            totals.merge(stats)
+        results.append(
+            {
+                "currency": currency,
+                "observations": totals.observations,
+                "base_salary": {
+                    "min": _format_decimal(totals.min_base),
+                    "max": _format_decimal(totals.max_base),
+                    "average_min": _format_decimal(totals.average(totals.sum_base_min)),
+                    "average_max": _format_decimal(totals.average(totals.sum_base_max)),
+                },
+                "total_compensation": {
+                    "min": _format_decimal(totals.min_total),
+                    "max": _format_decimal(totals.max_total),
+                    "average": _format_decimal(totals.average(totals.sum_total)),
+                },
+                "sources": [
+                    {
+                        "name": name,
+                        "observations": sources[name].observations,
+                        "average_total_compensation": _format_decimal(
+                            sources[name].average(sources[name].sum_total)
+                        ),
+                    }
+                    for name in sorted(sources)
+                ],
+            }
+        )
+    return results
+
+
+def _grouped_summary_rows(qs: QuerySet[SalaryObservation]) -> Iterable[Dict]:
+    if connection.vendor == "postgresql":
+        return _grouping_sets_rows(qs)
+    return qs.order_by().values(*CELL_FIELDS).annotate(**CELL_AGGREGATES)
+
+
+def _grouping_sets_rows(qs: QuerySet[SalaryObservation]) -> List[Dict]:
+    inner_sql, params = (
+        qs.order_by()
+        .values(*CELL_FIELDS, "base_salary_min", "base_salary_max", "total_compensation")
+        .query.sql_with_params()
+    )
+    flags = ", ".join(f"GROUPING({dimension})" for dimension in SUMMARY_DIMENSIONS)
+    grouping_sets = ", ".join(
+        ["(currency, source)"]
+        + [f"(currency, source, {dimension})" for dimension in SUMMARY_DIMENSIONS]
+    )
+    sql = (
+        f"SELECT {', '.join(CELL_FIELDS)}, {flags}, COUNT(*), "
+        "SUM(base_salary_min), SUM(base_salary_max), SUM(total_compensation), "
+        "MIN(base_salary_min), MAX(base_salary_max), "
+        "MIN(total_compensation), MAX(total_compensation) "
+        f"FROM ({inner_sql}) AS observations "
+        f"GROUP BY GROUPING SETS ({grouping_sets})"
+    )
+    columns = list(CELL_FIELDS) + [f"grouping_{d}" for d in SUMMARY_DIMENSIONS] + list(
+        CELL_AGGREGATES
+    )
+    rows: List[Dict] = []
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for record in cursor.fetchall():
+            row = dict(zip(columns, record))
+            row["dimension"] = next(
+                (d for d in SUMMARY_DIMENSIONS if row[f"grouping_{d}"] == 0), None
+            )
+            rows.append(row)
+    return rows
 
 
 def _top_groups(
@@ -280,29 +623,130 @@ def _top_groups(
     return results
 
 
-def _build_insights(qs: QuerySet[SalaryObservation], filters: Dict[str, Optional[str]]) -> Dict:
-    values = _total_comp_values(qs)
-    percentiles = {
-        "p25": _format_decimal(_percentile(values, Decimal("0.25"))) if values else None,
-        "median": _format_decimal(_percentile(values, Decimal("0.50"))) if values else None,
-        "p75": _format_decimal(_percentile(values, Decimal("0.75"))) if values else None,
+def _sketch_compression() -> int:
+    return getattr(settings, "SALARY_SKETCH_COMPRESSION", DEFAULT_COMPRESSION)
+
+
+def _sketch_percentiles(
+    filters: Dict[str, Optional[str]],
+    percentiles: Sequence[Decimal],
+) -> Optional[Percentiles]:
+    """Merge the stored cell sketches matching ``filters``.
+
+    Returns ``None`` when the filters reach outside the sketch dimensions or
+    no sketch matches, so callers fall back to the percentile backend.
+    """
+    if not getattr(settings, "SALARY_PERCENTILE_SKETCHES", True):
+        return None
+    if filters["location"] or filters["country"]:
+        return None
+
+    lookups = {
+        dimension: filters[dimension] for dimension in SKETCH_DIMENSIONS if filters[dimension]
+    }
+    payloads = SalaryCellSketch.objects.filter(role=filters["role"], **lookups).values_list(
+        "sketch", flat=True
+    )
+    sketches = [QuantileSketch.from_dict(payload) for payload in payloads]
+    if not sketches:
+        return None
+
+    merged = QuantileSketch.merge_all(sketches, compression=_sketch_compression())
+    return {
+        fraction: Decimal(str(merged.quantile(fraction))) for fraction in percentiles
     }
 
-    top_states = _top_groups(qs, "state", "state")
-    top_locations = _top_groups(qs, "location", "location")
-    top_work_models = _top_groups(qs, "work_model", "work_model")
-    top_sources = _top_groups(qs, "source", "source")
 
+def _percentile_values(
+    qs: QuerySet[SalaryObservation],
+    filters: Dict[str, Optional[str]],
+    percentiles: Sequence[Decimal],
+    use_sketches: bool,
+) -> Percentiles:
+    values = _sketch_percentiles(filters, percentiles) if use_sketches else None
+    if values is None:
+        values = get_percentile_backend().compute(qs, "total_compensation", percentiles)
+    return values
+
+
+def _insights_payload(
+    filters: Dict[str, Optional[str]],
+    total_observations: int,
+    values: Percentiles,
+    percentiles: Sequence[Decimal],
+    top_groups: Dict[str, List[Dict]],
+) -> Dict:
     return {
         "role": filters["role"],
         "filters": filters,
-        "total_observations": qs.count(),
-        "percentiles": percentiles,
-        "top_states": top_states,
-        "top_locations": top_locations,
-        "top_work_models": top_work_models,
-        "top_sources": top_sources,
+        "total_observations": total_observations,
+        "percentiles": {
+            percentile_label(fraction): _format_decimal(values[fraction])
+            for fraction in percentiles
+        },
+        **top_groups,
+    }
+
+
+def _build_insights(
+    qs: QuerySet[SalaryObservation],
+    filters: Dict[str, Optional[str]],
+    percentiles: Sequence[Decimal] = DEFAULT_PERCENTILES,
+    use_sketches: bool = False,
+) -> Dict:
+    values = _percentile_values(qs, filters, percentiles, use_sketches)
+    top_groups = {key: _top_groups(qs, field, field) for field, key in TOP_GROUPS}
+    return _insights_payload(filters, qs.count(), values, percentiles, top_groups)
+
+
+def _top_groups_from_cells(
+    cells: Sequence[Dict],
+    group_field: str,
+    label: str,
+    limit: int = 5,
+) -> List[Dict]:
+    groups: Dict[str, CellStats] = {}
+    for cell in cells:
+        stats = groups.setdefault(cell[group_field], CellStats())
+        stats.merge(CellStats.from_row(cell))
+    averages = {value: stats.average(stats.sum_total) for value, stats in groups.items()}
+    ranked = sorted(groups, key=lambda value: (-averages[value], value))[:limit]
+    return [
+        {
+            label: value,
+            "observations": groups[value].observations,
+            "average_total_compensation": _format_decimal(averages[value]),
+        }
+        for value in ranked
+        if value
+    ]
+
+
+def _insights_from_cells(
+    cells: Sequence[Dict],
+    qs: QuerySet[SalaryObservation],
+    filters: Dict[str, Optional[str]],
+    percentiles: Sequence[Decimal],
+    use_sketches: bool = True,
+) -> Dict:
+    values = _percentile_values(qs, filters, percentiles, use_sketches)
+    top_groups = {key: _top_groups_from_cells(cells, field, field) for field, key in TOP_GROUPS}
+    total = sum(cell["observations"] for cell in cells)
+    return _insights_payload(filters, total, values, percentiles, top_groups)
+
+
+def _insights_from_snapshot(
+    snapshot: ColumnarSnapshot,
+    mask: "np.ndarray",
+    filters: Dict[str, Optional[str]],
+    percentiles: Sequence[Decimal],
+) -> Dict:
+    top_groups = {
+        key: _top_groups_from_cells(snapshot.cells(mask, (field,)), field, field)
+        for field, key in TOP_GROUPS
     }
+    values = snapshot.percentiles(mask, percentiles)
+    return _insights_payload(filters, int(mask.sum()), values, percentiles, top_groups)
 
 
 def role_insights(
@@ -314,6 +758,7 @@ def role_insights(
     level: Optional[str] = None,
     currency: Optional[str] = None,
     work_model: Optional[str] = None,
+    percentiles: Optional[Sequence[Decimal]] = None,
     use_cache: bool = True,
 ) -> Dict:
     qs, filters = _filtered_queryset(
@@ -325,13 +770,245 @@ def role_insights(
         currency=currency,
         work_model=work_model,
     )
+    percentiles = tuple(percentiles) if percentiles else DEFAULT_PERCENTILES
+    if use_cache and RESULT_CACHE.enabled():
+        return _cached(
+            ("insights", tuple(filters.values()), percentiles),
+            lambda: _insights(qs, filters, percentiles, use_cache=True),
+            lambda insights: not insights["total_observations"],
+        )
+    return _insights(qs, filters, percentiles, use_cache)
 
-    if use_cache and _only_role_filter(filters):
+
+def _insights(
+    qs: QuerySet[SalaryObservation],
+    filters: Dict[str, Optional[str]],
+    percentiles: Sequence[Decimal],
+    use_cache: bool,
+) -> Dict:
+    snapshot = get_snapshot() if use_cache else None
+    if snapshot is not None:
+        _record_path("snapshot")
+        return _insights_from_snapshot(snapshot, snapshot.mask(filters), filters, percentiles)
+
+    if use_cache and percentiles == DEFAULT_PERCENTILES and _only_role_filter(filters):
         aggregate = SalaryRoleAggregate.objects.filter(role=filters["role"]).first()
         if aggregate:
+            _record_path("aggregate")
             return copy.deepcopy(aggregate.insights)
 
-    return _build_insights(qs, filters)
+    if use_cache:
+        cells = _cube_cells(filters)
+        if cells is not None:
+            _record_path("cube")
+            return _insights_from_cells(cells, qs, filters, percentiles)
+
+    _record_path("live")
+    return _build_insights(qs, filters, percentiles, use_sketches=use_cache)
+
+
+def salary_bundle(
+    role: str,
+    *,
+    location: Optional[str] = None,
+    country: Optional[str] = None,
+    state: Optional[str] = None,
+    level: Optional[str] = None,
+    currency: Optional[str] = None,
+    work_model: Optional[str] = None,
+    percentiles: Optional[Sequence[Decimal]] = None,
+    use_cache: bool = True,
+) -> Dict:
+    """``summarize_salaries`` and ``role_insights`` payloads from one shared read."""
+    qs, filters = _filtered_queryset(
+        role,
+        location=location,
+        country=country,
+        state=state,
+        level=level,
+        currency=currency,
+        work_model=work_model,
+    )
+    percentiles = tuple(percentiles) if percentiles else DEFAULT_PERCENTILES
+    if use_cache and RESULT_CACHE.enabled():
+        return _cached(
+            ("bundle", tuple(filters.values()), percentiles),
+            lambda: _bundle(qs, filters, percentiles, use_cache=True),
+            lambda bundle: not bundle["summary"]["total_observations"],
+        )
+    return _bundle(qs, filters, percentiles, use_cache)
+
+
+def _bundle(
+    qs: QuerySet[SalaryObservation],
+    filters: Dict[str, Optional[str]],
+    percentiles: Sequence[Decimal],
+    use_cache: bool,
+) -> Dict:
+    """Build both payloads from the same cells.
+
+    Each tier reads its source once: the snapshot mask, the role's aggregate
+    row, the cube cells, or a single live grouped query fine enough for the
+    summary breakdowns and the top groups (plus the percentile query).
+    """
+    snapshot = get_snapshot() if use_cache else None
+    if snapshot is not None:
+        _record_path("snapshot")
+        mask = snapshot.mask(filters)
+        return {
+            "summary": _summary_from_cells(snapshot.cells(mask, CELL_FIELDS), filters),
+            "insights": _insights_from_snapshot(snapshot, mask, filters, percentiles),
+        }
+
+    if use_cache and percentiles == DEFAULT_PERCENTILES and _only_role_filter(filters):
+        aggregate = (
+            SalaryRoleAggregate.objects.filter(role=filters["role"])
+            .values_list("summary", "insights")
+            .first()
+        )
+        if aggregate:
+            _record_path("aggregate")
+            summary, insights = aggregate
+            return {"summary": summary, "insights": insights}
+
+    cells = _cube_cells(filters) if use_cache else None
+    if cells is not None:
+        _record_path("cube")
+    else:
+        _record_path("live")
+        cells = list(
+            qs.order_by().values(*CELL_FIELDS, "location").annotate(**CELL_AGGREGATES)
+        )
+    return {
+        "summary": _summary_from_cells(cells, filters),
+        "insights": _insights_from_cells(cells, qs, filters, percentiles, use_sketches=use_cache),
+    }
+
+
+def _summarize_roles(
+    roles: Sequence[str],
+    shared_filters: Dict[str, Optional[str]],
+    use_cache: bool = True,
+) -> Dict[str, Dict]:
+    """Summaries for many normalized roles with a constant number of queries.
+
+    With the snapshot engine enabled every role is answered in memory.
+    Otherwise role-only requests read every cached aggregate in one ``role IN``
+    query; remaining roles are rolled up from one cube read, and whatever is
+    still missing comes from a single live grouped query partitioned by role,
+    which is also the only query issued with ``use_cache=False``.
+    """
+    role_filters = {role: {"role": role, **shared_filters} for role in roles}
+    summaries: Dict[str, Dict] = {}
+
+    snapshot = get_snapshot() if use_cache else None
+    if snapshot is not None:
+        shared_mask = snapshot.mask(shared_filters)
+        for role, filters in role_filters.items():
+            _record_path("snapshot")
+            cells = snapshot.cells(shared_mask & snapshot.mask({"role": role}), CELL_FIELDS)
+            summaries[role] = _summary_from_cells(cells, filters)
+        return summaries
+
+    if use_cache and _only_role_filter(role_filters[roles[0]]):
+        aggregates = SalaryRoleAggregate.objects.filter(role__in=roles).values_list(
+            "role", "summary"
+        )
+        for role, summary in aggregates:
+            _record_path("aggregate")
+            summaries[role] = summary
+
+    pending = [role for role in roles if role not in summaries]
+    if pending and use_cache and getattr(settings, "SALARY_CUBE_ENABLED", True):
+        cells = _filter_case_insensitive(
+            SalaryCubeCell.objects.filter(role__in=pending), shared_filters
+        ).order_by()
+        folds: Dict[str, SummaryFold] = {}
+        for cell in cells.values("role", *CUBE_DIMENSIONS, *CELL_AGGREGATES):
+            folds.setdefault(cell["role"], SummaryFold()).add(cell)
+        for role, fold in folds.items():
+            _record_path("cube")
+            summaries[role] = fold.payload(role_filters[role])
+
+    pending = [role for role in roles if role not in summaries]
+    if pending:
+        observations = _filter_case_insensitive(SalaryObservation.objects.all(), shared_filters)
+        rows = (
+            observations.alias(role_lower=Lower("role"))
+            .filter(role_lower__in=pending)
+            .order_by()
+            .values(*CELL_FIELDS, role_key=Lower("role"))
+            .annotate(**CELL_AGGREGATES)
+        )
+        folds = {role: SummaryFold() for role in pending}
+        for row in rows:
+            folds[row["role_key"]].add(row)
+        for role, fold in folds.items():
+            _record_path("live")
+            summaries[role] = fold.payload(role_filters[role])
+
+    return summaries
+
+
+_COMPARE_POOL: Optional[ThreadPoolExecutor] = None
+_COMPARE_POOL_LOCK = threading.Lock()
+
+
+def _compare_pool() -> ThreadPoolExecutor:
+    global _COMPARE_POOL
+    with _COMPARE_POOL_LOCK:
+        if _COMPARE_POOL is None:
+            _COMPARE_POOL = ThreadPoolExecutor(
+                max_workers=getattr(settings, "SALARY_COMPARE_WORKERS", 4),
+                thread_name_prefix="salary-compare",
+            )
+        return _COMPARE_POOL
+
+
+def _summarize_chunk(
+    roles: Sequence[str], shared_filters: Dict[str, Optional[str]], use_cache: bool
+) -> Dict[str, Dict]:
+    try:
+        return _summarize_roles(roles, shared_filters, use_cache)
+    finally:
+        # Pool threads outlive requests, so nothing else closes their connections.
+        close_old_connections()
+
+
+def _summarize_roles_concurrently(
+    roles: Sequence[str],
+    shared_filters: Dict[str, Optional[str]],
+    use_cache: bool = True,
+) -> Dict[str, Dict]:
+    """``_summarize_roles`` split into chunks evaluated on a bounded thread pool.
+
+    Each chunk still costs a constant number of queries, on its own
+    connection. Small comparisons, SQLite and callers inside a transaction
+    (whose rows other connections cannot see) stay on the calling thread.
+    """
+    from .rebuild import can_parallelize  # rebuild imports this module
+
+    chunk_size = max(getattr(settings, "SALARY_COMPARE_CHUNK_SIZE", 4), 1)
+    workers = getattr(settings, "SALARY_COMPARE_WORKERS", 4)
+    if workers <= 1 or len(roles) <= chunk_size or not can_parallelize():
+        return _summarize_roles(roles, shared_filters, use_cache)
+
+    pool = _compare_pool()
+    futures = [
+        # copy_context keeps served-path tracking working inside the pool.
+        pool.submit(
+            copy_context().run,
+            _summarize_chunk,
+            roles[index:index + chunk_size],
+            shared_filters,
+            use_cache,
+        )
+        for index in range(0, len(roles), chunk_size)
+    ]
+    summaries: Dict[str, Dict] = {}
+    for future in futures:
+        summaries.update(future.result())
+    return summaries
 
 
 def compare_roles(
@@ -343,41 +1020,324 @@ def compare_roles(
     level: Optional[str] = None,
     currency: Optional[str] = None,
     work_model: Optional[str] = None,
+    use_cache: bool = True,
 ) -> Dict:
     normalized_roles = sorted({_normalize(role) for role in roles if _clean(role)})
     if not normalized_roles:
         raise ValueError("at least one role is required")
 
-    summaries: List[Dict] = []
-    for role_name in normalized_roles:
-        summary = summarize_salaries(
-            role=role_name,
-            location=location,
-            country=country,
-            state=state,
-            level=level,
-            currency=currency,
-            work_model=work_model,
+    shared_filters = {
+        "location": _normalize(_clean(location)),
+        "country": _normalize(_clean(country)),
+        "state": _normalize(_clean(state)),
+        "level": _normalize(_clean(level)),
+        "currency": _normalize(_clean(currency)),
+        "work_model": _normalize(_clean(work_model)),
+    }
+
+    def compute() -> Dict:
+        summaries = _summarize_roles_concurrently(normalized_roles, shared_filters, use_cache)
+        return {
+            "filters": {"roles": normalized_roles, **shared_filters},
+            "roles": [summaries[role] for role in normalized_roles],
+        }
+
+    if use_cache and RESULT_CACHE.enabled():
+        return _cached(
+            ("compare", tuple(normalized_roles), tuple(shared_filters.values())),
+            compute,
+            lambda comparison: not any(
+                summary["total_observations"] for summary in comparison["roles"]
+            ),
+        )
+    return compute()
+
+
+BATCH_FIELDS = ("role",) + FILTER_DIMENSIONS
+
+
+def _batch_filters(query: object) -> Dict[str, Optional[str]]:
+    if not isinstance(query, dict):
+        raise ValueError("each query must be an object of filters")
+    unknown = sorted(set(query) - set(BATCH_FIELDS))
+    if unknown:
+        raise ValueError(f"unknown filter(s): {', '.join(unknown)}")
+    for key, value in query.items():
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{key} must be a string")
+    _qs, filters = _filtered_queryset(
+        query.get("role"), **{dimension: query.get(dimension) for dimension in FILTER_DIMENSIONS}
+    )
+    return filters
+
+
+def _restrict_to_union(qs: QuerySet, batch: Iterable[Dict[str, Optional[str]]]) -> QuerySet:
+    """Narrow ``qs`` to the rows at least one filter set in ``batch`` can match.
+
+    A dimension is only restricted when every filter set constrains it; the
+    rows are sliced per filter set afterwards by ``_batch_matches``.
+    """
+    batch = list(batch)
+    lookups = {}
+    for dimension in FILTER_DIMENSIONS:
+        values = {filters[dimension] for filters in batch}
+        if None not in values:
+            lookups[dimension] = sorted(values)
+    aliases = {f"{dimension}_lower": Lower(dimension) for dimension in lookups}
+    return qs.alias(**aliases).filter(
+        **{f"{dimension}_lower__in": values for dimension, values in lookups.items()}
+    )
+
+
+def _batch_matches(row: Dict, filters: Dict[str, Optional[str]]) -> bool:
+    return all(
+        filters[dimension] is None or (row[dimension] or "").lower() == filters[dimension]
+        for dimension in FILTER_DIMENSIONS
+    )
+
+
+def _slice_rows(
+    rows: Iterable[Dict], role_key: str, pending: Dict[int, Dict[str, Optional[str]]]
+) -> Dict[int, Dict]:
+    by_role: Dict[str, List[Dict]] = {}
+    for row in rows:
+        by_role.setdefault(row[role_key], []).append(row)
+    summaries = {}
+    for index, filters in pending.items():
+        if filters["role"] in by_role:
+            summaries[index] = _summary_from_cells(
+                (row for row in by_role[filters["role"]] if _batch_matches(row, filters)),
+                filters,
+            )
+    return summaries
+
+
+def summarize_batch(queries: Sequence[object], use_cache: bool = True) -> List[Dict]:
+    """``summarize_salaries`` for many filter sets, in input order.
+
+    Each item is ``{"summary": ...}`` or ``{"error": ...}`` for an invalid
+    filter set. Instead of one query per item, role-only items share one
+    aggregate read, the rest one cube read over the union of their filters,
+    and whatever the cube does not cover one live grouped query over that
+    union; every item is then sliced out of the shared rows.
+    """
+    results: List[Optional[Dict]] = [None] * len(queries)
+    pending: Dict[int, Dict[str, Optional[str]]] = {}
+    for index, query in enumerate(queries):
+        try:
+            pending[index] = _batch_filters(query)
+        except ValueError as exc:
+            results[index] = {"error": str(exc)}
+
+    snapshot = get_snapshot() if use_cache and pending else None
+    if snapshot is not None:
+        for index, filters in pending.items():
+            _record_path("snapshot")
+            cells = snapshot.cells(snapshot.mask(filters), CELL_FIELDS)
+            results[index] = {"summary": _summary_from_cells(cells, filters)}
+        pending = {}
+
+    role_only = {
+        index: filters for index, filters in pending.items() if _only_role_filter(filters)
+    }
+    if use_cache and role_only:
+        aggregates = dict(
+            SalaryRoleAggregate.objects.filter(
+                role__in={filters["role"] for filters in role_only.values()}
+            ).values_list("role", "summary")
+        )
+        for index, filters in role_only.items():
+            if filters["role"] in aggregates:
+                _record_path("aggregate")
+                results[index] = {"summary": copy.deepcopy(aggregates[filters["role"]])}
+                del pending[index]
+
+    if use_cache and pending and getattr(settings, "SALARY_CUBE_ENABLED", True):
+        cells = _restrict_to_union(
+            SalaryCubeCell.objects.filter(
+                role__in={filters["role"] for filters in pending.values()}
+            ),
+            pending.values(),
+        ).order_by()
+        rows = cells.values("role", *CUBE_DIMENSIONS, *CELL_AGGREGATES)
+        for index, summary in _slice_rows(rows, "role", pending).items():
+            _record_path("cube")
+            results[index] = {"summary": summary}
+            del pending[index]
+
+    if pending:
+        filtered = {
+            dimension
+            for filters in pending.values()
+            for dimension in FILTER_DIMENSIONS
+            if filters[dimension] is not None
+        }
+        extra = sorted(filtered - set(CELL_FIELDS))
+        observations = _restrict_to_union(
+            SalaryObservation.objects.alias(role_lower=Lower("role")).filter(
+                role_lower__in={filters["role"] for filters in pending.values()}
+            ),
+            pending.values(),
         )
-        summaries.append(summary)
+        rows = (
+            observations.order_by()
+            .values(*CELL_FIELDS, *extra, role_key=Lower("role"))
+            .annotate(**CELL_AGGREGATES)
+        )
+        summaries = _slice_rows(rows, "role_key", pending)
+        for index, filters in pending.items():
+            _record_path("live")
+            summary = summaries.get(index) or _summary_from_cells([], filters)
+            results[index] = {"summary": summary}
+
+    return results
+
+
+def rebuild_role_sketches(role: str) -> int:
+    qs, filters = _filtered_queryset(role)
+    compression = _sketch_compression()
+    sketches: Dict[Tuple[Optional[str], ...], QuantileSketch] = {}
+    rows = qs.values_list(*SKETCH_DIMENSIONS, "total_compensation").iterator()
+    for *dimensions, value in rows:
+        key = tuple(_normalize(dimension) for dimension in dimensions)
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = QuantileSketch(compression=compression)
+        sketch.add(value)
+
+    SalaryCellSketch.objects.filter(role=filters["role"]).delete()
+    SalaryCellSketch.objects.bulk_create(
+        [
+            SalaryCellSketch(
+                role=filters["role"],
+                observations=sketch.count,
+                sketch=sketch.to_dict(),
+                **dict(zip(SKETCH_DIMENSIONS, key)),
+            )
+            for key, sketch in sketches.items()
+        ]
+    )
+    return len(sketches)
+
+
+def rebuild_role_cube(role: str) -> int:
+    qs, filters = _filtered_queryset(role)
+    rows = qs.values(*CUBE_DIMENSIONS).annotate(**CELL_AGGREGATES)
+    SalaryCubeCell.objects.filter(role=filters["role"]).delete()
+    cells = SalaryCubeCell.objects.bulk_create(
+        [SalaryCubeCell(role=filters["role"], **row) for row in rows]
+    )
+    return len(cells)
+
+
+def rebuild_role_dimensions(role: str) -> int:
+    qs, filters = _filtered_queryset(role)
+    counts: Counter = Counter()
+    for row in qs.values(*FILTER_DIMENSIONS).annotate(observations=Count("id")):
+        for dimension in FILTER_DIMENSIONS:
+            if row[dimension]:
+                counts[dimension, row[dimension]] += row["observations"]
+    SalaryDimensionValue.objects.filter(role=filters["role"]).delete()
+    values = SalaryDimensionValue.objects.bulk_create(
+        [
+            SalaryDimensionValue(
+                role=filters["role"], dimension=dimension, value=value, observations=total
+            )
+            for (dimension, value), total in counts.items()
+        ]
+    )
+    return len(values)
+
+
+def filter_facets(role: Optional[str] = None) -> Dict:
+    """Filter values with observation counts, for every role or a single one.
+
+    Keeps the flat ``states``/``levels``/``work_models`` lists next to
+    ``facets``, which holds ``{"value", "observations"}`` entries for every
+    filter dimension.
+    """
+    role = _normalize(_clean(role))
+    values = SalaryDimensionValue.objects.all()
+    if role:
+        values = values.filter(role=role)
+    rows = (
+        values.order_by("dimension", "value")
+        .values("dimension", "value")
+        .annotate(total=Sum("observations"))
+    )
+    facets: Dict[str, List[Dict]] = {dimension: [] for dimension in FILTER_DIMENSIONS}
+    for row in rows:
+        facets[row["dimension"]].append({"value": row["value"], "observations": row["total"]})
+
+    def listed(dimension: str) -> List[str]:
+        return [entry["value"] for entry in facets[dimension]]
 
     return {
-        "filters": {
-            "roles": normalized_roles,
-            "location": _normalize(_clean(location)),
-            "country": _normalize(_clean(country)),
-            "state": _normalize(_clean(state)),
-            "level": _normalize(_clean(level)),
-            "currency": _normalize(_clean(currency)),
-            "work_model": _normalize(_clean(work_model)),
-        },
-        "roles": summaries,
+        "roles": list(SalaryRoleAggregate.objects.order_by("role").values_list("role", flat=True)),
+        "states": listed("state"),
+        "levels": listed("level"),
+        "work_models": listed("work_model"),
+        "role": role,
+        "facets": facets,
     }
 
 
+# Content-Encoding -> compressor for the precompressed payload variants, in
+# server preference order.
+PAYLOAD_ENCODERS: Dict[str, Callable[[bytes], bytes]] = {}
+if brotli is not None:
+    PAYLOAD_ENCODERS["br"] = lambda body: brotli.compress(body, quality=11)
+PAYLOAD_ENCODERS["gzip"] = lambda body: gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def serialize_payload(payload: Dict) -> bytes:
+    """The exact bytes ``JsonResponse`` would send for ``payload``."""
+    return json.dumps(payload, cls=DjangoJSONEncoder).encode("utf-8")
+
+
+def encode_payload(body: bytes) -> Dict[str, bytes]:
+    """Identity bytes plus every compressed variant that is actually smaller."""
+    variants = {SalaryAggregatePayload.IDENTITY: body}
+    for encoding, compress in PAYLOAD_ENCODERS.items():
+        compressed = compress(body)
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def aggregate_payload(
+    role: str,
+    kind: str,
+    encodings: Sequence[str] = (SalaryAggregatePayload.IDENTITY,),
+) -> Optional[Tuple[bytes, str]]:
+    """Pre-serialized ``kind`` payload of a role aggregate, if one was rebuilt.
+
+    ``encodings`` lists the acceptable content encodings by preference; the
+    first stored variant wins and is returned with its encoding.
+    """
+    if not getattr(settings, "SALARY_PRESERIALIZED_PAYLOADS", True):
+        return None
+    role = _normalize(_clean(role))
+    if not role:
+        return None
+    variants = dict(
+        SalaryAggregatePayload.objects.filter(
+            aggregate__role=role, kind=kind, encoding__in=encodings
+        ).values_list("encoding", "body")
+    )
+    for encoding in encodings:
+        if encoding in variants:
+            _record_path("aggregate")
+            return bytes(variants[encoding]), encoding
+    return None
+
+
 def rebuild_role_aggregate(role: str) -> SalaryRoleAggregate:
     summary = summarize_salaries(role, use_cache=False)
     insights = role_insights(role, use_cache=False)
+    rebuild_role_sketches(role)
+    rebuild_role_cube(role)
+    rebuild_role_dimensions(role)
     aggregate, _created = SalaryRoleAggregate.objects.update_or_create(
         role=summary["role"],
         defaults={
@@ -385,17 +1345,47 @@ def rebuild_role_aggregate(role: str) -> SalaryRoleAggregate:
             "insights": insights,
         },
     )
+    payloads = {
+        "summary": summary,
+        "insights": insights,
+        "bundle": {"summary": summary, "insights": insights},
+    }
+    aggregate.payloads.all().delete()
+    SalaryAggregatePayload.objects.bulk_create(
+        SalaryAggregatePayload(aggregate=aggregate, kind=kind, encoding=encoding, body=body)
+        for kind, payload in payloads.items()
+        for encoding, body in encode_payload(serialize_payload(payload)).items()
+    )
     return aggregate
 
 
-def refresh_all_role_aggregates() -> int:
+def role_observation_counts(roles: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """Observation counts keyed by normalized role, for the given normalized roles.
+
+    ``None`` counts every role.
+    """
+    rows = SalaryObservation.objects.alias(role_lower=Lower("role"))
+    if roles is not None:
+        rows = rows.filter(role_lower__in=list(roles))
+    rows = rows.order_by().values(role_key=Lower("role")).annotate(observations=Count("id"))
+    return {row["role_key"]: row["observations"] for row in rows}
+
+
+def observed_roles() -> List[str]:
+    """Every normalized role that has at least one observation."""
     roles = (
         SalaryObservation.objects.order_by()
-        .values_list("role", flat=True)
+        .values_list(Lower("role"), flat=True)
         .distinct()
     )
-    count = 0
-    for role in roles:
-        rebuild_role_aggregate(role)
-        count += 1
-    return count
+    return sorted(roles)
+
+
+def drop_role_aggregates(roles: Iterable[str]) -> None:
+    """Remove every precomputed row of the normalized ``roles``, e.g. once they
+    have no observations left."""
+    roles = sorted(set(roles))
+    SalaryCellSketch.objects.filter(role__in=roles).delete()
+    SalaryCubeCell.objects.filter(role__in=roles).delete()
+    SalaryDimensionValue.objects.filter(role__in=roles).delete()
+    SalaryRoleAggregate.objects.filter(role__in=roles).delete()
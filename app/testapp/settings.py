@@ -62,6 +62,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so Server-Timing covers the whole request.
+    'testapp.middleware.PerformanceMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -176,3 +178,77 @@ AUTOLOAD_SALARY_DATASET_PATH = os.getenv(
     "AUTOLOAD_SALARY_DATASET_PATH",
     str(Path(__file__).resolve().parent.parent / "data" / "tech_salaries_sample.csv"),
 )
+
+# "grouped" answers summaries from a single grouped query; "fanout" keeps the
+# original per-group queries around for comparison benchmarks.
+SALARY_SUMMARY_ENGINE = os.getenv("SALARY_SUMMARY_ENGINE", "grouped")
+
+# Percentile computation for insights: "auto" picks percentile_cont on
+# PostgreSQL and window functions elsewhere; "python" sorts values in-process.
+SALARY_PERCENTILE_BACKEND = os.getenv("SALARY_PERCENTILE_BACKEND", "auto")
+
+# Filtered insights merge per-cell quantile sketches instead of rescanning
+# observations. Higher compression keeps more centroids and tighter error.
+SALARY_PERCENTILE_SKETCHES = env_flag("SALARY_PERCENTILE_SKETCHES", default=True)
+SALARY_SKETCH_COMPRESSION = int(os.getenv("SALARY_SKETCH_COMPRESSION", "100"))
+
+# Serve filtered summaries/insights by rolling up SalaryCubeCell rows built by
+# load_salary_dataset instead of aggregating observations live.
+SALARY_CUBE_ENABLED = env_flag("SALARY_CUBE_ENABLED", default=True)
+
+# Parallel workers used by rebuild_salary_aggregates and load_salary_dataset
+# to rebuild role aggregates (SQLite always rebuilds serially).
+SALARY_REBUILD_WORKERS = int(os.getenv("SALARY_REBUILD_WORKERS", "1"))
+
+# Answer summaries, insights and comparisons from an in-memory columnar copy of
+# the observations (requires numpy). The dataset version is re-checked at most
+# every SALARY_SNAPSHOT_REFRESH_INTERVAL seconds.
+SALARY_SNAPSHOT_ENGINE = env_flag("SALARY_SNAPSHOT_ENGINE", default=False)
+SALARY_SNAPSHOT_REFRESH_INTERVAL = float(os.getenv("SALARY_SNAPSHOT_REFRESH_INTERVAL", "30"))
+
+# In-process LRU of computed summary/insights/comparison payloads, dropped
+# whenever the dataset version changes (0 disables it). Empty results use the
+# smaller negative cache. Other processes notice a new load once the cached
+# dataset version expires after SALARY_DATASET_VERSION_TTL seconds.
+SALARY_RESULT_CACHE_SIZE = int(os.getenv("SALARY_RESULT_CACHE_SIZE", "1024"))
+SALARY_RESULT_CACHE_NEGATIVE_SIZE = int(os.getenv("SALARY_RESULT_CACHE_NEGATIVE_SIZE", "256"))
+SALARY_DATASET_VERSION_TTL = int(os.getenv("SALARY_DATASET_VERSION_TTL", "30"))
+
+# HTTP caching for the salary APIs: Cache-Control for successful responses,
+# the header carrying purge keys for the CDN (empty disables it), and whether
+# non-canonical query strings are redirected so equivalent URLs share a key.
+SALARY_CACHE_CONTROL = os.getenv("SALARY_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300")
+SALARY_SURROGATE_KEY_HEADER = os.getenv("SALARY_SURROGATE_KEY_HEADER", "Surrogate-Key")
+SALARY_CANONICAL_REDIRECTS = env_flag("SALARY_CANONICAL_REDIRECTS", default=False)
+
+# Role-only summary/insights/bundle requests stream the JSON bytes stored at
+# rebuild time instead of decoding and re-encoding the aggregate JSONField.
+SALARY_PRESERIALIZED_PAYLOADS = env_flag("SALARY_PRESERIALIZED_PAYLOADS", default=True)
+
+# compare_roles splits large comparisons into chunks of
+# SALARY_COMPARE_CHUNK_SIZE roles evaluated on SALARY_COMPARE_WORKERS threads
+# (PostgreSQL only; 1 disables it).
+SALARY_COMPARE_CHUNK_SIZE = int(os.getenv("SALARY_COMPARE_CHUNK_SIZE", "4"))
+SALARY_COMPARE_WORKERS = int(os.getenv("SALARY_COMPARE_WORKERS", "4"))
+
+# Route the salary APIs to async views (set by start.sh for ASGI workers) and
+# cap how many of them run at once per event loop.
+SALARY_ASYNC_VIEWS = env_flag("SALARY_ASYNC_VIEWS", default=False)
+SALARY_ASYNC_CONCURRENCY = int(os.getenv("SALARY_ASYNC_CONCURRENCY", "16"))
+
+# Upper bound on the filter sets accepted by POST /api/salaries/batch/.
+SALARY_BATCH_MAX_QUERIES = int(os.getenv("SALARY_BATCH_MAX_QUERIES", "500"))
+
+# Rows fetched per server-side cursor round trip (and per streamed chunk) by
+# /api/observations/export/.
+SALARY_EXPORT_CHUNK_SIZE = int(os.getenv("SALARY_EXPORT_CHUNK_SIZE", "2000"))
+
+# Default and maximum page size of the keyset-paginated /api/observations/.
+SALARY_OBSERVATIONS_PAGE_SIZE = int(os.getenv("SALARY_OBSERVATIONS_PAGE_SIZE", "50"))
+SALARY_OBSERVATIONS_MAX_PAGE_SIZE = int(os.getenv("SALARY_OBSERVATIONS_MAX_PAGE_SIZE", "500"))
+
+# Server-Timing headers and Prometheus histograms at /metrics (per process).
+SALARY_METRICS_ENABLED = env_flag("SALARY_METRICS_ENABLED", default=False)
+
+# Rows per read/insert batch in load_salary_dataset (--batch-size).
+SALARY_LOAD_BATCH_SIZE = int(os.getenv("SALARY_LOAD_BATCH_SIZE", "5000"))
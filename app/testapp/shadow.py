@@ -0,0 +1,201 @@
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+from django.apps import apps
+from django.db import connection, models
+
+from .models import (
+    SalaryAggregatePayload,
+    SalaryCellSketch,
+    SalaryCubeCell,
+    SalaryDimensionValue,
+    SalaryObservation,
+    SalaryRoleAggregate,
+)
+
+# Everything a full reload rewrites, referenced tables first.
+SWAP_MODELS: Tuple[Type[models.Model], ...] = (
+    SalaryObservation,
+    SalaryRoleAggregate,
+    SalaryAggregatePayload,
+    SalaryCellSketch,
+    SalaryCubeCell,
+    SalaryDimensionValue,
+)
+
+
+class ShadowTables:
+    """Copies of the salary tables that a reload fills before swapping them in.
+
+    ``redirected()`` points the models at the shadow tables, so the regular
+    loader and aggregate rebuild write there while the API keeps reading the
+    live tables. ``swap()`` then drops the live tables and renames the shadows
+    into place in one DDL transaction, which is all readers ever wait for.
+
+    The redirection rewrites the shared model classes for the whole process,
+    so shadow tables must only be used from a standalone management command
+    process, never from one that also serves requests.
+
+    The shadows are created without any secondary index, field-level
+    ``db_index`` ones included, so the load does not maintain them row by
+    row; ``build_indexes()`` adds them once the data is in.
+
+    Index and constraint names are global on both backends. On PostgreSQL the
+    shadows are indexed under temporary names before the swap and renamed in
+    it; SQLite cannot rename indexes, so they are built inside the swap (its
+    constraint names are not global and are kept).
+    """
+
+    def __init__(self, token: Optional[str] = None) -> None:
+        if not apps.ready:
+            # AppConfig.ready() (the dataset autoload) runs in every process,
+            # web workers included.
+            raise RuntimeError("Shadow tables cannot be used while the app registry loads.")
+        self.token = token or uuid.uuid4().hex[:8]
+        self.tables: Dict[Type[models.Model], str] = {
+            model: f"{model._meta.db_table}_{self.token}" for model in SWAP_MODELS
+        }
+        self._renames_supported = connection.vendor == "postgresql"
+
+    def _temporary(self, name: str) -> str:
+        return f"{name}_{self.token}" if self._renames_supported else name
+
+    def _renamed(self, items: List, rename: Callable[[str], str]) -> List:
+        renamed = []
+        for item in items:
+            clone = item.clone()
+            clone.name = rename(item.name)
+            renamed.append(clone)
+        return renamed
+
+    @staticmethod
+    def _forget_columns() -> None:
+        # Field.cached_col remembers the table name it was first built with.
+        for model in SWAP_MODELS:
+            for field in model._meta.concrete_fields:
+                field.__dict__.pop("cached_col", None)
+
+    @contextmanager
+    def redirected(
+        self, indexes: Optional[Dict[Type[models.Model], List]] = None
+    ) -> Iterator[None]:
+        """Point every model at its shadow table for the duration of the block.
+
+        Only affects this process; ``indexes`` optionally replaces each
+        model's ``Meta.indexes`` as well.
+        """
+        saved = {
+            model: (model._meta.db_table, model._meta.indexes, model._meta.constraints)
+            for model in SWAP_MODELS
+        }
+        try:
+            for model, table in self.tables.items():
+                model._meta.db_table = table
+                model._meta.constraints = self._renamed(model._meta.constraints, self._temporary)
+                if indexes is not None:
+                    model._meta.indexes = indexes.get(model, [])
+            self._forget_columns()
+            yield
+        finally:
+            for model, (table, model_indexes, constraints) in saved.items():
+                model._meta.db_table = table
+                model._meta.indexes = model_indexes
+                model._meta.constraints = constraints
+            self._forget_columns()
+
+    @staticmethod
+    def _deferred_fields(model: Type[models.Model]) -> List[models.Field]:
+        """Fields with a plain ``db_index`` index; unique ones keep theirs."""
+        return [field for field in model._meta.local_fields if field.db_index and not field.unique]
+
+    @staticmethod
+    def _field_index(model: Type[models.Model], field: models.Field) -> models.Index:
+        """The index ``db_index`` gives ``field``, named after the shadow table.
+
+        Unlike ``create_model`` it skips the ``varchar_pattern_ops`` copy that
+        PostgreSQL adds for text columns; no query filters them with LIKE.
+        """
+        index = models.Index(fields=[field.name])
+        index.set_name_with_model(model)
+        return index
+
+    @contextmanager
+    def _without_field_indexes(self) -> Iterator[None]:
+        deferred = [field for model in SWAP_MODELS for field in self._deferred_fields(model)]
+        try:
+            for field in deferred:
+                field.db_index = False
+            yield
+        finally:
+            for field in deferred:
+                field.db_index = True
+
+    def create(self) -> None:
+        """Create empty shadow tables without their secondary indexes, which
+        would only slow down the load."""
+        self.drop()
+        with self.redirected(indexes={}), self._without_field_indexes():
+            with connection.schema_editor() as editor:
+                for model in SWAP_MODELS:
+                    editor.create_model(model)
+
+    def build_indexes(self) -> None:
+        """Index the loaded shadows.
+
+        Field indexes are named after the shadow table, so they never clash
+        with the live ones. ``Meta.indexes`` get temporary names on
+        PostgreSQL; SQLite builds them in ``swap()``.
+        """
+        temporary = {
+            model: self._renamed(model._meta.indexes, self._temporary) for model in SWAP_MODELS
+        }
+        with self.redirected(indexes=temporary):
+            with connection.schema_editor() as editor:
+                for model in SWAP_MODELS:
+                    for field in self._deferred_fields(model):
+                        editor.add_index(model, self._field_index(model, field))
+                    if self._renames_supported:
+                        for index in model._meta.indexes:
+                            editor.add_index(model, index)
+
+    def swap(self, on_swap: Optional[Callable[[], None]] = None) -> None:
+        """Replace the live tables with the shadows in a single transaction.
+
+        ``on_swap`` runs inside the same transaction, e.g. to bump the
+        dataset version together with the data it describes.
+        """
+        quote = connection.ops.quote_name
+        with connection.schema_editor() as editor:
+            for model in reversed(SWAP_MODELS):
+                editor.delete_model(model)
+            for model in SWAP_MODELS:
+                editor.alter_db_table(model, self.tables[model], model._meta.db_table)
+            for model in SWAP_MODELS:
+                table = quote(model._meta.db_table)
+                for constraint in model._meta.constraints:
+                    if self._renames_supported:
+                        editor.execute(
+                            f"ALTER TABLE {table} RENAME CONSTRAINT "
+                            f"{quote(self._temporary(constraint.name))} TO {quote(constraint.name)}"
+                        )
+                for index in model._meta.indexes:
+                    if self._renames_supported:
+                        editor.execute(
+                            f"ALTER INDEX {quote(self._temporary(index.name))} "
+                            f"RENAME TO {quote(index.name)}"
+                        )
+                    else:
+                        editor.add_index(model, index)
+            if on_swap is not None:
+                on_swap()
+
+    def drop(self) -> None:
+        """Drop whatever shadow tables exist (after a failed load)."""
+        existing = set(connection.introspection.table_names())
+        quote = connection.ops.quote_name
+        cascade = " CASCADE" if connection.vendor == "postgresql" else ""
+        with connection.schema_editor() as editor:
+            for model in reversed(SWAP_MODELS):
+                if self.tables[model] in existing:
+                    editor.execute(f"DROP TABLE {quote(self.tables[model])}{cascade}")
@@ -0,0 +1,130 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_COMPRESSION = 100
+
+
+class QuantileSketch:
+    """Mergeable t-digest style quantile sketch.
+
+    Values are kept as weighted centroids. While the sketch holds at most
+    ``compression`` values every centroid is a single observation and
+    quantiles are exact; beyond that, neighbouring centroids are merged under
+    the t-digest size bound ``4 * n * q * (1 - q) / compression`` so accuracy
+    is best at the tails and the sketch stays around ``compression`` centroids.
+    """
+
+    def __init__(
+        self,
+        compression: int = DEFAULT_COMPRESSION,
+        centroids: Optional[Iterable[Tuple[float, int]]] = None,
+        minimum: Optional[float] = None,
+        maximum: Optional[float] = None,
+    ) -> None:
+        if compression < 1:
+            raise ValueError("compression must be positive")
+        self.compression = compression
+        self.centroids: List[List[float]] = [[float(mean), int(weight)] for mean, weight in centroids or ()]
+        self.count = sum(weight for _mean, weight in self.centroids)
+        self.minimum = minimum
+        self.maximum = maximum
+        self._sorted = False
+
+    def add(self, value: float, weight: int = 1) -> None:
+        value = float(value)
+        self.centroids.append([value, weight])
+        self.count += weight
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self._sorted = False
+        if len(self.centroids) > 4 * self.compression:
+            self.compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if not other.count:
+            return
+        self.centroids.extend([mean, weight] for mean, weight in other.centroids)
+        self.count += other.count
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        self._sorted = False
+        if len(self.centroids) > 4 * self.compression:
+            self.compress()
+
+    def compress(self) -> None:
+        self.centroids.sort(key=lambda centroid: centroid[0])
+        self._sorted = True
+        if self.count <= self.compression:
+            return
+
+        merged: List[List[float]] = []
+        cumulative = 0
+        current = list(self.centroids[0])
+        for mean, weight in self.centroids[1:]:
+            proposed = current[1] + weight
+            q = (cumulative + proposed / 2) / self.count
+            limit = 4 * self.count * q * (1 - q) / self.compression
+            if proposed <= max(limit, 1):
+                current[0] += (mean - current[0]) * weight / proposed
+                current[1] = proposed
+            else:
+                merged.append(current)
+                cumulative += current[1]
+                current = [mean, weight]
+        merged.append(current)
+        self.centroids = merged
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Estimate a quantile with the same closest-rank interpolation as ``percentile``."""
+        if not self.count:
+            return None
+        if not self._sorted:
+            self.compress()
+        fraction = min(max(float(fraction), 0.0), 1.0)
+        target = (self.count - 1) * fraction
+
+        # Anchor each centroid at the mean rank of the values it represents and
+        # interpolate linearly between anchors, bracketed by the exact extremes.
+        points: List[Tuple[float, float]] = [(0.0, self.minimum)]
+        cumulative = 0
+        for mean, weight in self.centroids:
+            points.append((cumulative + (weight - 1) / 2, mean))
+            cumulative += weight
+        points.append((self.count - 1.0, self.maximum))
+
+        for (left_rank, left_value), (right_rank, right_value) in zip(points, points[1:]):
+            if target <= right_rank:
+                if right_rank == left_rank:
+                    return right_value
+                share = (target - left_rank) / (right_rank - left_rank)
+                return left_value + (right_value - left_value) * share
+        return self.maximum
+
+    def to_dict(self) -> Dict:
+        if not self._sorted:
+            self.compress()
+        return {
+            "compression": self.compression,
+            "min": self.minimum,
+            "max": self.maximum,
+            "centroids": self.centroids,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict) -> "QuantileSketch":
+        sketch = cls(
+            compression=payload["compression"],
+            centroids=payload["centroids"],
+            minimum=payload["min"],
+            maximum=payload["max"],
+        )
+        sketch._sorted = True
+        return sketch
+
+    @classmethod
+    def merge_all(
+        cls, sketches: Iterable["QuantileSketch"], compression: int = DEFAULT_COMPRESSION
+    ) -> "QuantileSketch":
+        merged = cls(compression=compression)
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
@@ -0,0 +1,225 @@
+import threading
+import time
+from array import array
+from collections.abc import Sequence as SequenceABC
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+
+from django.conf import settings
+
+from .models import SalaryDataset, SalaryObservation
+from .percentiles import Percentiles, percentile
+
+try:  # NumPy is only needed when the snapshot engine is enabled.
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy installed
+    np = None
+
+DIMENSIONS = ("role", "source", "level", "location", "state", "country", "currency", "work_model")
+MEASURES = ("base_salary_min", "base_salary_max", "total_compensation")
+CENTS = Decimal(100)
+
+
+def _cents(value: Decimal) -> int:
+    return int(value * CENTS)
+
+
+def _decimal(cents) -> Decimal:
+    return Decimal(int(cents)) / CENTS
+
+
+def _code_dtype(size: int):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if size <= np.iinfo(dtype).max + 1:
+            return dtype
+    return np.int64
+
+
+class ColumnarSnapshot:
+    """Immutable in-memory copy of ``SalaryObservation`` stored column by column.
+
+    Dimension columns are dictionary encoded into the smallest unsigned integer
+    type that fits, and salaries are stored as int64 cents so sums, minimums and
+    percentiles stay exact. Grouping uses a lexicographic sort plus
+    ``reduceat`` instead of SQL.
+    """
+
+    def __init__(self, version: int, chunk_size: int = 10_000) -> None:
+        self.version = version
+        self.dictionaries: Dict[str, List[str]] = {}
+        self.codes: Dict[str, "np.ndarray"] = {}
+        self.measures: Dict[str, "np.ndarray"] = {}
+        self._lower_codes: Dict[str, Dict[str, "np.ndarray"]] = {}
+
+        lookups: Dict[str, Dict[str, int]] = {dimension: {} for dimension in DIMENSIONS}
+        code_buffers = {dimension: array("l") for dimension in DIMENSIONS}
+        measure_buffers = {measure: array("q") for measure in MEASURES}
+        rows = (
+            SalaryObservation.objects.order_by()
+            .values_list(*DIMENSIONS, *MEASURES)
+            .iterator(chunk_size=chunk_size)
+        )
+        for row in rows:
+            for dimension, value in zip(DIMENSIONS, row):
+                lookup = lookups[dimension]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(lookup)
+                code_buffers[dimension].append(code)
+            for measure, value in zip(MEASURES, row[len(DIMENSIONS):]):
+                measure_buffers[measure].append(_cents(value))
+
+        for dimension in DIMENSIONS:
+            values = list(lookups[dimension])
+            self.dictionaries[dimension] = values
+            self.codes[dimension] = np.frombuffer(code_buffers[dimension], dtype=np.int_).astype(
+                _code_dtype(len(values))
+            )
+            by_lower: Dict[str, List[int]] = {}
+            for code, value in enumerate(values):
+                by_lower.setdefault(value.lower(), []).append(code)
+            self._lower_codes[dimension] = {
+                key: np.array(codes, dtype=self.codes[dimension].dtype)
+                for key, codes in by_lower.items()
+            }
+        for measure in MEASURES:
+            self.measures[measure] = np.frombuffer(measure_buffers[measure], dtype=np.int64).copy()
+
+    @property
+    def rows(self) -> int:
+        return len(self.measures["total_compensation"])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays (dictionaries excluded)."""
+        return sum(column.nbytes for column in self.codes.values()) + sum(
+            column.nbytes for column in self.measures.values()
+        )
+
+    def mask(self, filters: Dict[str, Optional[str]]) -> "np.ndarray":
+        """Boolean row mask for normalized (lowercase) filter values."""
+        mask = np.ones(self.rows, dtype=bool)
+        for dimension, value in filters.items():
+            if not value:
+                continue
+            codes = self._lower_codes[dimension].get(value)
+            if codes is None:
+                return np.zeros(self.rows, dtype=bool)
+            mask &= np.isin(self.codes[dimension], codes)
+        return mask
+
+    def cells(self, mask: "np.ndarray", dimensions: Sequence[str]) -> List[Dict]:
+        """Group the masked rows by ``dimensions`` into count/sum/min/max cells."""
+        selected = np.flatnonzero(mask)
+        if not selected.size:
+            return []
+        keys = [self.codes[dimension][selected] for dimension in dimensions]
+        order = np.lexsort(keys[::-1]) if keys else np.arange(selected.size)
+        rows = selected[order]
+        boundaries = np.zeros(rows.size, dtype=bool)
+        boundaries[0] = True
+        for key in keys:
+            ordered = key[order]
+            boundaries[1:] |= ordered[1:] != ordered[:-1]
+        starts = np.flatnonzero(boundaries)
+        counts = np.diff(np.append(starts, rows.size))
+
+        base_min = self.measures["base_salary_min"][rows]
+        base_max = self.measures["base_salary_max"][rows]
+        total = self.measures["total_compensation"][rows]
+        stats = {
+            "sum_base_min": np.add.reduceat(base_min, starts),
+            "sum_base_max": np.add.reduceat(base_max, starts),
+            "sum_total": np.add.reduceat(total, starts),
+            "min_base": np.minimum.reduceat(base_min, starts),
+            "max_base": np.maximum.reduceat(base_max, starts),
+            "min_total": np.minimum.reduceat(total, starts),
+            "max_total": np.maximum.reduceat(total, starts),
+        }
+        first_rows = rows[starts]
+        cells: List[Dict] = []
+        for index, first in enumerate(first_rows):
+            cell = {
+                dimension: self.dictionaries[dimension][self.codes[dimension][first]]
+                for dimension in dimensions
+            }
+            cell["observations"] = int(counts[index])
+            for name, values in stats.items():
+                cell[name] = _decimal(values[index])
+            cells.append(cell)
+        return cells
+
+    def percentiles(self, mask: "np.ndarray", fractions: Sequence[Decimal]) -> Percentiles:
+        values = np.sort(self.measures["total_compensation"][mask])
+        if not values.size:
+            return {fraction: None for fraction in fractions}
+        # Only the neighbouring ranks are converted to Decimal; ``percentile``
+        # indexes the sequence lazily.
+        return {fraction: percentile(_CentsView(values), fraction) for fraction in fractions}
+
+
+class _CentsView(SequenceABC):
+    """Read-only Decimal view over a sorted cents array."""
+
+    def __init__(self, values: "np.ndarray") -> None:
+        self._values = values
+
+    def __len__(self) -> int:
+        return int(self._values.size)
+
+    def __getitem__(self, index):
+        return _decimal(self._values[index])
+
+
+_lock = threading.Lock()
+# Held by the one thread that checks the version and rebuilds the snapshot.
+_refresh_lock = threading.Lock()
+_snapshot: Optional[ColumnarSnapshot] = None
+_checked_at = 0.0
+
+
+def snapshot_available() -> bool:
+    return np is not None and getattr(settings, "SALARY_SNAPSHOT_ENGINE", False)
+
+
+def get_snapshot() -> Optional[ColumnarSnapshot]:
+    """Return the current snapshot, reloading it when the dataset version moves.
+
+    The version is checked at most every ``SALARY_SNAPSHOT_REFRESH_INTERVAL``
+    seconds so steady-state requests run without any SQL, and the full table
+    read of a reload never blocks requests that already have a snapshot.
+    """
+    global _snapshot, _checked_at
+    if not snapshot_available():
+        return None
+
+    interval = getattr(settings, "SALARY_SNAPSHOT_REFRESH_INTERVAL", 30)
+    current = _snapshot
+    if current is not None and time.monotonic() - _checked_at < interval:
+        return current
+
+    # One thread checks the version and rebuilds; the others keep answering
+    # from the current snapshot meanwhile. Only the first load, with nothing
+    # to serve yet, waits for it.
+    if not _refresh_lock.acquire(blocking=current is None):
+        return current
+    try:
+        current = _snapshot
+        if current is not None and time.monotonic() - _checked_at < interval:
+            return current
+        version = SalaryDataset.current_version()
+        if current is None or current.version != version:
+            current = ColumnarSnapshot(version)
+        with _lock:
+            _snapshot = current
+            _checked_at = time.monotonic()
+        return current
+    finally:
+        _refresh_lock.release()
+
+
+def reset_snapshot() -> None:
+    global _snapshot, _checked_at
+    with _lock:
+        _snapshot = None
+        _checked_at = 0.0
@@ -1,16 +1,82 @@
+import asyncio
+import bisect
 import csv
+import gzip
 import json
+import random
 import tempfile
+import threading
+import tracemalloc
+import warnings
+from decimal import Decimal
+from io import StringIO
 from pathlib import Path
+from types import SimpleNamespace
+from unittest import skipUnless
 from unittest.mock import patch
 
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
 from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
 from django.core.management import call_command
+from django.core.exceptions import MiddlewareNotUsed
 from django.core.management.base import CommandError
-from django.test import Client, SimpleTestCase, TestCase
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.http import JsonResponse, StreamingHttpResponse
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 
-from .models import SalaryObservation, SalaryRoleAggregate
-from .salary_data import summarize_salaries, role_insights
+from . import async_views, views
+from .bulk_load import COPY_COLUMNS, CopyStream
+from .exports import EXPORT_FIELDS
+from .fingerprints import NATURAL_KEY, fingerprint, observation_fingerprint
+from .http_cache import accepted_encodings, canonical_query
+from .management.commands.load_salary_dataset import Command as LoadSalaryDatasetCommand
+from .metrics import HISTOGRAMS, Histogram
+from .middleware import PerformanceMetricsMiddleware
+from .models import (
+    SalaryAggregatePayload,
+    SalaryCellSketch,
+    SalaryCubeCell,
+    SalaryDataset,
+    SalaryDimensionValue,
+    SalaryObservation,
+    SalaryRoleAggregate,
+)
+from .pagination import encode_cursor, seek_queryset
+from .percentiles import (
+    DEFAULT_PERCENTILES,
+    PercentileBackend,
+    PythonPercentileBackend,
+    WindowPercentileBackend,
+    parse_percentiles,
+    percentile,
+)
+from .result_cache import RESULT_CACHE, dataset_token, publish_dataset_token
+from .salary_data import (
+    PAYLOAD_ENCODERS,
+    _filtered_queryset,
+    compare_roles,
+    role_insights,
+    salary_bundle,
+    summarize_batch,
+    summarize_salaries,
+    track_served_paths,
+)
+from .rebuild import rebuild_role_aggregates
+from .shadow import SWAP_MODELS, ShadowTables
+from .sketches import QuantileSketch
+from .snapshot import get_snapshot, np, reset_snapshot
 
 
 class BaseClientTest(TestCase):
@@ -131,7 +197,7 @@ class SalaryComparisonTests(BaseClientTest):
 class FiltersEndpointTests(BaseClientTest):
     def setUp(self):
         super().setUp()
-        cache.delete("testapp.available_filters")
+        cache.clear()
 
     def test_returns_available_filters(self):
         response = self.client.get("/api/filters/")
@@ -143,6 +209,48 @@ class FiltersEndpointTests(BaseClientTest):
         self.assertIn("remoto", data["work_models"])
         self.assertIn("senior", data["levels"])
 
+    def test_role_facets_carry_observation_counts(self):
+        response = self.client.get("/api/filters/", {"role": " Software_Engineer "})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["role"], "software_engineer")
+        self.assertIn("data_scientist", data["roles"])
+        states = {entry["value"]: entry["observations"] for entry in data["facets"]["state"]}
+        self.assertEqual(states["SP"], 2)
+        self.assertEqual(sum(states.values()), 4)
+        self.assertEqual(data["states"], sorted(states))
+        self.assertEqual(
+            set(data["facets"]),
+            {"location", "country", "state", "level", "currency", "work_model"},
+        )
+
+    def test_unknown_role_has_empty_facets(self):
+        data = self.client.get("/api/filters/", {"role": "unknown_role"}).json()
+        self.assertEqual(data["states"], [])
+        self.assertTrue(data["roles"])
+
+    def test_arbitrary_roles_make_valid_cache_keys(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            role = "Software Engineer\n" * 40
+            first = self.client.get("/api/filters/", {"role": f"  {role}"})
+            second = self.client.get("/api/filters/", {"role": role.lower()})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json(), second.json())
+
+    def test_facets_do_not_scan_observations(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get("/api/filters/")
+            self.client.get("/api/filters/", {"role": "software_engineer"})
+        self.assertTrue(captured)
+        for query in captured:
+            self.assertNotIn("testapp_salaryobservation", query["sql"])
+
+    def test_totals_match_observations(self):
+        data = self.client.get("/api/filters/").json()
+        levels = {entry["value"]: entry["observations"] for entry in data["facets"]["level"]}
+        self.assertEqual(levels["senior"], SalaryObservation.objects.filter(level="senior").count())
+
 
 class BuildSalaryDatasetCommandTests(SimpleTestCase):
     def setUp(self):
@@ -341,6 +449,624 @@ class LoadSalaryDatasetCommandTests(TestCase):
         aggregates = SalaryRoleAggregate.objects.filter(role="software_engineer")
         self.assertTrue(aggregates.exists())
 
+    def test_reports_loader_throughput(self):
+        stdout = StringIO()
+        call_command("load_salary_dataset", input=str(self.dataset_path), stdout=stdout)
+        loader = "copy" if connection.vendor == "postgresql" else "orm"
+        self.assertRegex(stdout.getvalue(), rf"Wrote 1 row\(s\) via {loader}.* rows/s\)")
+
+    @skipUnless(connection.vendor != "postgresql", "COPY is available on PostgreSQL")
+    def test_copy_loader_requires_postgresql(self):
+        with self.assertRaisesMessage(CommandError, "--loader copy requires PostgreSQL."):
+            call_command("load_salary_dataset", input=str(self.dataset_path), loader="copy")
+
+    @skipUnless(connection.vendor == "postgresql", "COPY is PostgreSQL specific")
+    def test_copy_loader_matches_orm_loader(self):
+        call_command("load_salary_dataset", loader="orm", stdout=StringIO())
+        expected = sorted(SalaryObservation.objects.values_list(*COPY_COLUMNS))
+        call_command("load_salary_dataset", loader="copy", stdout=StringIO())
+        self.assertEqual(sorted(SalaryObservation.objects.values_list(*COPY_COLUMNS)), expected)
+
+    @skipUnless(connection.vendor == "postgresql", "COPY is PostgreSQL specific")
+    def test_copy_loader_skips_existing_rows(self):
+        dated = Path(self.tmpdir.name) / "dated.csv"
+        with self.dataset_path.open(newline="", encoding="utf-8") as source:
+            rows = list(csv.DictReader(source))
+        with dated.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=[*rows[0], "observed_at"])
+            writer.writeheader()
+            writer.writerows({**row, "observed_at": "2025-01-01"} for row in rows)
+        call_command("load_salary_dataset", input=str(dated), loader="copy", stdout=StringIO())
+        stdout = StringIO()
+        call_command(
+            "load_salary_dataset", input=str(dated), loader="copy", append=True, stdout=stdout
+        )
+        self.assertIn(", 0 new", stdout.getvalue())
+        self.assertEqual(SalaryObservation.objects.count(), len(rows))
+
+    def _write_rows(self, name, count, bad_row=None):
+        path = Path(self.tmpdir.name) / name
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(COPY_COLUMNS[:-1])
+            for index in range(1, count + 1):
+                base = "n/a" if index == bad_row else str(50000 + index)
+                writer.writerow(
+                    [
+                        "synthetic",
+                        ("software_engineer", "data_scientist", "qa_engineer")[index % 3],
+                        "senior",
+                        "Campinas",
+                        "SP",
+                        "Brazil",
+                        "BRL",
+                        "remoto",
+                        base,
+                        "190000",
+                        "205000",
+                    ]
+                )
+        return path
+
+    def _insert_peak(self, path):
+        command = LoadSalaryDatasetCommand(stdout=StringIO())
+        command.batch_size = 250
+        command.verbosity = 1
+        tracemalloc.start()
+        try:
+            with transaction.atomic():
+                read = command._insert(command._read_rows(path), "orm")
+                transaction.set_rollback(True)
+            return read, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_streaming_load_memory_does_not_grow_with_input(self):
+        small_rows, small_peak = self._insert_peak(self._write_rows("small.csv", 1000))
+        large_rows, large_peak = self._insert_peak(self._write_rows("large.csv", 10000))
+        self.assertEqual((small_rows, large_rows), (1000, 10000))
+        # Ten times the rows; materializing them would grow the peak ~10x.
+        self.assertLess(large_peak, small_peak * 1.5)
+
+    def _sync_peak(self, path):
+        command = LoadSalaryDatasetCommand(stdout=StringIO())
+        command.batch_size = 100
+        command.verbosity = 1
+        with transaction.atomic():
+            SalaryObservation.objects.all().delete()
+            command._insert(command._read_rows(path), "orm")
+            tracemalloc.start()
+            try:
+                _affected, _skipped, counts = command._sync(command._read_rows(path), "orm")
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            transaction.set_rollback(True)
+        return counts, peak
+
+    def test_sync_memory_does_not_grow_with_table_or_input(self):
+        small_counts, small_peak = self._sync_peak(self._write_rows("small.csv", 500))
+        large_counts, large_peak = self._sync_peak(self._write_rows("large.csv", 5000))
+        self.assertEqual(small_counts[1:], (0, 500))
+        self.assertEqual(large_counts[1:], (0, 5000))
+        # The diff runs in the database; fingerprint sets would grow ~10x.
+        self.assertLess(large_peak, small_peak * 1.5)
+
+    def test_streaming_load_reports_progress_and_row_errors(self):
+        stdout = StringIO()
+        call_command(
+            "load_salary_dataset",
+            input=str(self._write_rows("progress.csv", 25)),
+            batch_size=10,
+            verbosity=2,
+            stdout=stdout,
+        )
+        self.assertIn("  20 row(s) read", stdout.getvalue())
+        self.assertEqual(SalaryObservation.objects.count(), 25)
+
+        with self.assertRaisesMessage(CommandError, "Row 23: Unable to parse decimal value 'n/a'"):
+            call_command(
+                "load_salary_dataset",
+                input=str(self._write_rows("bad.csv", 30, bad_row=23)),
+                batch_size=10,
+                stdout=StringIO(),
+            )
+        # The earlier batches were rolled back with the rest of the load.
+        self.assertEqual(SalaryObservation.objects.count(), 25)
+        with self.assertRaisesMessage(CommandError, "--batch-size must be at least 1."):
+            call_command("load_salary_dataset", input=str(self.dataset_path), batch_size=0)
+
+    def test_copy_stream_encodes_rows_as_csv(self):
+        rows = [
+            SalaryObservation(
+                source="levels_fyi",
+                role="software_engineer",
+                level="senior",
+                location='São Paulo, "SP"',
+                state="",
+                country="Brazil",
+                currency="BRL",
+                work_model="remoto",
+                base_salary_min=Decimal("150000.50"),
+                base_salary_max=Decimal("190000"),
+                total_compensation=Decimal("205000"),
+                observed_at=None,
+            )
+        ] * 3
+        stream = CopyStream(iter(rows))
+        chunks = []
+        while True:
+            chunk = stream.read(16)
+            if not chunk:
+                break
+            self.assertLessEqual(len(chunk), 16)
+            chunks.append(chunk)
+        self.assertEqual(stream.rows, 3)
+        lines = list(csv.reader(StringIO("".join(chunks))))
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(
+            lines[0],
+            [
+                "levels_fyi",
+                "software_engineer",
+                "senior",
+                'São Paulo, "SP"',
+                "",
+                "Brazil",
+                "BRL",
+                "remoto",
+                "150000.50",
+                "190000",
+                "205000",
+                "",
+                "\\x" + observation_fingerprint(rows[0]).hex(),
+            ],
+        )
+
+
+class IncrementalAppendTests(TestCase):
+    FIELDNAMES = [
+        "source",
+        "role",
+        "level",
+        "location",
+        "state",
+        "country",
+        "currency",
+        "work_model",
+        "base_salary_min",
+        "base_salary_max",
+        "total_compensation",
+        "observed_at",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engineer = self._row("software_engineer", "150000")
+        self.scientist = self._row("data_scientist", "160000")
+        call_command(
+            "load_salary_dataset",
+            input=str(self._write("initial.csv", [self.engineer, self.scientist])),
+            stdout=StringIO(),
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def _row(self, role, base_min):
+        return {
+            "source": "levels_fyi",
+            "role": role,
+            "level": "senior",
+            "location": "São Paulo",
+            "state": "SP",
+            "country": "Brazil",
+            "currency": "BRL",
+            "work_model": "remoto",
+            "base_salary_min": base_min,
+            "base_salary_max": "190000",
+            "total_compensation": "205000",
+            "observed_at": "2025-01-01",
+        }
+
+    def _write(self, name, rows):
+        path = Path(self.tmpdir.name) / name
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=self.FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def test_parallel_load_bumps_the_version_after_rebuilding(self):
+        version = SalaryDataset.current_version()
+        seen = []
+
+        def rebuild(roles, **kwargs):
+            seen.append(SalaryDataset.current_version())
+            return rebuild_role_aggregates(roles, **kwargs)
+
+        appended = self._write("append.csv", [self._row("data_scientist", "170000")])
+        with patch(
+            "testapp.management.commands.load_salary_dataset.rebuild_role_aggregates", rebuild
+        ):
+            call_command(
+                "load_salary_dataset",
+                input=str(appended),
+                append=True,
+                workers=2,
+                stdout=StringIO(),
+            )
+        self.assertEqual(seen, [version])
+        self.assertEqual(SalaryDataset.current_version(), version + 1)
+        self.assertEqual(dataset_token()[0], version + 1)
+
+    def test_append_only_rebuilds_affected_roles(self):
+        untouched = SalaryRoleAggregate.objects.get(role="software_engineer").generated_at
+        appended = self._write(
+            "append.csv", [self.engineer, self._row("data_scientist", "170000")]
+        )
+        stdout = StringIO()
+        call_command("load_salary_dataset", input=str(appended), append=True, stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertIn("Refreshed aggregates for 1 role(s).", output)
+        self.assertIn("Skipped 1 role(s)", output)
+        self.assertEqual(
+            SalaryRoleAggregate.objects.get(role="software_engineer").generated_at, untouched
+        )
+        scientist = SalaryRoleAggregate.objects.get(role="data_scientist")
+        self.assertEqual(scientist.summary["total_observations"], 2)
+        self.assertEqual(
+            sum(SalaryCubeCell.objects.filter(role="data_scientist").values_list("observations", flat=True)),
+            2,
+        )
+
+
+    def test_sync_inserts_new_rows_and_deletes_vanished_ones(self):
+        engineer_id = SalaryObservation.objects.get(role="software_engineer").pk
+        untouched = SalaryRoleAggregate.objects.get(role="software_engineer").generated_at
+        version = SalaryDataset.current_version()
+        engineer = {**self.engineer, "base_salary_min": "150000.00"}
+        synced = self._write(
+            "sync.csv",
+            [engineer, engineer, self._row("data_scientist", "170000")],
+        )
+        stdout = StringIO()
+        call_command(
+            "load_salary_dataset", input=str(synced), mode="sync", batch_size=1, stdout=stdout
+        )
+
+        output = stdout.getvalue()
+        self.assertIn("Synced salary observations: 1 inserted, 1 deleted, 1 unchanged.", output)
+        self.assertIn("Refreshed aggregates for 1 role(s).", output)
+        self.assertIn("Skipped 1 role(s) not affected by the sync.", output)
+        # The unchanged row is neither rewritten nor re-aggregated.
+        self.assertEqual(SalaryObservation.objects.get(role="software_engineer").pk, engineer_id)
+        self.assertEqual(
+            SalaryRoleAggregate.objects.get(role="software_engineer").generated_at, untouched
+        )
+        scientist = SalaryObservation.objects.get(role="data_scientist")
+        self.assertEqual(scientist.base_salary_min, Decimal("170000"))
+        self.assertEqual(SalaryDataset.current_version(), version + 1)
+
+    def test_sync_drops_aggregates_of_roles_without_rows(self):
+        stdout = StringIO()
+        call_command(
+            "load_salary_dataset",
+            input=str(self._write("sync.csv", [self.engineer])),
+            mode="sync",
+            stdout=stdout,
+        )
+
+        self.assertIn("0 inserted, 1 deleted, 1 unchanged.", stdout.getvalue())
+        self.assertFalse(SalaryRoleAggregate.objects.filter(role="data_scientist").exists())
+        self.assertFalse(SalaryCubeCell.objects.filter(role="data_scientist").exists())
+        self.assertFalse(SalaryDimensionValue.objects.filter(role="data_scientist").exists())
+
+    def test_sync_of_an_identical_file_changes_nothing(self):
+        version = SalaryDataset.current_version()
+        stdout = StringIO()
+        call_command(
+            "load_salary_dataset",
+            input=str(self._write("same.csv", [self.scientist, self.engineer])),
+            mode="sync",
+            stdout=stdout,
+        )
+
+        self.assertIn("0 inserted, 0 deleted, 2 unchanged.", stdout.getvalue())
+        self.assertIn("Refreshed aggregates for 0 role(s).", stdout.getvalue())
+        self.assertEqual(SalaryDataset.current_version(), version)
+
+    def test_fingerprint_is_computed_on_every_save(self):
+        observation = SalaryObservation.objects.get(role="software_engineer")
+        stored = SalaryObservation.objects.values_list("fingerprint", flat=True).get(
+            pk=observation.pk
+        )
+        values = SalaryObservation.objects.values_list(*NATURAL_KEY).get(pk=observation.pk)
+        self.assertEqual(bytes(stored), fingerprint(values))
+        self.assertEqual(len(bytes(stored)), 16)
+
+        observation.base_salary_min = "155000.00"
+        observation.save()
+        observation.refresh_from_db()
+        changed = [*values[:8], Decimal("155000"), *values[9:]]
+        self.assertEqual(bytes(observation.fingerprint), fingerprint(changed))
+
+    def test_fingerprint_index_rejects_repeats_without_observed_at(self):
+        row = {**self.engineer, "observed_at": None, "base_salary_min": Decimal("1")}
+        SalaryObservation.objects.create(**row)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SalaryObservation.objects.create(**row)
+
+    def test_fingerprints_ignore_decimal_scale(self):
+        self.assertEqual(
+            fingerprint(["a", Decimal("150000"), None]),
+            fingerprint(["a", Decimal("150000.00"), None]),
+        )
+        self.assertNotEqual(fingerprint(["a", None]), fingerprint(["a", ""]))
+
+
+@override_settings(AUTOLOAD_SALARY_DATASET=False)
+class FingerprintMigrationTests(TransactionTestCase):
+    migrate_from = [("testapp", "0009_observation_seek_index")]
+    migrate_to = [("testapp", "0010_observation_fingerprint")]
+
+    def setUp(self):
+        super().setUp()
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.addCleanup(call_command, "migrate", "testapp", verbosity=0)
+        self.old_apps = executor.loader.project_state(self.migrate_from).apps
+        for name in ("SalaryObservation", "SalaryRoleAggregate", "SalaryDataset"):
+            self.old_apps.get_model("testapp", name).objects.all().delete()
+
+    def _migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+
+    def test_backfills_fingerprints_and_drops_repeated_rows(self):
+        Observation = self.old_apps.get_model("testapp", "SalaryObservation")
+        Aggregate = self.old_apps.get_model("testapp", "SalaryRoleAggregate")
+        row = {
+            "source": "levels_fyi",
+            "role": "Data_Scientist",
+            "level": "senior",
+            "location": "Campinas",
+            "state": "SP",
+            "country": "Brazil",
+            "currency": "BRL",
+            "work_model": "remoto",
+            "base_salary_min": Decimal("150000"),
+            "base_salary_max": Decimal("190000"),
+            "total_compensation": Decimal("205000"),
+        }
+        first = Observation.objects.create(**row)
+        # Undated rows never conflicted under the old twelve-column constraint.
+        Observation.objects.create(**row)
+        other = Observation.objects.create(**{**row, "role": "software_engineer"})
+        for role in ("data_scientist", "software_engineer"):
+            Aggregate.objects.create(role=role, summary={}, insights={})
+
+        self._migrate()
+
+        rows = SalaryObservation.objects.order_by("id").values_list("id", "fingerprint")
+        self.assertEqual([pk for pk, _key in rows], [first.pk, other.pk])
+        for pk, key in rows:
+            values = SalaryObservation.objects.values_list(*NATURAL_KEY).get(pk=pk)
+            self.assertEqual(bytes(key), fingerprint(values))
+        self.assertEqual(
+            list(SalaryRoleAggregate.objects.values_list("role", flat=True)),
+            ["software_engineer"],
+        )
+        self.assertEqual(SalaryDataset.current_version(), 1)
+
+    def test_leaves_aggregates_alone_without_repeats(self):
+        Observation = self.old_apps.get_model("testapp", "SalaryObservation")
+        Observation.objects.create(
+            source="levels_fyi",
+            role="software_engineer",
+            level="senior",
+            location="Campinas",
+            state="SP",
+            country="Brazil",
+            currency="BRL",
+            work_model="remoto",
+            base_salary_min=Decimal("150000"),
+            base_salary_max=Decimal("190000"),
+            total_compensation=Decimal("205000"),
+        )
+
+        self._migrate()
+
+        self.assertEqual(len(bytes(SalaryObservation.objects.get().fingerprint)), 16)
+        self.assertEqual(SalaryDataset.current_version(), 0)
+
+
+class ShadowSwapLoadTests(TransactionTestCase):
+    """Swap mode needs real commits: schema changes cannot run inside TestCase."""
+
+    def setUp(self):
+        super().setUp()
+        call_command("load_salary_dataset", stdout=StringIO())
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _write(self, rows):
+        path = Path(self.tmpdir.name) / "reload.csv"
+        with path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=[*COPY_COLUMNS[:-1]])
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def _row(self, role, base_min="150000"):
+        return {
+            "source": "levels_fyi",
+            "role": role,
+            "level": "senior",
+            "location": "Campinas",
+            "state": "SP",
+            "country": "Brazil",
+            "currency": "BRL",
+            "work_model": "remoto",
+            "base_salary_min": base_min,
+            "base_salary_max": "190000",
+            "total_compensation": "205000",
+        }
+
+    def _count(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+            return cursor.fetchone()[0]
+
+    def test_readers_keep_the_old_dataset_until_the_swap(self):
+        before = SalaryObservation.objects.count()
+        version = SalaryDataset.current_version()
+        live = (SalaryObservation._meta.db_table, SalaryRoleAggregate._meta.db_table)
+        seen = []
+
+        def rebuild(roles, **kwargs):
+            # Mid-load: the live tables still hold the previous dataset.
+            seen.append(tuple(self._count(table) for table in live))
+            return rebuild_role_aggregates(roles, **kwargs)
+
+        path = self._write([self._row("platform_engineer"), self._row("platform_engineer", "1")])
+        with patch(
+            "testapp.management.commands.load_salary_dataset.rebuild_role_aggregates", rebuild
+        ):
+            call_command("load_salary_dataset", input=str(path), mode="swap", stdout=StringIO())
+
+        self.assertEqual(seen, [(before, 7)])
+        self.assertEqual(SalaryObservation.objects.count(), 2)
+        self.assertEqual(
+            list(SalaryRoleAggregate.objects.values_list("role", flat=True)), ["platform_engineer"]
+        )
+        self.assertEqual(SalaryDataset.current_version(), version + 1)
+        summary = summarize_salaries("platform_engineer", state="sp", use_cache=False)
+        self.assertEqual(summary["total_observations"], 2)
+
+    def test_swapped_tables_keep_indexes_and_constraints(self):
+        path = self._write([self._row("platform_engineer")])
+        call_command("load_salary_dataset", input=str(path), mode="swap", stdout=StringIO())
+        call_command("load_salary_dataset", input=str(path), mode="swap", stdout=StringIO())
+
+        tables = set(connection.introspection.table_names())
+        for model in SWAP_MODELS:
+            with self.subTest(model=model.__name__):
+                self.assertIn(model._meta.db_table, tables)
+                self.assertFalse(
+                    [table for table in tables if table.startswith(f"{model._meta.db_table}_")]
+                )
+                with connection.cursor() as cursor:
+                    names = set(
+                        connection.introspection.get_constraints(cursor, model._meta.db_table)
+                    )
+                for item in [*model._meta.indexes, *model._meta.constraints]:
+                    self.assertIn(item.name, names)
+        self.assertEqual(SalaryAggregatePayload.objects.count(), 3 * len(PAYLOAD_ENCODERS) + 3)
+
+    def test_shadows_are_loaded_without_secondary_indexes(self):
+        indexes_during_load = []
+        insert = LoadSalaryDatasetCommand._insert
+
+        def spy(command, rows, loader):
+            with connection.cursor() as cursor:
+                constraints = connection.introspection.get_constraints(
+                    cursor, SalaryObservation._meta.db_table
+                )
+            indexes_during_load.extend(
+                name
+                for name, details in constraints.items()
+                if details["index"] and not details["unique"] and not details["primary_key"]
+            )
+            return insert(command, rows, loader)
+
+        path = self._write([self._row("platform_engineer")])
+        with patch.object(LoadSalaryDatasetCommand, "_insert", spy):
+            call_command("load_salary_dataset", input=str(path), mode="swap", stdout=StringIO())
+
+        self.assertEqual(indexes_during_load, [])
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, SalaryObservation._meta.db_table
+            )
+        indexed = {tuple(details["columns"]) for details in constraints.values()}
+        for field in SalaryObservation._meta.local_fields:
+            if field.db_index and not field.unique:
+                self.assertIn((field.column,), indexed)
+
+    def test_shadow_tables_refuse_to_run_while_apps_load(self):
+        with patch.object(django_apps, "ready", False):
+            with self.assertRaises(RuntimeError):
+                ShadowTables()
+            with self.assertRaisesMessage(CommandError, "only runs as a standalone command"):
+                call_command("load_salary_dataset", mode="swap", stdout=StringIO())
+
+    def test_failed_load_leaves_the_live_tables_alone(self):
+        before = SalaryObservation.objects.count()
+        bad = self._row("platform_engineer", "n/a")
+        with self.assertRaisesMessage(CommandError, "Row 2:"):
+            call_command(
+                "load_salary_dataset",
+                input=str(self._write([self._row("platform_engineer"), bad])),
+                mode="swap",
+                stdout=StringIO(),
+            )
+        self.assertEqual(SalaryObservation.objects.count(), before)
+        self.assertEqual(SalaryRoleAggregate.objects.count(), 7)
+        leftovers = [
+            table
+            for table in connection.introspection.table_names()
+            if table.startswith(f"{SalaryObservation._meta.db_table}_")
+        ]
+        self.assertEqual(leftovers, [])
+
+    def test_swap_mode_rejects_process_workers(self):
+        message = "--mode swap cannot be combined with --executor process."
+        with self.assertRaisesMessage(CommandError, message):
+            call_command("load_salary_dataset", mode="swap", executor="process")
+
+    def test_append_flag_is_an_alias_for_append_mode(self):
+        message = "--append cannot be combined with --mode swap."
+        with self.assertRaisesMessage(CommandError, message):
+            call_command("load_salary_dataset", append=True, mode="swap")
+
+
+class RebuildSalaryAggregatesCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_salary_dataset", stdout=StringIO())
+
+    def test_rebuilds_every_role_with_timings(self):
+        SalaryRoleAggregate.objects.all().delete()
+        stdout = StringIO()
+        call_command("rebuild_salary_aggregates", workers=4, stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn("[7/7]", output)
+        # SQLite (and any open transaction) falls back to serialized writes.
+        self.assertIn("Rebuilt aggregates for 7 role(s)", output)
+        self.assertIn("using 1 worker(s)", output)
+        self.assertEqual(SalaryRoleAggregate.objects.count(), 7)
+
+    def test_rebuilds_selected_roles(self):
+        stdout = StringIO()
+        call_command("rebuild_salary_aggregates", role=["Software_Engineer"], stdout=stdout)
+        self.assertIn("software_engineer rebuilt in", stdout.getvalue())
+
+    def test_rejects_invalid_worker_count(self):
+        with self.assertRaisesRegex(CommandError, "--workers"):
+            call_command("rebuild_salary_aggregates", workers=0)
+
+    def test_publishes_a_new_dataset_version(self):
+        version = SalaryDataset.current_version()
+        call_command("rebuild_salary_aggregates", role=["software_engineer"], stdout=StringIO())
+        self.assertEqual(SalaryDataset.current_version(), version + 1)
+        self.assertEqual(dataset_token()[0], version + 1)
+
 
 class SalaryInsightsTests(BaseClientTest):
     def test_requires_role_parameter(self):
@@ -365,6 +1091,30 @@ class SalaryInsightsTests(BaseClientTest):
         self.assertGreaterEqual(len(data["top_states"]), 1)
         self.assertEqual(data["top_states"][0]["state"], "RS")
 
+    def test_accepts_custom_percentiles(self):
+        response = self.client.get(
+            "/api/salaries/insights/",
+            {
+                "role": "software_engineer",
+                "percentiles": "10, 50,90",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        percentiles = response.json()["percentiles"]
+        self.assertEqual(list(percentiles), ["p10", "median", "p90"])
+        self.assertAlmostEqual(percentiles["median"], 177500.0)
+
+    def test_rejects_out_of_range_percentiles(self):
+        response = self.client.get(
+            "/api/salaries/insights/",
+            {
+                "role": "software_engineer",
+                "percentiles": "150",
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.json())
+
     def test_filters_apply_to_insights(self):
         response = self.client.get(
             "/api/salaries/insights/",
@@ -416,6 +1166,1107 @@ class SalaryAggregateCacheTests(TestCase):
         call_command("load_salary_dataset")
 
 
+class GroupedSummaryEngineTests(TestCase):
+    FILTER_CASES = [
+        {"role": "software_engineer"},
+        {"role": "data_scientist", "country": "Brazil"},
+        {"role": "software_engineer", "state": "sp", "work_model": "hibrido"},
+        {"role": "analista_de_sistemas", "state": "MG"},
+        {"role": "unknown_role"},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_salary_dataset")
+
+    def _summary_json(self, engine, params):
+        params = dict(params)
+        role = params.pop("role")
+        with override_settings(SALARY_SUMMARY_ENGINE=engine):
+            summary = summarize_salaries(role, use_cache=False, **params)
+        return json.dumps(summary, cls=DjangoJSONEncoder)
+
+    def test_grouped_engine_matches_fanout_engine(self):
+        roles = SalaryObservation.objects.values_list("role", flat=True).distinct()
+        cases = self.FILTER_CASES + [{"role": role} for role in roles]
+        for params in cases:
+            with self.subTest(params=params):
+                self.assertEqual(
+                    self._summary_json("grouped", params),
+                    self._summary_json("fanout", params),
+                )
+
+    def test_grouped_engine_uses_a_single_query(self):
+        with override_settings(SALARY_SUMMARY_ENGINE="grouped"):
+            with self.assertNumQueries(1):
+                summarize_salaries("software_engineer", use_cache=False)
+
+    def test_benchmark_command_reports_each_engine(self):
+        stdout = StringIO()
+        call_command(
+            "benchmark_salary_queries",
+            rows=[200],
+            scenario=["summary"],
+            repeat=1,
+            stdout=stdout,
+        )
+        output = stdout.getvalue()
+        self.assertIn("fanout", output)
+        self.assertIn("grouped", output)
+        self.assertEqual(SalaryObservation.objects.filter(role="software_engineer").count(), 4)
+
+
+    def test_payload_benchmark_reports_cpu_time(self):
+        stdout = StringIO()
+        call_command(
+            "benchmark_salary_queries",
+            rows=[200],
+            scenario=["payload"],
+            repeat=2,
+            stdout=stdout,
+        )
+        lines = [line for line in stdout.getvalue().splitlines() if line.startswith("payload")]
+        self.assertEqual(len(lines), 2)
+        for line in lines:
+            self.assertRegex(line, r"median=\s*[\d.]+ms cpu=\s*[\d.]+ms")
+
+
+class PercentileBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_salary_dataset")
+
+    def test_window_backend_matches_python_backend(self):
+        fractions = DEFAULT_PERCENTILES + parse_percentiles("0,1,10,33.3,99.9,100")
+        roles = SalaryObservation.objects.values_list("role", flat=True).distinct()
+        for role in list(roles) + ["unknown_role"]:
+            qs = SalaryObservation.objects.filter(role=role)
+            with self.subTest(role=role):
+                self.assertEqual(
+                    WindowPercentileBackend().compute(qs, "total_compensation", fractions),
+                    PythonPercentileBackend().compute(qs, "total_compensation", fractions),
+                )
+
+    def test_window_backend_computes_all_percentiles_in_one_query(self):
+        qs = SalaryObservation.objects.filter(role="software_engineer")
+        with self.assertNumQueries(1):
+            WindowPercentileBackend().compute(qs, "total_compensation", parse_percentiles("5,25,50,75,95"))
+
+    def test_backends_must_implement_compute(self):
+        class IncompleteBackend(PercentileBackend):
+            name = "incomplete"
+
+        with self.assertRaises(TypeError):
+            IncompleteBackend()
+
+
+class QuantileSketchTests(SimpleTestCase):
+    FRACTIONS = [Decimal(index) / 100 for index in range(0, 101)]
+
+    def test_small_sketches_are_exact(self):
+        values = sorted(Decimal(value) for value in (105000, 150000, 205000, 255000, 98000.5))
+        sketch = QuantileSketch(compression=100)
+        for value in values:
+            sketch.add(value)
+        for fraction in self.FRACTIONS:
+            self.assertAlmostEqual(
+                sketch.quantile(fraction), float(percentile(values, fraction)), places=6
+            )
+
+    def test_merged_sketches_stay_within_rank_error_bound(self):
+        rng = random.Random(3)
+        compression = 100
+        values = [Decimal(str(round(rng.lognormvariate(12, 0.5), 2))) for _ in range(20000)]
+        cells = [QuantileSketch(compression=compression) for _ in range(40)]
+        for value in values:
+            cells[rng.randrange(len(cells))].add(value)
+        stored = [QuantileSketch.from_dict(json.loads(json.dumps(cell.to_dict()))) for cell in cells]
+        merged = QuantileSketch.merge_all(stored, compression=compression)
+
+        ordered = sorted(values)
+        self.assertEqual(merged.count, len(values))
+        for fraction in self.FRACTIONS:
+            estimate = merged.quantile(fraction)
+            exact = percentile(ordered, fraction)
+            rank = bisect.bisect_left(ordered, Decimal(str(estimate))) / (len(ordered) - 1)
+            with self.subTest(fraction=fraction, estimate=estimate, exact=exact):
+                self.assertLessEqual(abs(rank - float(fraction)), 1 / compression)
+
+    def test_empty_sketch_has_no_quantiles(self):
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+
+class CellSketchInsightsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_salary_dataset")
+
+    def test_load_builds_normalized_cell_sketches(self):
+        cells = SalaryCellSketch.objects.filter(role="software_engineer")
+        self.assertEqual(sum(cell.observations for cell in cells), 4)
+        self.assertTrue(cells.filter(state="sp").exists())
+
+    def test_filtered_percentiles_match_exact_computation(self):
+        filters = {"state": "SP", "currency": "brl"}
+        with_sketches = role_insights("software_engineer", **filters)
+        with override_settings(SALARY_PERCENTILE_SKETCHES=False):
+            exact = role_insights("software_engineer", **filters)
+        self.assertEqual(with_sketches["percentiles"], exact["percentiles"])
+
+    def test_location_filters_fall_back_to_the_database(self):
+        insights = role_insights("software_engineer", location="Campinas")
+        self.assertAlmostEqual(insights["percentiles"]["median"], 150000.0)
+
+
+class SalaryCubeTests(TestCase):
+    FILTER_CASES = [
+        {"state": "sp"},
+        {"country": "Brazil", "work_model": "REMOTO"},
+        {"level": "senior", "currency": "brl"},
+        {"location": "Campinas"},
+        {"state": "mg", "level": "staff"},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_salary_dataset")
+
+    def test_load_builds_cube_cells(self):
+        cells = SalaryCubeCell.objects.filter(role="software_engineer")
+        self.assertEqual(sum(cell.observations for cell in cells), 4)
+
+    @override_settings(SALARY_PERCENTILE_SKETCHES=False)
+    def test_cube_matches_live_aggregation(self):
+        roles = SalaryObservation.objects.values_list("role", flat=True).distinct()
+        for role in roles:
+            for filters in self.FILTER_CASES:
+                with self.subTest(role=role, filters=filters):
+                    self.assertEqual(
+                        summarize_salaries(role, **filters),
+                        summarize_salaries(role, use_cache=False, **filters),
+                    )
+                    self.assertEqual(
+                        role_insights(role, **filters),
+                        role_insights(role, use_cache=False, **filters),
+                    )
+
+    def test_filtered_summary_is_one_indexed_read(self):
+        with self.assertNumQueries(1):
+            summarize_salaries("software_engineer", state="SP", work_model="hibrido")
+
+    @override_settings(SALARY_RESULT_CACHE_SIZE=0)
+    def test_views_report_the_serving_path(self):
+        client = Client()
+        role_only = client.get("/api/salaries/", {"role": "software_engineer"})
+        self.assertEqual(role_only["X-Salary-Path"], "aggregate")
+        filtered = client.get("/api/salaries/insights/", {"role": "software_engineer", "state": "sp"})
+        self.assertEqual(filtered["X-Salary-Path"], "cube")
+        missing = client.get("/api/salaries/", {"role": "software_engineer", "state": "ac"})
+        self.assertEqual(missing["X-Salary-Path"], "live")
+        self.assertEqual(missing.json()["total_observations"], 0)
+
+
+@skipUnless(connection.vendor in {"sqlite", "postgresql"}, "EXPLAIN format is backend specific")
+class CaseInsensitiveIndexTests(TestCase):
+    FILTER_CASES = [
+        {"state": "SP", "work_model": "Remoto"},
+        {"level": "Senior", "currency": "brl"},
+        {"location": "campinas"},
+        {},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_salary_dataset")
+
+    def _plan(self, qs):
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # The test tables are tiny; make sure the planner reports the
+                # index it would use at scale instead of a sequential scan.
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute(f"EXPLAIN {sql}", params)
+            else:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return "\n".join(str(row) for row in cursor.fetchall())
+
+    def test_filtered_queryset_uses_case_insensitive_indexes(self):
+        for filters in self.FILTER_CASES:
+            qs, _filters = _filtered_queryset("Software_Engineer", **filters)
+            with self.subTest(filters=filters):
+                self.assertIn("salary_obs_ci_", self._plan(qs))
+
+    def test_observation_pages_seek_the_geo_index(self):
+        qs, filters = _filtered_queryset("Software_Engineer")
+        cursor = encode_cursor(["brazil", "sp", "remoto", 0], filters)
+        plan = self._plan(seek_queryset(qs, filters, cursor)[:50])
+        self.assertIn("salary_obs_ci_geo_seek_idx", plan)
+        # The scan starts at the cursor instead of filtering the role's whole range.
+        if connection.vendor == "postgresql":
+            self.assertIn("lower((country)::text) >=", plan)
+        else:
+            self.assertIn("(<expr>=? AND <expr>>?)", plan)
+        # The index already yields seek order: no sort step, at any depth.
+        self.assertNotIn("TEMP B-TREE", plan)
+        self.assertNotIn("Sort", plan)
+
+    def test_mixed_case_filters_still_match(self):
+        qs, _filters = _filtered_queryset(" SOFTWARE_engineer ", state="sP", work_model="HIBRIDO")
+        self.assertEqual(qs.count(), 1)
+
+
+class BatchedComparisonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_salary_dataset")
+        cls.roles = list(
+            SalaryObservation.objects.order_by("role").values_list("role", flat=True).distinct()
+        )
+
+    def test_matches_per_role_summaries(self):
+        for filters in ({}, {"state": "sp"}, {"country": "brazil", "level": "senior"}):
+            comparison = compare_roles(self.roles + ["unknown_role"], **filters)
+            expected = [
+                summarize_salaries(role, use_cache=False, **filters)
+                for role in sorted(self.roles + ["unknown_role"])
+            ]
+            with self.subTest(filters=filters):
+                self.assertEqual(comparison["roles"], expected)
+
+    @override_settings(SALARY_RESULT_CACHE_SIZE=0)
+    def test_query_count_does_not_grow_with_roles(self):
+        with self.assertNumQueries(1):
+            compare_roles(self.roles)
+        # Cube read for the filtered roles plus one live query for the rest.
+        with self.assertNumQueries(2):
+            compare_roles(self.roles + ["unknown_role"], state="sp")
+        with override_settings(SALARY_CUBE_ENABLED=False):
+            with self.assertNumQueries(1):
+                compare_roles(self.roles, state="sp")
+
+
+@skipUnless(np is not None, "numpy is not installed")
+@override_settings(
+    SALARY_SNAPSHOT_ENGINE=True,
+    SALARY_SNAPSHOT_REFRESH_INTERVAL=0,
+    SALARY_RESULT_CACHE_SIZE=0,
+)
+class SnapshotEngineTests(TestCase):
+    FILTER_CASES = [
+        {},
+        {"state": "SP"},
+        {"country": "brazil", "level": "Senior"},
+        {"work_model": "remoto", "currency": "BRL"},
+        {"location": "Campinas"},
+        {"state": "unknown"},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_salary_dataset")
+        cls.roles = list(
+            SalaryObservation.objects.order_by("role").values_list("role", flat=True).distinct()
+        )
+
+    def setUp(self):
+        super().setUp()
+        reset_snapshot()
+        self.addCleanup(reset_snapshot)
+
+    def _cases(self):
+        for role in self.roles + ["unknown_role"]:
+            for filters in self.FILTER_CASES:
+                yield role, filters
+
+    def test_summary_matches_orm(self):
+        for role, filters in self._cases():
+            with self.subTest(role=role, filters=filters):
+                with track_served_paths() as paths:
+                    summary = summarize_salaries(role, **filters)
+                self.assertEqual(paths, ["snapshot"])
+                self.assertEqual(summary, summarize_salaries(role, use_cache=False, **filters))
+
+    def test_insights_match_orm(self):
+        fractions = parse_percentiles("0,10,25,50,75,90,99.9,100")
+        for role, filters in self._cases():
+            with self.subTest(role=role, filters=filters):
+                self.assertEqual(
+                    role_insights(role, percentiles=fractions, **filters),
+                    role_insights(role, percentiles=fractions, use_cache=False, **filters),
+                )
+
+    def test_comparison_matches_orm(self):
+        for filters in self.FILTER_CASES:
+            comparison = compare_roles(self.roles + ["unknown_role"], **filters)
+            expected = [
+                summarize_salaries(role, use_cache=False, **filters)
+                for role in sorted(self.roles + ["unknown_role"])
+            ]
+            with self.subTest(filters=filters):
+                self.assertEqual(comparison["roles"], expected)
+
+    def test_answers_without_sql_between_version_checks(self):
+        get_snapshot()
+        with override_settings(SALARY_SNAPSHOT_REFRESH_INTERVAL=3600):
+            with self.assertNumQueries(0):
+                summarize_salaries("software_engineer", state="sp")
+                role_insights("software_engineer")
+                compare_roles(self.roles)
+
+    def test_serves_the_current_snapshot_while_another_thread_rebuilds(self):
+        current = get_snapshot()
+        started, release = threading.Event(), threading.Event()
+
+        def slow_build(version):
+            started.set()
+            release.wait(5)
+            return SimpleNamespace(version=version)
+
+        with override_settings(SALARY_SNAPSHOT_REFRESH_INTERVAL=0), patch(
+            "testapp.snapshot.SalaryDataset.current_version", return_value=current.version + 1
+        ), patch("testapp.snapshot.ColumnarSnapshot", side_effect=slow_build):
+            rebuilder = threading.Thread(target=get_snapshot)
+            rebuilder.start()
+            self.assertTrue(started.wait(5))
+            # The rebuild is still running: no waiting, the old snapshot answers.
+            self.assertIs(get_snapshot(), current)
+            release.set()
+            rebuilder.join(5)
+            self.assertEqual(get_snapshot().version, current.version + 1)
+
+    def test_reloads_when_dataset_version_changes(self):
+        before = get_snapshot()
+        self.assertEqual(summarize_salaries("software_engineer")["total_observations"], 4)
+        SalaryObservation.objects.filter(role="software_engineer").delete()
+        self.assertIs(get_snapshot(), before)
+
+        SalaryDataset.bump()
+        self.assertIsNot(get_snapshot(), before)
+        self.assertEqual(summarize_salaries("software_engineer")["total_observations"], 0)
+
+
+@skipUnless(np is not None, "numpy is not installed")
+@override_settings(
+    SALARY_SNAPSHOT_ENGINE=True,
+    SALARY_SNAPSHOT_REFRESH_INTERVAL=3600,
+    SALARY_RESULT_CACHE_SIZE=0,
+    SALARY_COMPARE_CHUNK_SIZE=1,
+    SALARY_COMPARE_WORKERS=4,
+)
+class ConcurrentComparisonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_salary_dataset")
+        cls.roles = list(
+            SalaryObservation.objects.order_by("role").values_list("role", flat=True).distinct()
+        )
+
+    def setUp(self):
+        super().setUp()
+        reset_snapshot()
+        self.addCleanup(reset_snapshot)
+        # Pool threads read the in-memory snapshot, so they need no SQL.
+        get_snapshot()
+
+    def test_chunks_match_serial_comparison(self):
+        roles = self.roles + ["unknown_role"]
+        expected = compare_roles(roles, state="sp")
+        with patch("testapp.rebuild.can_parallelize", return_value=True):
+            with track_served_paths() as paths:
+                comparison = compare_roles(roles, state="sp")
+        self.assertEqual(comparison, expected)
+        # Every chunk reports its path back to the request context.
+        self.assertEqual(paths, ["snapshot"] * len(roles))
+
+    def test_sqlite_stays_on_the_calling_thread(self):
+        with patch("testapp.salary_data._compare_pool") as pool:
+            compare_roles(self.roles)
+        pool.assert_not_called()
+
+
+class AsyncViewTests(BaseClientTest):
+    def test_async_views_match_sync_views(self):
+        factory = RequestFactory()
+        cases = [
+            ("salary_summary", "/api/salaries/", {"role": "software_engineer", "state": "sp"}),
+            (
+                "salary_comparison",
+                "/api/salaries/comparison/",
+                {"roles": "software_engineer,data_scientist"},
+            ),
+            ("salary_insights", "/api/salaries/insights/", {"role": "data_scientist"}),
+            ("salary_bundle_view", "/api/salaries/bundle/", {"role": "software_engineer"}),
+            ("available_filters", "/api/filters/", {"role": "software_engineer"}),
+        ]
+        for name, url, params in cases:
+            with self.subTest(view=name):
+                sync_response = getattr(views, name)(factory.get(url, params))
+                async_view = async_to_sync(getattr(async_views, name))
+                async_response = async_view(factory.get(url, params))
+                self.assertEqual(async_response.status_code, sync_response.status_code)
+                self.assertEqual(async_response.content, sync_response.content)
+                self.assertEqual(async_response["ETag"], sync_response["ETag"])
+
+    def test_async_errors_are_preserved(self):
+        request = RequestFactory().get("/api/salaries/")
+        response = async_to_sync(async_views.salary_summary)(request)
+        self.assertEqual(response.status_code, 400)
+
+
+class ResultCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("load_salary_dataset")
+
+    def setUp(self):
+        super().setUp()
+        RESULT_CACHE.clear()
+        self.addCleanup(RESULT_CACHE.clear)
+
+    def test_repeated_calls_are_served_from_memory(self):
+        first = summarize_salaries("software_engineer", state="SP")
+        with self.assertNumQueries(0):
+            with track_served_paths() as paths:
+                second = summarize_salaries(" Software_Engineer ", state="sp ")
+        self.assertEqual(second, first)
+        self.assertEqual(paths, ["cache"])
+
+    def test_callers_receive_independent_copies(self):
+        summarize_salaries("software_engineer")["total_observations"] = -1
+        self.assertEqual(summarize_salaries("software_engineer")["total_observations"], 4)
+
+    def test_new_dataset_version_invalidates_entries(self):
+        self.assertEqual(summarize_salaries("software_engineer")["total_observations"], 4)
+        SalaryObservation.objects.filter(role="software_engineer").delete()
+        self.assertEqual(summarize_salaries("software_engineer")["total_observations"], 4)
+
+        SalaryDataset.bump()
+        publish_dataset_token()
+        SalaryRoleAggregate.objects.filter(role="software_engineer").delete()
+        SalaryCubeCell.objects.filter(role="software_engineer").delete()
+        self.assertEqual(summarize_salaries("software_engineer")["total_observations"], 0)
+
+    @override_settings(SALARY_RESULT_CACHE_SIZE=2, SALARY_RESULT_CACHE_NEGATIVE_SIZE=1)
+    def test_entries_are_bounded_and_unknown_roles_are_kept_apart(self):
+        summarize_salaries("software_engineer")
+        summarize_salaries("data_scientist")
+        for index in range(5):
+            compare_roles([f"unknown_{index}"])
+        self.assertEqual(len(RESULT_CACHE), 3)
+        with self.assertNumQueries(0):
+            summarize_salaries("software_engineer")
+            compare_roles(["unknown_4"])
+
+        role_insights("data_scientist")
+        self.assertEqual(len(RESULT_CACHE), 3)
+        with self.assertNumQueries(1):
+            summarize_salaries("data_scientist")
+
+    def test_concurrent_identical_calls_compute_once(self):
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"total_observations": 1}
+
+        results = []
+
+        def request():
+            results.append(RESULT_CACHE.get_or_compute(("test",), compute))
+
+        leader = threading.Thread(target=request)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=request) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(sorted(hit for _result, hit in results), [False, True, True, True, True])
+
+    def test_errors_are_not_cached(self):
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            RESULT_CACHE.get_or_compute(("error",), fail)
+        result, hit = RESULT_CACHE.get_or_compute(("error",), lambda: {"ok": True})
+        self.assertEqual((result, hit), ({"ok": True}, False))
+
+
+class ConditionalResponseTests(BaseClientTest):
+    def test_responses_carry_validators_and_cache_headers(self):
+        for url, params in (
+            ("/api/salaries/", {"role": "software_engineer"}),
+            ("/api/salaries/insights/", {"role": "software_engineer", "state": "sp"}),
+            ("/api/salaries/comparison/", {"roles": "software_engineer,data_scientist"}),
+            ("/api/filters/", {}),
+        ):
+            response = self.client.get(url, params)
+            with self.subTest(url=url):
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response["ETag"])
+                self.assertIn("Last-Modified", response)
+                self.assertIn("max-age=", response["Cache-Control"])
+
+    def test_if_none_match_returns_not_modified(self):
+        response = self.client.get("/api/salaries/", {"role": "software_engineer"})
+        revalidated = self.client.get(
+            "/api/salaries/", {"role": "software_engineer"}, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b"")
+        self.assertEqual(revalidated["ETag"], response["ETag"])
+
+    def test_new_load_changes_the_etag(self):
+        before = self.client.get("/api/salaries/", {"role": "software_engineer"})["ETag"]
+        call_command("load_salary_dataset", stdout=StringIO())
+        response = self.client.get(
+            "/api/salaries/", {"role": "software_engineer"}, HTTP_IF_NONE_MATCH=before
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], before)
+
+    def test_equivalent_queries_share_an_etag(self):
+        first = self.client.get(
+            "/api/salaries/comparison/?roles=software_engineer,data_scientist&state=SP"
+        )
+        second = self.client.get(
+            "/api/salaries/comparison/?state=+sp&role=Data_Scientist&roles=software_engineer,&level="
+        )
+        self.assertEqual(first["ETag"], second["ETag"])
+        other = self.client.get("/api/salaries/comparison/?roles=software_engineer&state=sp")
+        self.assertNotEqual(first["ETag"], other["ETag"])
+
+    def test_surrogate_keys_name_the_roles(self):
+        response = self.client.get(
+            "/api/salaries/comparison/", {"roles": "Software_Engineer,data_scientist"}
+        )
+        keys = response["Surrogate-Key"].split()
+        self.assertIn("salary-comparison", keys)
+        self.assertIn("role-software_engineer", keys)
+        self.assertIn("role-data_scientist", keys)
+
+    def test_surrogate_keys_survive_whitespace_in_roles(self):
+        response = self.client.get("/api/salaries/comparison/", {"role": "data\nscientist lead"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("role-data_scientist_lead", response["Surrogate-Key"].split())
+
+    def test_errors_have_no_validators(self):
+        response = self.client.get("/api/salaries/")
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("Surrogate-Key", response)
+
+    @override_settings(SALARY_CANONICAL_REDIRECTS=True, SALARY_CACHE_CONTROL="no-cache")
+    def test_non_canonical_queries_redirect(self):
+        response = self.client.get("/api/salaries/?state=SP&role=Software_Engineer")
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response["Location"], "/api/salaries/?role=software_engineer&state=sp")
+        canonical = self.client.get(response["Location"])
+        self.assertEqual(canonical.status_code, 200)
+        self.assertEqual(canonical["Cache-Control"], "no-cache")
+
+
+@override_settings(SALARY_RESULT_CACHE_SIZE=0)
+class SalaryBundleTests(BaseClientTest):
+    FILTER_CASES = [
+        {},
+        {"state": "SP"},
+        {"country": "brazil", "level": "senior"},
+        {"location": "Campinas"},
+        {"state": "ac"},
+    ]
+
+    def _assert_matches_endpoints(self, role, filters, use_cache=True, percentiles=None):
+        bundle = salary_bundle(role, **filters, use_cache=use_cache, percentiles=percentiles)
+        self.assertEqual(bundle["summary"], summarize_salaries(role, **filters, use_cache=use_cache))
+        self.assertEqual(
+            bundle["insights"],
+            role_insights(role, **filters, use_cache=use_cache, percentiles=percentiles),
+        )
+
+    def test_matches_separate_payloads_on_every_path(self):
+        for role in ("software_engineer", "data_scientist", "unknown_role"):
+            for filters in self.FILTER_CASES:
+                with self.subTest(role=role, filters=filters):
+                    self._assert_matches_endpoints(role, filters)
+                    self._assert_matches_endpoints(role, filters, use_cache=False)
+                    self._assert_matches_endpoints(
+                        role, filters, percentiles=parse_percentiles("10,90")
+                    )
+
+    def test_live_bundle_reads_observations_once(self):
+        with override_settings(SALARY_CUBE_ENABLED=False):
+            with track_served_paths() as paths:
+                with self.assertNumQueries(2):
+                    salary_bundle("software_engineer", state="sp", location="campinas")
+        self.assertEqual(paths, ["live"])
+        with self.assertNumQueries(1):
+            salary_bundle("software_engineer")
+
+    def test_endpoint_returns_both_payloads(self):
+        response = self.client.get(
+            "/api/salaries/bundle/", {"role": "software_engineer", "state": "sp"}
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["summary"]["total_observations"], 2)
+        self.assertEqual(data["insights"]["total_observations"], 2)
+        self.assertEqual(response["X-Salary-Path"], "cube")
+        self.assertIn("ETag", response)
+        self.assertEqual(self.client.get("/api/salaries/bundle/").status_code, 400)
+
+    def test_dashboard_fetches_the_bundle(self):
+        content = self.client.get("/dashboard/").content.decode()
+        self.assertIn("/api/salaries/bundle/", content)
+        self.assertNotIn("/api/salaries/insights/", content)
+
+
+class PreserializedPayloadTests(BaseClientTest):
+    def test_rebuild_stores_the_serialized_payloads(self):
+        payloads = SalaryAggregatePayload.objects.filter(
+            aggregate__role="software_engineer", encoding="identity"
+        )
+        self.assertEqual(
+            sorted(payloads.values_list("kind", flat=True)), ["bundle", "insights", "summary"]
+        )
+        body = bytes(payloads.get(kind="summary").body)
+        expected = JsonResponse(summarize_salaries("software_engineer", use_cache=False)).content
+        self.assertEqual(body, expected)
+
+    def test_role_only_requests_stream_the_stored_bytes(self):
+        for url, kind in (
+            ("/api/salaries/", "summary"),
+            ("/api/salaries/insights/", "insights"),
+            ("/api/salaries/bundle/", "bundle"),
+        ):
+            stored = SalaryAggregatePayload.objects.get(
+                aggregate__role="software_engineer", kind=kind, encoding="identity"
+            )
+            response = self.client.get(url, {"role": " Software_Engineer", "state": ""})
+            with self.subTest(url=url):
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertEqual(response.content, bytes(stored.body))
+                self.assertEqual(response["X-Salary-Path"], "aggregate")
+                self.assertIn("ETag", response)
+
+    def test_filtered_requests_and_disabled_setting_use_the_json_path(self):
+        filtered = self.client.get("/api/salaries/", {"role": "software_engineer", "state": "sp"})
+        self.assertNotEqual(filtered["X-Salary-Path"], "aggregate")
+        with override_settings(SALARY_PRESERIALIZED_PAYLOADS=False, SALARY_RESULT_CACHE_SIZE=0):
+            response = self.client.get("/api/salaries/", {"role": "software_engineer"})
+        self.assertEqual(response["X-Salary-Path"], "aggregate")
+        self.assertEqual(
+            response.content,
+            self.client.get("/api/salaries/", {"role": "software_engineer"}).content,
+        )
+
+    def test_reload_replaces_payloads(self):
+        call_command("load_salary_dataset", stdout=StringIO())
+        identity = SalaryAggregatePayload.objects.filter(encoding="identity")
+        self.assertEqual(identity.count(), SalaryRoleAggregate.objects.count() * 3)
+
+
+class PrecompressedPayloadTests(BaseClientTest):
+    def _payload(self, kind, encoding):
+        return bytes(
+            SalaryAggregatePayload.objects.get(
+                aggregate__role="software_engineer", kind=kind, encoding=encoding
+            ).body
+        )
+
+    def test_rebuild_stores_compressed_variants(self):
+        identity = self._payload("summary", "identity")
+        self.assertEqual(gzip.decompress(self._payload("summary", "gzip")), identity)
+        encodings = set(
+            SalaryAggregatePayload.objects.filter(
+                aggregate__role="software_engineer", kind="summary"
+            ).values_list("encoding", flat=True)
+        )
+        self.assertEqual(encodings, {"identity", *PAYLOAD_ENCODERS})
+
+    def test_accept_encoding_selects_the_variant(self):
+        params = {"role": "software_engineer"}
+        compressed = self.client.get(
+            "/api/salaries/", params, HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(compressed.content, self._payload("summary", "gzip"))
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+
+        plain = self.client.get("/api/salaries/", params, HTTP_ACCEPT_ENCODING="gzip;q=0")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(plain.content, self._payload("summary", "identity"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
+        self.assertEqual(plain["ETag"], compressed["ETag"])
+
+        revalidated = self.client.get(
+            "/api/salaries/", params, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=plain["ETag"]
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_accepted_encodings_follow_quality_values(self):
+        factory = RequestFactory()
+        cases = {
+            "": ["identity"],
+            "gzip, br": ["br", "gzip", "identity"],
+            "br;q=0.5, gzip": ["gzip", "br", "identity"],
+            "*;q=0.1, gzip;q=0": ["br", "identity"],
+            "identity": ["identity"],
+        }
+        for header, expected in cases.items():
+            request = factory.get("/", HTTP_ACCEPT_ENCODING=header)
+            with self.subTest(header=header):
+                self.assertEqual(accepted_encodings(request, ("br", "gzip")), expected)
+
+
+@override_settings(SALARY_RESULT_CACHE_SIZE=0)
+class SalaryBatchTests(BaseClientTest):
+    QUERIES = [
+        {"role": "software_engineer"},
+        {"role": "Software_Engineer", "state": "SP"},
+        {"role": "data_scientist", "level": "senior", "work_model": "remoto"},
+        {"role": "software_engineer", "location": "campinas"},
+        {"role": "unknown_role", "state": "sp"},
+        {"role": "data_scientist", "country": "brazil", "state": "rj"},
+    ]
+
+    def _expected(self, query):
+        return summarize_salaries(use_cache=False, **query)
+
+    def test_matches_individual_summaries_in_input_order(self):
+        results = summarize_batch(self.QUERIES)
+        self.assertTrue(all(result["summary"]["total_observations"] for result in results[1:4]))
+        self.assertEqual(results, [{"summary": self._expected(query)} for query in self.QUERIES])
+
+        with override_settings(SALARY_CUBE_ENABLED=False):
+            live = summarize_batch(self.QUERIES, use_cache=False)
+        self.assertEqual(live, results)
+
+    def test_invalid_items_report_errors_in_place(self):
+        results = summarize_batch(
+            [
+                {"state": "sp"},
+                "software_engineer",
+                {"role": "software_engineer", "seniority": "x"},
+                {"role": "software_engineer", "state": 3},
+                {"role": "data_scientist"},
+            ]
+        )
+        self.assertEqual(results[0], {"error": "role is required"})
+        self.assertIn("error", results[1])
+        self.assertEqual(results[2], {"error": "unknown filter(s): seniority"})
+        self.assertEqual(results[3], {"error": "state must be a string"})
+        self.assertEqual(results[4], {"summary": self._expected({"role": "data_scientist"})})
+
+    def test_query_count_does_not_grow_with_items(self):
+        queries = [
+            {"role": role, "state": state, "level": level}
+            for role in ("software_engineer", "data_scientist", "unknown_role")
+            for state in ("sp", "rj", "mg")
+            for level in ("junior", "senior")
+        ]
+        with CaptureQueriesContext(connection) as small:
+            summarize_batch(queries[:2])
+        with CaptureQueriesContext(connection) as large:
+            summarize_batch(queries + [{"role": "software_engineer"}])
+        self.assertLessEqual(len(small), 2)
+        self.assertLessEqual(len(large), 3)
+
+    def test_endpoint_returns_an_array(self):
+        response = self.client.post(
+            "/api/salaries/batch/",
+            data=json.dumps([{"role": "software_engineer", "state": "sp"}, {"level": "senior"}]),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        expected = self._expected({"role": "software_engineer", "state": "sp"})
+        self.assertEqual(
+            body[0]["summary"], json.loads(json.dumps(expected, cls=DjangoJSONEncoder))
+        )
+        self.assertEqual(body[1], {"error": "role is required"})
+        self.assertIn("X-Salary-Path", response)
+
+    def test_endpoint_rejects_bad_requests(self):
+        self.assertEqual(self.client.get("/api/salaries/batch/").status_code, 405)
+        for data in ("{not json", json.dumps({"role": "software_engineer"}), "[]"):
+            with self.subTest(data=data):
+                response = self.client.post(
+                    "/api/salaries/batch/", data=data, content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 400)
+        with override_settings(SALARY_BATCH_MAX_QUERIES=1):
+            response = self.client.post(
+                "/api/salaries/batch/",
+                data=json.dumps([{"role": "a"}, {"role": "b"}]),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 400)
+
+
+class ObservationExportTests(BaseClientTest):
+    def _export(self, **params):
+        response = self.client.get("/api/observations/export/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode("utf-8")
+
+    def test_ndjson_matches_filtered_observations(self):
+        response, body = self._export(role="Software_Engineer", state="sp")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        qs, _filters = _filtered_queryset("software_engineer", state="sp")
+        expected = list(qs.order_by("id"))
+        self.assertTrue(expected)
+        self.assertEqual([row["id"] for row in rows], [obs.pk for obs in expected])
+        self.assertEqual(rows[0]["total_compensation"], str(expected[0].total_compensation))
+        self.assertEqual(rows[0]["role"], expected[0].role)
+
+    def test_csv_has_header_and_one_line_per_row(self):
+        response, body = self._export(role="data_scientist", format="CSV")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual(len(rows), SalaryObservation.objects.filter(role="data_scientist").count())
+        self.assertEqual(set(rows[0]), set(EXPORT_FIELDS))
+
+    @override_settings(SALARY_EXPORT_CHUNK_SIZE=2)
+    def test_streams_in_chunks(self):
+        response = self.client.get("/api/observations/export/", {"role": "software_engineer"})
+        chunks = list(response.streaming_content)
+        total = SalaryObservation.objects.filter(role="software_engineer").count()
+        self.assertEqual(len(chunks), -(-total // 2))
+        self.assertTrue(all(chunk.count(b"\n") <= 2 for chunk in chunks))
+
+    def test_rejects_bad_requests(self):
+        for params in ({}, {"role": "software_engineer", "format": "xml"}):
+            with self.subTest(params=params):
+                response = self.client.get("/api/observations/export/", params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_async_streaming_reads_on_a_helper_thread(self):
+        threads = []
+
+        def content():
+            threads.append(threading.current_thread())
+            yield b"a"
+            yield b"b"
+
+        self.assertEqual(list(async_views.stream_in_thread(content())), [b"a", b"b"])
+        self.assertIsNot(threads[0], threading.current_thread())
+
+        def failing():
+            yield b"a"
+            raise RuntimeError("boom")
+
+        with self.assertRaisesMessage(RuntimeError, "boom"):
+            list(async_views.stream_in_thread(failing()))
+
+    def test_asgi_handler_keeps_the_loop_free_while_streaming(self):
+        release = threading.Event()
+        released = []
+
+        def content():
+            yield b"a"
+            # Only a running event loop can set the event.
+            released.append(release.wait(timeout=5))
+            yield b"b"
+
+        async def scenario():
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            async def other_request():
+                await asyncio.sleep(0.05)
+                release.set()
+
+            response = StreamingHttpResponse(content(), content_type="text/plain")
+            response.set_cookie("seen", "1")
+            await asyncio.gather(
+                async_views.SalaryASGIHandler().send_response(response, send), other_request()
+            )
+            return messages
+
+        messages = async_to_sync(scenario)()
+        self.assertEqual(released, [True])
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertIn((b"Content-Type", b"text/plain"), messages[0]["headers"])
+        self.assertIn(b"Set-Cookie", dict(messages[0]["headers"]))
+        self.assertEqual(b"".join(message.get("body", b"") for message in messages[1:]), b"ab")
+        self.assertFalse(messages[-1].get("more_body", False))
+
+
+class ObservationListTests(BaseClientTest):
+    def _pages(self, **params):
+        pages = []
+        cursor = None
+        while True:
+            query = dict(params, **({"cursor": cursor} if cursor else {}))
+            response = self.client.get("/api/observations/", query)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            cursor = pages[-1]["next_cursor"]
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_row_once_in_seek_order(self):
+        pages = self._pages(role="SOFTWARE_ENGINEER", limit=2)
+        ids = [row["id"] for page in pages for row in page["results"]]
+        qs, _filters = _filtered_queryset("software_engineer")
+        expected = sorted(
+            qs,
+            key=lambda obs: (
+                obs.country.lower(),
+                obs.state.lower(),
+                obs.work_model.lower(),
+                obs.pk,
+            ),
+        )
+        self.assertGreater(len(pages), 1)
+        self.assertTrue(all(len(page["results"]) <= 2 for page in pages))
+        self.assertEqual(ids, [obs.pk for obs in expected])
+        self.assertEqual(set(pages[0]["results"][0]), set(EXPORT_FIELDS))
+
+    def test_filters_apply_to_every_page(self):
+        pages = self._pages(role="software_engineer", state="SP", limit=1)
+        rows = [row for page in pages for row in page["results"]]
+        self.assertEqual(
+            len(rows), _filtered_queryset("software_engineer", state="sp")[0].count()
+        )
+        self.assertTrue(all(row["state"].lower() == "sp" for row in rows))
+
+    def test_cursors_survive_canonical_redirects(self):
+        expected = self._pages(role="software_engineer", limit=2)
+        pages = []
+        query = {"role": "Software_Engineer", "limit": 2}
+        with self.settings(SALARY_CANONICAL_REDIRECTS=True):
+            while True:
+                response = self.client.get("/api/observations/", query, follow=True)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.redirect_chain)
+                pages.append(response.json())
+                if pages[-1]["next_cursor"] is None:
+                    break
+                query = dict(query, cursor=pages[-1]["next_cursor"])
+        self.assertGreater(len(pages), 1)
+        self.assertEqual(pages, expected)
+
+    def test_canonical_query_keeps_the_cursor_verbatim(self):
+        request = RequestFactory().get(
+            "/api/observations/", {"role": " Software_Engineer", "cursor": "AbC-x_Y"}
+        )
+        self.assertEqual(canonical_query(request), "cursor=AbC-x_Y&role=software_engineer")
+
+    def test_rejects_foreign_or_tampered_cursors(self):
+        first = self.client.get("/api/observations/", {"role": "software_engineer", "limit": 1})
+        cursor = first.json()["next_cursor"]
+        cases = [
+            {"role": "software_engineer", "cursor": cursor + "x"},
+            {"role": "data_scientist", "cursor": cursor},
+            {"role": "software_engineer", "limit": 0},
+            {"role": "software_engineer", "limit": "ten"},
+            {},
+        ]
+        for params in cases:
+            with self.subTest(params=params):
+                response = self.client.get("/api/observations/", params)
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SALARY_METRICS_ENABLED=True, SALARY_RESULT_CACHE_SIZE=0)
+class PerformanceMetricsTests(BaseClientTest):
+    def setUp(self):
+        super().setUp()
+        for histogram in HISTOGRAMS:
+            histogram.clear()
+
+    @staticmethod
+    def _timing(response):
+        entries = {}
+        for entry in response["Server-Timing"].split(", "):
+            name, *params = entry.split(";")
+            entries[name] = dict(param.split("=", 1) for param in params)
+        return entries
+
+    def test_server_timing_reports_queries_and_path(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/salaries/", {"role": "software_engineer", "state": "sp"}
+            )
+        timing = self._timing(response)
+        self.assertEqual(timing["db"]["desc"], f'"{len(queries)} queries"')
+        self.assertEqual(timing["path"]["desc"], f'"{response["X-Salary-Path"]}"')
+        self.assertGreater(float(timing["serialize"]["dur"]), 0)
+        self.assertGreaterEqual(float(timing["total"]["dur"]), float(timing["db"]["dur"]))
+
+    def test_cache_outcome_is_reported(self):
+        params = {"role": "software_engineer", "level": "senior"}
+        with override_settings(SALARY_RESULT_CACHE_SIZE=16):
+            RESULT_CACHE.clear()
+            first = self._timing(self.client.get("/api/salaries/", params))
+            second = self._timing(self.client.get("/api/salaries/", params))
+        self.assertEqual(first["cache"]["desc"], '"miss"')
+        self.assertEqual(second["cache"]["desc"], '"hit"')
+
+    def test_metrics_endpoint_exposes_histograms(self):
+        self.client.get("/api/salaries/", {"role": "software_engineer", "state": "sp"})
+        self.client.get("/api/salaries/", {"role": "software_engineer", "state": "sp"})
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn("# TYPE salary_request_duration_seconds histogram", body)
+        self.assertIn(
+            'salary_request_duration_seconds_count{endpoint="/api/salaries/",'
+            'path="cube",status="200"} 2',
+            body,
+        )
+        self.assertIn('salary_db_queries_bucket{endpoint="/api/salaries/",le="+Inf"} 2', body)
+        self.assertIn('salary_served_path_total{path="cube"}', body)
+
+    def test_disabled_metrics_remove_the_middleware(self):
+        with override_settings(SALARY_METRICS_ENABLED=False):
+            client = Client()
+            response = client.get("/api/salaries/", {"role": "software_engineer"})
+            self.assertNotIn("Server-Timing", response)
+            self.assertEqual(client.get("/metrics").status_code, 404)
+        with self.assertRaises(MiddlewareNotUsed):
+            with override_settings(SALARY_METRICS_ENABLED=False):
+                PerformanceMetricsMiddleware(lambda request: None)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("demo_seconds", "Demo.", (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, endpoint="x")
+        lines = histogram.render()
+        self.assertIn('demo_seconds_bucket{endpoint="x",le="0.1"} 2', lines)
+        self.assertIn('demo_seconds_bucket{endpoint="x",le="1"} 3', lines)
+        self.assertIn('demo_seconds_bucket{endpoint="x",le="+Inf"} 4', lines)
+        self.assertIn('demo_seconds_sum{endpoint="x"} 3.650000', lines)
+
+
 class ExportDashboardCommandTests(SimpleTestCase):
     def setUp(self):
         super().setUp()
@@ -1,23 +1,25 @@
+from django.conf import settings
 from django.urls import path
-from .views import (
-    hello_world,
-    health_check,
-    salary_summary,
-    salary_comparison,
-    salary_insights,
-    dashboard,
-    available_filters,
-)
 
+from . import async_views, views
+from .views import dashboard, health_check, hello_world, metrics
+
+# Salary APIs run as async views when the app is served over ASGI.
+api = async_views if settings.SALARY_ASYNC_VIEWS else views
 
 urlpatterns = [
     path("", dashboard),
     path("dashboard/", dashboard),
     path("hello/", hello_world),
-    path("api/salaries/comparison/", salary_comparison),
-    path("api/salaries/", salary_summary),
-    path("api/salaries/insights/", salary_insights),
-    path("api/filters/", available_filters),
+    path("api/salaries/comparison/", api.salary_comparison),
+    path("api/salaries/", api.salary_summary),
+    path("api/salaries/insights/", api.salary_insights),
+    path("api/salaries/bundle/", api.salary_bundle_view),
+    path("api/salaries/batch/", api.salary_batch),
+    path("api/filters/", api.available_filters),
+    path("api/observations/", api.list_observations),
+    path("api/observations/export/", api.export_observations),
+    path("metrics", metrics),
     path("health/", health_check),
     path("healthz", health_check),
     path("healthz/", health_check),
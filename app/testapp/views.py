@@ -1,11 +1,37 @@
-from typing import List
+import hashlib
+import json
+from typing import List, Optional
 
+from django.conf import settings
 from django.core.cache import cache
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils.text import get_valid_filename
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
-from .models import SalaryObservation, SalaryRoleAggregate
-from .salary_data import compare_roles, role_insights, summarize_salaries
+from .exports import EXPORT_FORMATS
+from .http_cache import accepted_encodings, cacheable_salary_view
+from .metrics import measure_serialization, render_metrics
+from .pagination import observation_page
+from .percentiles import parse_percentiles
+from .result_cache import RESULT_CACHE_STATS, dataset_token
+from .salary_data import (
+    FILTER_DIMENSIONS,
+    PAYLOAD_ENCODERS,
+    SERVED_PATH_COUNTS,
+    aggregate_payload,
+    compare_roles,
+    filter_facets,
+    filtered_observations,
+    role_insights,
+    salary_bundle,
+    summarize_batch,
+    summarize_salaries,
+    track_served_paths,
+)
+
+SERVED_PATH_HEADER = "X-Salary-Path"
 
 
 def hello_world(request):
@@ -16,29 +42,63 @@ def health_check(request):
     return HttpResponse('OK', status=200)
 
 
+def _with_served_paths(response: HttpResponse, paths: List[str]) -> HttpResponse:
+    if paths:
+        response[SERVED_PATH_HEADER] = ",".join(dict.fromkeys(paths))
+    return response
+
+
+def _json_response(payload, **kwargs) -> JsonResponse:
+    with measure_serialization():
+        return JsonResponse(payload, **kwargs)
+
+
+def _payload_response(request, kind: str) -> Optional[HttpResponse]:
+    """Stream the pre-serialized (possibly precompressed) aggregate for role-only requests."""
+    if any(value.strip() for key, value in request.GET.items() if key != "role"):
+        return None
+    encodings = accepted_encodings(request, PAYLOAD_ENCODERS)
+    with track_served_paths() as paths:
+        payload = aggregate_payload(request.GET["role"], kind, encodings)
+    if payload is None:
+        return None
+    body, encoding = payload
+    response = HttpResponse(body, content_type="application/json")
+    if encoding != "identity":
+        response["Content-Encoding"] = encoding
+    return _with_served_paths(response, paths)
+
+
+@cacheable_salary_view("summary")
 def salary_summary(request):
     role = request.GET.get("role")
     if not role:
         return JsonResponse({"error": "role query parameter is required"}, status=400)
 
+    cached = _payload_response(request, "summary")
+    if cached is not None:
+        return cached
+
     try:
-        summary = summarize_salaries(
-            role=role,
-            location=request.GET.get("location"),
-            country=request.GET.get("country"),
-            state=request.GET.get("state"),
-            level=request.GET.get("level"),
-            currency=request.GET.get("currency"),
-            work_model=request.GET.get("work_model"),
-        )
+        with track_served_paths() as paths:
+            summary = summarize_salaries(
+                role=role,
+                location=request.GET.get("location"),
+                country=request.GET.get("country"),
+                state=request.GET.get("state"),
+                level=request.GET.get("level"),
+                currency=request.GET.get("currency"),
+                work_model=request.GET.get("work_model"),
+            )
     except FileNotFoundError as exc:
         return JsonResponse({"error": str(exc)}, status=500)
     except ValueError as exc:
         return JsonResponse({"error": str(exc)}, status=400)
 
-    return JsonResponse(summary, status=200)
+    return _with_served_paths(_json_response(summary, status=200), paths)
 
 
+@cacheable_salary_view("comparison", role_list=True)
 def salary_comparison(request):
     roles: List[str] = []
 
@@ -54,82 +114,182 @@ def salary_comparison(request):
         return JsonResponse({"error": "roles query parameter is required"}, status=400)
 
     try:
-        summary = compare_roles(
-            roles=roles,
-            location=request.GET.get("location"),
-            country=request.GET.get("country"),
-            state=request.GET.get("state"),
-            level=request.GET.get("level"),
-            currency=request.GET.get("currency"),
-            work_model=request.GET.get("work_model"),
-        )
+        with track_served_paths() as paths:
+            summary = compare_roles(
+                roles=roles,
+                location=request.GET.get("location"),
+                country=request.GET.get("country"),
+                state=request.GET.get("state"),
+                level=request.GET.get("level"),
+                currency=request.GET.get("currency"),
+                work_model=request.GET.get("work_model"),
+            )
     except FileNotFoundError as exc:
         return JsonResponse({"error": str(exc)}, status=500)
     except ValueError as exc:
         return JsonResponse({"error": str(exc)}, status=400)
 
-    return JsonResponse(summary, status=200)
+    return _with_served_paths(_json_response(summary, status=200), paths)
 
 
+@cacheable_salary_view("insights")
 def salary_insights(request):
     role = request.GET.get("role")
     if not role:
         return JsonResponse({"error": "role query parameter is required"}, status=400)
 
+    cached = _payload_response(request, "insights")
+    if cached is not None:
+        return cached
+
     try:
-        insights = role_insights(
-            role=role,
-            location=request.GET.get("location"),
-            country=request.GET.get("country"),
-            state=request.GET.get("state"),
-            level=request.GET.get("level"),
-            currency=request.GET.get("currency"),
-            work_model=request.GET.get("work_model"),
-        )
+        with track_served_paths() as paths:
+            insights = role_insights(
+                role=role,
+                location=request.GET.get("location"),
+                country=request.GET.get("country"),
+                state=request.GET.get("state"),
+                level=request.GET.get("level"),
+                currency=request.GET.get("currency"),
+                work_model=request.GET.get("work_model"),
+                percentiles=parse_percentiles(request.GET.get("percentiles")),
+            )
     except FileNotFoundError as exc:
         return JsonResponse({"error": str(exc)}, status=500)
     except ValueError as exc:
         return JsonResponse({"error": str(exc)}, status=400)
 
-    return JsonResponse(insights, status=200)
+    return _with_served_paths(_json_response(insights, status=200), paths)
+
+
+@cacheable_salary_view("bundle")
+def salary_bundle_view(request):
+    role = request.GET.get("role")
+    if not role:
+        return JsonResponse({"error": "role query parameter is required"}, status=400)
+
+    cached = _payload_response(request, "bundle")
+    if cached is not None:
+        return cached
+
+    try:
+        with track_served_paths() as paths:
+            bundle = salary_bundle(
+                role=role,
+                location=request.GET.get("location"),
+                country=request.GET.get("country"),
+                state=request.GET.get("state"),
+                level=request.GET.get("level"),
+                currency=request.GET.get("currency"),
+                work_model=request.GET.get("work_model"),
+                percentiles=parse_percentiles(request.GET.get("percentiles")),
+            )
+    except FileNotFoundError as exc:
+        return JsonResponse({"error": str(exc)}, status=500)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return _with_served_paths(_json_response(bundle, status=200), paths)
+
+
+@cacheable_salary_view("observations")
+def list_observations(request):
+    role = request.GET.get("role")
+    if not role:
+        return JsonResponse({"error": "role query parameter is required"}, status=400)
+
+    default_limit = getattr(settings, "SALARY_OBSERVATIONS_PAGE_SIZE", 50)
+    max_limit = getattr(settings, "SALARY_OBSERVATIONS_MAX_PAGE_SIZE", 500)
+    try:
+        limit = int(request.GET.get("limit") or default_limit)
+    except ValueError:
+        return JsonResponse({"error": "limit must be an integer"}, status=400)
+    if not 1 <= limit <= max_limit:
+        return JsonResponse({"error": f"limit must be between 1 and {max_limit}"}, status=400)
+
+    try:
+        qs, filters = filtered_observations(
+            role, **{dimension: request.GET.get(dimension) for dimension in FILTER_DIMENSIONS}
+        )
+        rows, next_cursor = observation_page(qs, filters, limit, request.GET.get("cursor"))
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return _json_response({"filters": filters, "results": rows, "next_cursor": next_cursor})
+
+
+@cacheable_salary_view("export")
+def export_observations(request):
+    role = request.GET.get("role")
+    if not role:
+        return JsonResponse({"error": "role query parameter is required"}, status=400)
+
+    export_format = (request.GET.get("format") or "ndjson").strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse(
+            {"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, status=400
+        )
+
+    try:
+        qs, filters = filtered_observations(
+            role, **{dimension: request.GET.get(dimension) for dimension in FILTER_DIMENSIONS}
+        )
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    content_type, chunks = EXPORT_FORMATS[export_format]
+    chunk_size = getattr(settings, "SALARY_EXPORT_CHUNK_SIZE", 2000)
+    filename = f"{get_valid_filename(filters['role'])}-observations.{export_format}"
+    response = StreamingHttpResponse(chunks(qs, chunk_size), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@csrf_exempt
+@require_POST
+def salary_batch(request):
+    try:
+        queries = json.loads(request.body or b"null")
+    except (UnicodeDecodeError, ValueError):
+        return JsonResponse({"error": "request body must be JSON"}, status=400)
+    if not isinstance(queries, list) or not queries:
+        return JsonResponse({"error": "request body must be a non-empty JSON array"}, status=400)
+    limit = getattr(settings, "SALARY_BATCH_MAX_QUERIES", 500)
+    if len(queries) > limit:
+        return JsonResponse({"error": f"at most {limit} queries per batch"}, status=400)
+
+    try:
+        with track_served_paths() as paths:
+            results = summarize_batch(queries)
+    except FileNotFoundError as exc:
+        return JsonResponse({"error": str(exc)}, status=500)
+
+    return _with_served_paths(_json_response(results, safe=False, status=200), paths)
+
+
+def metrics(request):
+    if not getattr(settings, "SALARY_METRICS_ENABLED", False):
+        raise Http404("metrics are disabled")
+    body = render_metrics(SERVED_PATH_COUNTS, RESULT_CACHE_STATS)
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 def dashboard(request):
     return render(request, "dashboard.html")
 
 
+@cacheable_salary_view("filters")
 def available_filters(request):
-    cache_key = "testapp.available_filters"
+    role = request.GET.get("role")
+    version, updated_at = dataset_token()
+    # The role is user input: hash it so the key stays short and valid on
+    # every cache backend (memcached rejects spaces and control characters).
+    role_key = hashlib.sha1((role or "").strip().lower().encode("utf-8")).hexdigest()
+    cache_key = f"testapp.available_filters.{version}.{updated_at}.{role_key}"
     cached = cache.get(cache_key)
     if cached is not None:
-        return JsonResponse(cached)
-
-    roles = list(SalaryRoleAggregate.objects.order_by("role").values_list("role", flat=True))
-    states = list(
-        SalaryObservation.objects.exclude(state="")
-        .order_by("state")
-        .values_list("state", flat=True)
-        .distinct()
-    )
-    levels = list(
-        SalaryObservation.objects.exclude(level="")
-        .order_by("level")
-        .values_list("level", flat=True)
-        .distinct()
-    )
-    work_models = list(
-        SalaryObservation.objects.exclude(work_model="")
-        .order_by("work_model")
-        .values_list("work_model", flat=True)
-        .distinct()
-    )
-
-    payload = {
-        "roles": roles,
-        "states": states,
-        "levels": levels,
-        "work_models": work_models,
-    }
+        return _json_response(cached)
 
+    payload = filter_facets(role)
     cache.set(cache_key, payload, timeout=300)
-    return JsonResponse(payload)
+    return _json_response(payload)